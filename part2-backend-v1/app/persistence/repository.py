@@ -11,6 +11,10 @@ class Repository(ABC):
     def get(self, obj_id):
         pass
 
+    @abstractmethod
+    def get_many(self, ids):
+        pass
+
     @abstractmethod
     def get_all(self):
         pass
@@ -38,6 +42,12 @@ class InMemoryRepository(Repository):
     def get(self, obj_id):
         return self._storage.get(obj_id)
 
+    def get_many(self, ids):
+        # (objects in the order of ids, ids not found); duplicates count once
+        ids = list(dict.fromkeys(ids))
+        return ([self._storage[i] for i in ids if i in self._storage],
+                [i for i in ids if i not in self._storage])
+
     def get_all(self):
         return list(self._storage.values())
 
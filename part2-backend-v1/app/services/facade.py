@@ -153,12 +153,9 @@ class HBnBFacade:
         # Amenities check (if exists)
         amenities = []
         if 'amenities' in place_data:
-            for amenity_id in place_data['amenities']:
-                # InMemoryRepository.get() only accepts obj_id since each entity uses its own repository instance.
-                amenity = self.amenity_repo.get(amenity_id)
-                if amenity is None:
-                    raise ValueError(f"Amenity not found: {amenity_id}")
-                amenities.append(amenity)
+            amenities, missing = self.amenity_repo.get_many(place_data['amenities'])
+            if missing:
+                raise ValueError(f"Amenity not found: {missing[0]}")
 
         # Create place
         place = Place(
@@ -234,12 +231,9 @@ class HBnBFacade:
 
                 # Verify amenities  
                 if field == 'amenities':
-                    amenities_list = []
-                    for amenity_id in value:
-                        amenity = self.amenity_repo.get(amenity_id)
-                        if amenity is None:
-                            raise ValueError(f"Amenity not found: {amenity_id}")
-                        amenities_list.append(amenity)
+                    amenities_list, missing = self.amenity_repo.get_many(value)
+                    if missing:
+                        raise ValueError(f"Amenity not found: {missing[0]}")
                     place.amenities = amenities_list
                 else:
                     setattr(place, field, value)
@@ -4,13 +4,19 @@ from flask import Flask
 from flask_restx import Api
 from flask_cors import CORS
 
-from app.extensions import db, bcrypt, jwt
+from app.extensions import db, bcrypt, hasher, jwt
+from app.commands import register_commands
+from app.persistence import (amenity_index, cache, engine, price_histogram, routing,
+                             search_index, unit_of_work)
+from app.utils import compression, metrics, profiling, rate_limit
 from app.models.place_image import PlaceImage  # noqa: F401 — registers table with SQLAlchemy
 from app.api.v1.users import api as users_ns
 from app.api.v1.amenities import api as amenities_ns
 from app.api.v1.places import api as places_ns
 from app.api.v1.reviews import api as reviews_ns
 from app.api.v1.auth import api as auth_ns
+from app.api.v1.admin import api as admin_ns
+from app.api.v1.serializers import output_json
 
 import config as app_config
 
@@ -25,19 +31,41 @@ def create_app(config_class=app_config.DevelopmentConfig):
     app.config.from_object(config_class)
     
     # Create instance/ folder if it doesn't exist
+    # (relative SQLite paths in the config are resolved inside it)
     os.makedirs(app.instance_path, exist_ok=True)
-    # Build absolute path for SQLite database file
-    db_path = os.path.join(app.instance_path, 'development.db')
-    # Override URI with absolute path for reliability
-    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    # Pool options from the config class (app/persistence/engine.py)
+    engine.configure(app)
 
     # Enable CORS for all /api/* routes
-    CORS(app, resources={r"/api/*": {"origins": "*"}})
+    CORS(app, resources={r"/api/*": {"origins": "*"}},
+         expose_headers=['Link', 'X-Next-Cursor', 'X-Reviews-Next-Cursor', 'ETag', 'Last-Modified',
+                         'Retry-After', 'X-Missing-Ids'])
+    # Prometheus metrics at /metrics; its hooks wrap all the others
+    metrics.init_app(app)
+    # Opt-in Server-Timing profiling
+    profiling.init_app(app)
+    # gzip/brotli responses; registered before the hooks below so it
+    # compresses their final response (the ones above only add headers)
+    compression.init_app(app)
 
     # Initialice the extensions
     bcrypt.init_app(app)
     jwt.init_app(app)
+    # Dummy hash for logins with an unknown email, computed now
+    hasher.init_app(app)
     db.init_app(app) # NEW: Bind SQLAlchemy to the Flask app
+    # Read replicas and read-your-writes stickiness
+    engine.create_replica_engines(app)
+    routing.init_app(app)
+    # SQLite tuning profile (WAL, synchronous=NORMAL, ...) on every connection
+    engine.apply_sqlite_pragmas(app)
+    profiling.instrument_engines(app)
+    # One commit per request (see app/persistence/unit_of_work.py)
+    unit_of_work.init_app(app)
+    # Read-through cache for repository lookups
+    cache.init_app(app)
+    # Login attempt throttling
+    rate_limit.init_app(app)
 
     authorizations = {
     'Bearer': {
@@ -57,6 +85,8 @@ def create_app(config_class=app_config.DevelopmentConfig):
         authorizations=authorizations,
         security='Bearer'
     )
+    # JSON responses encoded with orjson when installed (app/api/v1/serializers.py)
+    api.representations['application/json'] = output_json
 
     # Register the endpoins
     api.add_namespace(auth_ns, path='/api/v1/auth')
@@ -64,10 +94,20 @@ def create_app(config_class=app_config.DevelopmentConfig):
     api.add_namespace(amenities_ns, path='/api/v1/amenities')
     api.add_namespace(places_ns, path='/api/v1/places')
     api.add_namespace(reviews_ns, path='/api/v1/reviews')
+    api.add_namespace(admin_ns, path='/api/v1/admin')
     
+    # Register the flask CLI commands (flask hbnb ...)
+    register_commands(app)
+
     # Create the tables if they don't exist
     with app.app_context():
         db.create_all()
+    # Full-text search backend (FTS5 on SQLite); needs the tables above
+    search_index.init_app(app)
+    # Amenity bitmaps for ?amenities= filters and facet counts
+    amenity_index.init_app(app)
+    # Places per price step, for GET /places/price-histogram
+    price_histogram.init_app(app)
 
     return app
     
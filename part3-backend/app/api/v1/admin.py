@@ -0,0 +1,148 @@
+#!/usr/bin/python3
+from flask import Response, current_app, request, stream_with_context
+from flask_restx import Namespace, Resource, fields, reqparse
+from flask_jwt_extended import jwt_required, get_jwt
+from app.services import facade
+from app.api.v1.serializers import dumps
+from app.persistence.cache import get_cache
+from app.services.bulk_import import DEFAULT_CHUNK_SIZE
+from app.utils.profiling import get_profile_stats
+
+api = Namespace('admin', description='Administration operations')
+
+# Report returned by the bulk import endpoint
+import_error_model = api.model('ImportError', {
+    'line': fields.Integer(description='Line number in the NDJSON body'),
+    'error': fields.String(description='Why the row was rejected')
+})
+import_report_model = api.model('ImportReport', {
+    'entity': fields.String(description='Imported entity'),
+    'inserted': fields.Integer(description='Rows inserted'),
+    'failed': fields.Integer(description='Rows rejected'),
+    'errors': fields.List(fields.Nested(import_error_model),
+                          description='First rejected rows')
+})
+
+bulk_parser = reqparse.RequestParser()
+bulk_parser.add_argument('chunk_size', type=int, location='args',
+                         help=f'Rows validated and inserted per batch (default {DEFAULT_CHUNK_SIZE})')
+
+EXPORT_CHUNK_SIZE = 1000
+
+export_parser = reqparse.RequestParser()
+export_parser.add_argument('chunk_size', type=int, location='args',
+                           help=f'Rows fetched from the database per batch (default {EXPORT_CHUNK_SIZE})')
+
+
+# ------------------- Bulk import -------------------
+@api.route('/bulk/<string:entity>')
+@api.doc(params={'entity': 'places, reviews or amenities'})
+class BulkImport(Resource):
+    @jwt_required()
+    @api.expect(bulk_parser)
+    @api.response(200, 'Import finished (see failed/errors for rejected rows)', import_report_model)
+    @api.response(400, 'Unknown entity or invalid chunk_size')
+    @api.response(403, 'Admin privileges required')
+    def post(self, entity):
+        """Import an NDJSON body, one JSON object per line (admin only)"""
+        claims = get_jwt()
+        if not claims.get('is_admin'):
+            return {'error': 'Admin privileges required'}, 403
+        try:
+            chunk_size = int(request.args.get('chunk_size', DEFAULT_CHUNK_SIZE))
+            # The body is read line by line, never loaded whole in memory
+            report = facade.bulk_import(entity, request.stream, chunk_size)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return report, 200
+
+
+# ------------------- Streaming export -------------------
+def _ndjson_chunks(chunks):
+    """One bytes block per database chunk, one JSON object per line"""
+    for chunk in chunks:
+        yield b''.join(dumps(row) + b'\n' for row in chunk)
+
+
+@api.route('/export/<string:entity>')
+@api.doc(params={'entity': 'users, amenities, places or reviews'})
+class Export(Resource):
+    @jwt_required()
+    @api.expect(export_parser)
+    @api.produces(['application/x-ndjson'])
+    @api.response(200, 'NDJSON stream, one object per line (gzip/brotli if accepted)')
+    @api.response(400, 'Unknown entity or invalid chunk_size')
+    @api.response(403, 'Admin privileges required')
+    def get(self, entity):
+        """Stream every row of an entity as NDJSON (admin only)"""
+        claims = get_jwt()
+        if not claims.get('is_admin'):
+            return {'error': 'Admin privileges required'}, 403
+        try:
+            chunk_size = int(request.args.get('chunk_size', EXPORT_CHUNK_SIZE))
+            chunks = facade.export_chunks(entity, chunk_size)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        headers = {'Content-Disposition': f'attachment; filename="{entity}.ndjson"'}
+        # Rows are read lazily while the response is sent (and compressed
+        # block by block by app/utils/compression.py)
+        return Response(stream_with_context(_ndjson_chunks(chunks)),
+                        mimetype='application/x-ndjson', headers=headers)
+
+
+# ------------------- Cache statistics -------------------
+cache_stats_model = api.model('CacheStats', {
+    'backend': fields.String(description='lru, redis or null'),
+    'entries': fields.Integer(description='Entries currently stored'),
+    'hits': fields.Integer,
+    'misses': fields.Integer,
+    'evictions': fields.Integer(description='Entries dropped because the cache was full'),
+    'expirations': fields.Integer(description='Entries dropped because their TTL passed'),
+    'invalidations': fields.Integer(description='Entries dropped after a write'),
+    'errors': fields.Integer(description='Backend errors (treated as misses)'),
+    'hit_ratio': fields.Float
+})
+
+
+@api.route('/cache')
+class CacheStatistics(Resource):
+    @jwt_required()
+    @api.response(200, 'Counters since the process started', cache_stats_model)
+    @api.response(403, 'Admin privileges required')
+    def get(self):
+        """Entity cache hit/miss/eviction counters (admin only)"""
+        claims = get_jwt()
+        if not claims.get('is_admin'):
+            return {'error': 'Admin privileges required'}, 403
+        cache = get_cache()
+        return {'backend': cache.name, 'entries': len(cache), **cache.stats.as_dict()}, 200
+
+
+# ------------------- Request profiles -------------------
+@api.route('/profile')
+class RequestProfiles(Resource):
+    @jwt_required()
+    @api.response(200, 'Totals per endpoint since the process started or the last reset')
+    @api.response(403, 'Admin privileges required')
+    def get(self):
+        """
+        Per-endpoint SQL count, SQL/serialization/bcrypt/total time (admin only).
+        Empty unless PROFILING_ENABLED is set.
+        """
+        claims = get_jwt()
+        if not claims.get('is_admin'):
+            return {'error': 'Admin privileges required'}, 403
+        return {'enabled': current_app.config.get('PROFILING_ENABLED', False),
+                'endpoints': get_profile_stats().as_dict()}, 200
+
+    @jwt_required()
+    @api.response(200, 'Totals reset')
+    @api.response(403, 'Admin privileges required')
+    def delete(self):
+        """Reset the per-endpoint totals (admin only)"""
+        claims = get_jwt()
+        if not claims.get('is_admin'):
+            return {'error': 'Admin privileges required'}, 403
+        get_profile_stats().reset()
+        return {'message': 'Profile totals reset'}, 200
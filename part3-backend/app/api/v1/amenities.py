@@ -1,75 +1,109 @@
-#!/usr/bin/python3
-from flask_restx import Namespace, Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt
-from app.services import facade
-
-api = Namespace('amenities', description='Amenity operations')
-
-# Model for validation and Swagger
-amenity_model = api.model('Amenity', {
-    'name': fields.String(required=True, description='Name of the amenity')
-})
-
-
-# ------------------- List -------------------
-@api.route('/')
-class AmenityList(Resource):
-    @jwt_required()
-    @api.expect(amenity_model, validate=True)
-    @api.response(201, 'Amenity successfully created')
-    @api.response(400, 'Invalid input data')
-    @api.response(403, 'Admin privileges required')
-    def post(self):
-        """Create a new amenity (admin only)"""
-        claims = get_jwt()
-        if not claims.get('is_admin'):
-            return {'error': 'Admin privileges required'}, 403
-        try:
-            amenity = facade.create_amenity(api.payload)
-        except ValueError as e:
-            return {'error': str(e)}, 400
-        return {'id': amenity.id, 'name': amenity.name}, 201
-
-    @api.response(200, 'List of amenities retrieved successfully')
-    def get(self):
-        """Retrieve a list of all amenities"""
-        amenities = facade.get_all_amenities()
-        return [{'id': a.id, 'name': a.name} for a in amenities], 200
-
-
-# ------------------- Details -------------------
-@api.route('/<string:amenity_id>')
-class AmenityResource(Resource):
-    @api.response(200, 'Amenity details retrieved successfully')
-    @api.response(404, 'Amenity not found')
-    def get(self, amenity_id):
-        """Retrieve an amenity by ID (public)"""
-        amenity = facade.get_amenity(amenity_id)
-        if not amenity:
-            return {'error': 'Amenity not found'}, 404
-        return {'id': amenity.id, 'name': amenity.name}, 200
-
-    @jwt_required()
-    @api.expect(amenity_model, validate=True)
-    @api.response(200, 'Amenity updated successfully')
-    @api.response(400, 'Invalid input data')
-    @api.response(403, 'Admin privileges required')
-    @api.response(404, 'Amenity not found')
-    def put(self, amenity_id):
-        """Update an amenity (admin only)"""
-        claims = get_jwt()
-        if not claims.get('is_admin'):
-            return {'error': 'Admin privileges required'}, 403
-        try:
-            updated = facade.update_amenity(amenity_id, api.payload)
-        except ValueError as e:
-            return {'error': str(e)}, 400
-        if not updated:
-            return {'error': 'Amenity not found'}, 404
-        return {
-            'message': 'Amenity updated successfully',
-            'amenity': {
-                'id': updated.id,
-                'name': updated.name
-            }
-        }, 200
+#!/usr/bin/python3
+from flask_restx import Namespace, Resource, fields
+from flask_jwt_extended import jwt_required, get_jwt
+from app.services import facade
+from app.api.v1.pagination import (page_parser, parse_page_args, page_headers, parse_ids,
+                                   batch_response)
+from app.api.v1.conditional import make_validators, check_not_modified, validator_headers
+from app.api.v1.serializers import AMENITY, parse_fields
+
+api = Namespace('amenities', description='Amenity operations')
+
+# Model for validation and Swagger
+amenity_model = api.model('Amenity', {
+    'name': fields.String(required=True, description='Name of the amenity')
+})
+
+# Query parameters accepted by GET /amenities/
+AMENITY_SORT_FIELDS = {'created_at': 'created_at', 'name': 'name'}
+AMENITY_FILTER_FIELDS = ('name',)
+AMENITY_RANGE_FIELDS = ('created_at',)
+amenity_page_parser = page_parser(AMENITY_SORT_FIELDS, AMENITY_FILTER_FIELDS, AMENITY_RANGE_FIELDS, batch=True)
+
+
+# ------------------- List -------------------
+@api.route('/')
+class AmenityList(Resource):
+    @jwt_required()
+    @api.expect(amenity_model, validate=True)
+    @api.response(201, 'Amenity successfully created')
+    @api.response(400, 'Invalid input data')
+    @api.response(403, 'Admin privileges required')
+    def post(self):
+        """Create a new amenity (admin only)"""
+        claims = get_jwt()
+        if not claims.get('is_admin'):
+            return {'error': 'Admin privileges required'}, 403
+        try:
+            amenity = facade.create_amenity(api.payload)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return AMENITY.dump(amenity), 201
+
+    @api.expect(amenity_page_parser)
+    @api.response(200, 'List of amenities retrieved successfully')
+    @api.response(304, 'Not modified since the ETag / date sent by the client')
+    @api.response(400, 'Invalid pagination, sort or filter parameters')
+    def get(self):
+        """Retrieve one page of amenities, or the amenities listed in ?ids="""
+        try:
+            only = parse_fields(AMENITY)
+            ids = parse_ids()
+            if ids is not None:
+                amenities, missing = facade.get_amenities_by_ids(ids)
+                return batch_response(AMENITY, amenities, missing, only)
+            page_args = parse_page_args(AMENITY_SORT_FIELDS, AMENITY_FILTER_FIELDS, AMENITY_RANGE_FIELDS)
+            etag, last_modified = make_validators(
+                *facade.get_amenities_version(page_args['filters'], page_args['ranges']))
+            not_modified = check_not_modified(etag, last_modified)
+            if not_modified:
+                return not_modified
+            amenities, next_cursor = facade.get_amenities_page(**page_args)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return AMENITY.dump_many(amenities, only), 200, {
+            **page_headers(next_cursor), **validator_headers(etag, last_modified)}
+
+
+# ------------------- Details -------------------
+@api.route('/<string:amenity_id>')
+class AmenityResource(Resource):
+    @api.response(200, 'Amenity details retrieved successfully')
+    @api.response(304, 'Not modified since the ETag / date sent by the client')
+    @api.response(404, 'Amenity not found')
+    def get(self, amenity_id):
+        """Retrieve an amenity by ID (public)"""
+        try:
+            only = parse_fields(AMENITY)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        amenity = facade.get_amenity(amenity_id)
+        if not amenity:
+            return {'error': 'Amenity not found'}, 404
+        etag, last_modified = make_validators(amenity.id, amenity.updated_at)
+        not_modified = check_not_modified(etag, last_modified)
+        if not_modified:
+            return not_modified
+        return AMENITY.dump(amenity, only), 200, validator_headers(etag, last_modified)
+
+    @jwt_required()
+    @api.expect(amenity_model, validate=True)
+    @api.response(200, 'Amenity updated successfully')
+    @api.response(400, 'Invalid input data')
+    @api.response(403, 'Admin privileges required')
+    @api.response(404, 'Amenity not found')
+    def put(self, amenity_id):
+        """Update an amenity (admin only)"""
+        claims = get_jwt()
+        if not claims.get('is_admin'):
+            return {'error': 'Admin privileges required'}, 403
+        try:
+            updated = facade.update_amenity(amenity_id, api.payload)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        if not updated:
+            return {'error': 'Amenity not found'}, 404
+        return {
+            'message': 'Amenity updated successfully',
+            'amenity': AMENITY.dump(updated)
+        }, 200
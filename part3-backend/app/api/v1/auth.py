@@ -1,6 +1,10 @@
+import math
+from flask import request
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
 from app.services import facade
+from app.utils.metrics import LOGINS, inc
+from app.utils.rate_limit import get_limiter
 from datetime import timedelta
 
 api = Namespace('auth', description='Authentication operations')
@@ -16,15 +20,24 @@ class Login(Resource):
     @api.expect(login_model)
     @api.response(200, 'Login successful')
     @api.response(401, 'Invalid credentials')
+    @api.response(429, 'Too many login attempts (see Retry-After)')
     def post(self):
         """Authenticate user and return a JWT token"""
         # Get the email and password from the request payload
         credentials = api.payload
-        # Step 1: Retrieve the user based on the provided email
-        user = facade.get_user_by_email(credentials['email'])
-        # Step 2: Check if the user exists and the password is correct
-        if not user or not user.verify_password(credentials['password']):
+        # Throttled attempts are refused before any password hashing
+        retry_after = get_limiter().hit(request.remote_addr, credentials.get('email'))
+        if retry_after:
+            inc(LOGINS, 'throttled')
+            return ({'error': 'Too many login attempts, try again later'}, 429,
+                    {'Retry-After': str(math.ceil(retry_after))})
+        # Step 1 & 2: Retrieve the user by email and check the password
+        # (the hash is upgraded if the configured bcrypt cost changed)
+        user = facade.authenticate(credentials['email'], credentials['password'])
+        if not user:
+            inc(LOGINS, 'failure')
             return {'error': 'Invalid credentials'}, 401
+        inc(LOGINS, 'success')
         # Step 3: Create a JWT token with the user's id and is_admin flag
         access_token = create_access_token(
             identity=str(user.id),   # only user ID goes here
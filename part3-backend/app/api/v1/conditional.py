@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+"""
+Conditional GET helpers: ETag / Last-Modified validators and 304 responses.
+
+Resources compute the validators from a cheap version query (ids,
+updated_at, counts) before loading and serializing the full data:
+
+    etag, last_modified = make_validators(*facade.get_place_version(place_id))
+    not_modified = check_not_modified(etag, last_modified)
+    if not_modified:
+        return not_modified
+    ...
+    return body, 200, validator_headers(etag, last_modified)
+"""
+import hashlib
+from datetime import datetime, timezone
+from flask import Response, request
+from werkzeug.http import http_date
+
+
+def _utc(value):
+    # SQLite returns naive datetimes; they are stored in UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def make_validators(*parts):
+    """
+    (etag, last_modified) for a representation built from parts.
+    The ETag also covers the path and query string (page, sort, filters);
+    Last-Modified is the newest datetime among the parts, or None.
+    """
+    stamps = [_utc(p) for p in parts if isinstance(p, datetime)]
+    key = '|'.join(str(p) for p in (request.path, request.query_string.decode()) + parts)
+    etag = f'W/"{hashlib.sha1(key.encode()).hexdigest()}"'
+    return etag, max(stamps) if stamps else None
+
+
+def row_versions(*rows):
+    """make_validators parts for rows already loaded: each row's id and updated_at"""
+    return [part for row in rows for part in (row.id, row.updated_at)]
+
+
+def validator_headers(etag, last_modified):
+    """ETag/Last-Modified headers; no-cache makes clients revalidate on every use"""
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+    return headers
+
+
+def check_not_modified(etag, last_modified):
+    """
+    A 304 response if the client's copy is current, otherwise None.
+    If-None-Match wins over If-Modified-Since when both are sent.
+    """
+    if request.if_none_match:
+        # contains_weak takes the opaque tag: W/"abc" -> abc
+        fresh = request.if_none_match.contains_weak(etag[2:].strip('"'))
+    elif request.if_modified_since and last_modified is not None:
+        # HTTP dates have a one second resolution
+        fresh = last_modified.replace(microsecond=0) <= request.if_modified_since
+    else:
+        fresh = False
+    if not fresh:
+        return None
+    return Response(status=304, headers=validator_headers(etag, last_modified))
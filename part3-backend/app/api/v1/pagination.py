@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+from urllib.parse import urlencode
+from flask import current_app, request
+from flask_restx import reqparse
+from app.api.v1.conditional import make_validators, check_not_modified, row_versions, validator_headers
+
+
+def page_parser(sort_fields, filter_fields=(), range_fields=(), batch=False):
+    """
+    Build the request parser for a collection endpoint.
+    Used with @api.expect so the query parameters appear in Swagger.
+    batch: the endpoint also accepts ?ids= (parse_ids).
+    """
+    parser = reqparse.RequestParser()
+    if batch:
+        parser.add_argument('ids', type=str, location='args',
+                            help='Comma-separated ids to fetch in one request, in this order '
+                                 '(other parameters except fields are ignored)')
+    parser.add_argument('limit', type=int, location='args',
+                        help='Maximum number of items per page')
+    parser.add_argument('cursor', type=str, location='args',
+                        help='Opaque cursor from the previous page (X-Next-Cursor)')
+    parser.add_argument('sort', type=str, location='args',
+                        help=f"One of {', '.join(sort_fields)}; prefix with - for descending")
+    for field in filter_fields:
+        parser.add_argument(field, type=str, location='args',
+                            help=f'Only items whose {field} equals this value')
+    for field in range_fields:
+        parser.add_argument(f'min_{field}', type=str, location='args',
+                            help=f'Only items whose {field} is >= this value')
+        parser.add_argument(f'max_{field}', type=str, location='args',
+                            help=f'Only items whose {field} is <= this value')
+    parser.add_argument('fields', type=str, location='args',
+                        help='Comma-separated fields to return (default: all)')
+    return parser
+
+
+def parse_page_args(sort_fields, filter_fields=(), range_fields=(), default_sort='created_at'):
+    """
+    Read limit/cursor/sort/filters from the query string.
+    sort_fields maps the public sort name to the model column.
+    Returns the keyword arguments for SQLAlchemyRepository.query_page.
+    Raises ValueError on invalid input.
+    """
+    args = request.args
+    default_limit = current_app.config.get('PAGE_SIZE_DEFAULT', 100)
+    max_limit = current_app.config.get('PAGE_SIZE_MAX', 1000)
+    try:
+        limit = int(args.get('limit', default_limit))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if not (1 <= limit <= max_limit):
+        raise ValueError(f"limit must be between 1 and {max_limit}")
+
+    sort = args.get('sort', default_sort)
+    descending = sort.startswith('-')
+    sort = sort.lstrip('-')
+    if sort not in sort_fields:
+        raise ValueError(f"sort must be one of: {', '.join(sort_fields)}")
+
+    filters = {f: args[f] for f in filter_fields if f in args}
+    ranges = {}
+    for field in range_fields:
+        low, high = args.get(f'min_{field}'), args.get(f'max_{field}')
+        if low is not None or high is not None:
+            ranges[field] = (low, high)
+
+    return {
+        'limit': limit,
+        'cursor': args.get('cursor'),
+        'sort': sort_fields[sort],
+        'descending': descending,
+        'filters': filters,
+        'ranges': ranges,
+    }
+
+
+def page_headers(next_cursor):
+    """Headers pointing the client to the next page (empty on the last page)."""
+    if next_cursor is None:
+        return {}
+    args = request.args.to_dict()
+    args['cursor'] = next_cursor
+    next_url = f"{request.base_url}?{urlencode(args)}"
+    return {
+        'Link': f'<{next_url}>; rel="next"',
+        'X-Next-Cursor': next_cursor
+    }
+
+
+def parse_ids():
+    """
+    The ids of ?ids=a,b,c, or None without the parameter. Duplicates count
+    once. Raises ValueError on an empty list or more than BATCH_IDS_MAX ids.
+    """
+    if 'ids' not in request.args:
+        return None
+    ids = list(dict.fromkeys(i.strip() for i in request.args['ids'].split(',') if i.strip()))
+    max_ids = current_app.config.get('BATCH_IDS_MAX', 100)
+    if not ids:
+        raise ValueError("ids must contain at least one id")
+    if len(ids) > max_ids:
+        raise ValueError(f"ids accepts at most {max_ids} ids")
+    return ids
+
+
+def batch_response(serializer, rows, missing, only=None, related=()):
+    """
+    Response of a ?ids= lookup: the rows in the requested order, the ids
+    that do not exist in X-Missing-Ids. The validators come from the rows
+    and the related rows they embed; those are loaded already, so a 304
+    only saves serializing and sending them.
+    """
+    etag, last_modified = make_validators(*row_versions(*rows, *related))
+    not_modified = check_not_modified(etag, last_modified)
+    if not_modified:
+        return not_modified
+    headers = validator_headers(etag, last_modified)
+    if missing:
+        headers['X-Missing-Ids'] = ','.join(missing)
+    return serializer.dump_many(rows, only), 200, headers
@@ -1,7 +1,12 @@
-from flask import request
-from flask_restx import Namespace, Resource, fields
+from flask import request, current_app
+from flask_restx import Namespace, Resource, fields, reqparse
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from app.services import facade
+from app.api.v1.pagination import (page_parser, parse_page_args, page_headers, parse_ids,
+                                   batch_response)
+from app.api.v1.conditional import make_validators, check_not_modified, validator_headers
+from app.api.v1.serializers import (PLACE, PLACE_DETAIL, PLACE_IMAGE, PLACE_REVIEW,
+                                    PLACE_SUMMARY, parse_fields)
 
 api = Namespace('places', description='Place operations')
 
@@ -27,7 +32,13 @@ review_model = api.model('PlaceReview', {
     'id': fields.String(description='Review ID'),
     'text': fields.String(description='Text of the review'),
     'rating': fields.Integer(description='Rating of the place (1-5)'),
-    'user_id': fields.String(description='ID of the user')
+    'user_id': fields.String(description='ID of the user'),
+    'created_at': fields.String(description='Creation date (ISO 8601)'),
+    'user': fields.Nested(api.model('PlaceReviewer', {
+        'id': fields.String(description='User ID'),
+        'first_name': fields.String(description='First name of the reviewer'),
+        'last_name': fields.String(description='Last name of the reviewer')
+    }), description='Reviewer summary')
 })
 
 # Adding the place model for input validation and documentation 
@@ -41,9 +52,71 @@ place_model = api.model('Place', {
     'image_url': fields.String(description='URL or path to place image'),
     'owner': fields.Nested(user_model, description='Owner of the place'),
     'amenities': fields.List(fields.Nested(amenity_model), description='List of amenities'),
-    'reviews': fields.List(fields.Nested(review_model), description='List of reviews')
+    'reviews': fields.List(fields.Nested(review_model), description='List of reviews'),
+    'review_count': fields.Integer(readonly=True, description='Number of reviews'),
+    'average_rating': fields.Float(readonly=True, description='Average review rating')
 })
 
+# Query parameters accepted by GET /places/search
+search_parser = reqparse.RequestParser()
+search_parser.add_argument('q', type=str, location='args',
+                           help='Words to find in titles, descriptions and reviews; word* for a prefix')
+search_parser.add_argument('lat', type=float, location='args', help='Latitude of the center')
+search_parser.add_argument('lon', type=float, location='args', help='Longitude of the center')
+search_parser.add_argument('radius_km', type=float, location='args', help='Search radius in km')
+search_parser.add_argument('bbox', type=str, location='args',
+                           help='min_lon,min_lat,max_lon,max_lat (instead of lat/lon/radius_km)')
+search_parser.add_argument('min_price', type=float, location='args', help='Minimum price per night')
+search_parser.add_argument('max_price', type=float, location='args', help='Maximum price per night')
+search_parser.add_argument('limit', type=int, location='args', help='Maximum number of places')
+search_parser.add_argument('fields', type=str, location='args',
+                           help='Comma-separated fields to return (default: all)')
+
+# Query parameters accepted by GET /places/<place_id>
+detail_parser = reqparse.RequestParser()
+detail_parser.add_argument('fields', type=str, location='args',
+                           help='Comma-separated fields to return (default: all)')
+
+# Query parameters accepted by GET /places/
+PLACE_SORT_FIELDS = {'created_at': 'created_at', 'price': 'price', 'rating': 'average_rating',
+                     'rank': 'rank_score'}
+PLACE_FILTER_FIELDS = ('owner_id',)
+PLACE_RANGE_FIELDS = ('price', 'created_at')
+place_page_parser = page_parser(PLACE_SORT_FIELDS, PLACE_FILTER_FIELDS, PLACE_RANGE_FIELDS, batch=True)
+place_page_parser.add_argument('amenities', type=str, location='args',
+                               help='Comma-separated amenity ids or names, e.g. wifi,pool')
+place_page_parser.add_argument('amenities_match', type=str, location='args',
+                               help="'all' (default): places with every amenity; 'any': with at least one")
+
+# Query parameters accepted by GET /places/facets
+facets_parser = reqparse.RequestParser()
+for _name in ('amenities', 'amenities_match', *PLACE_FILTER_FIELDS):
+    facets_parser.add_argument(_name, type=str, location='args')
+for _name in PLACE_RANGE_FIELDS:
+    facets_parser.add_argument(f'min_{_name}', type=str, location='args')
+    facets_parser.add_argument(f'max_{_name}', type=str, location='args')
+
+# Query parameters accepted by GET /places/price-histogram
+histogram_parser = reqparse.RequestParser()
+histogram_parser.add_argument('buckets', type=int, location='args',
+                              help='Number of buckets (1-100, default 10)')
+
+
+def parse_amenity_filter():
+    """
+    (amenity ids or names, match_all) from ?amenities=&amenities_match=;
+    the list is empty without an amenities filter. Raises ValueError.
+    """
+    amenities = [a.strip() for a in request.args.get('amenities', '').split(',') if a.strip()]
+    match = request.args.get('amenities_match', 'all')
+    if match not in ('all', 'any'):
+        raise ValueError("amenities_match must be 'all' or 'any'")
+    return amenities, match == 'all'
+
+# Query parameters accepted by GET /places/<place_id>/reviews
+PLACE_REVIEW_SORT_FIELDS = {'created_at': 'created_at', 'rating': 'rating'}
+place_review_page_parser = page_parser(PLACE_REVIEW_SORT_FIELDS)
+
 # --------------------------------------
 # 
 # --------------------------------------
@@ -63,66 +136,191 @@ class PlaceList(Resource):
         place_data['owner_id'] = current_user
         try:
             place = facade.create_place(place_data)
-            return {
-                'id': place.id,
-                'title': place.title,
-                'description': place.description,
-                'price': place.price,
-                'latitude': place.latitude,
-                'longitude': place.longitude,
-                'owner_id': place.owner_id,
-                'image_url': place.image_url
-            }, 201
+            return PLACE.dump(place), 201
         except ValueError as e:
             return {'error': str(e)}, 400
 
+    @api.expect(place_page_parser)
     @api.response(200, 'List of places retrieved successfully')
+    @api.response(304, 'Not modified since the ETag / date sent by the client')
+    @api.response(400, 'Invalid pagination, sort or filter parameters')
+    def get(self):
+        """Retrieve one page of places, or the places listed in ?ids= (public)"""
+        try:
+            only = parse_fields(PLACE_SUMMARY)
+            ids = parse_ids()
+            if ids is not None:
+                places, missing = facade.get_places_by_ids(ids)
+                # Each place embeds its owner and amenities
+                related = [p.owner for p in places] + [a for p in places for a in p.amenities]
+                return batch_response(PLACE_SUMMARY, places, missing, only, related)
+            page_args = parse_page_args(PLACE_SORT_FIELDS, PLACE_FILTER_FIELDS, PLACE_RANGE_FIELDS)
+            amenities, match_all = parse_amenity_filter()
+            if amenities:
+                page_args['conditions'] = facade.place_amenity_conditions(amenities, match_all)
+            etag, last_modified = make_validators(*facade.get_places_version(
+                page_args['filters'], page_args['ranges'], page_args.get('conditions', ()),
+                ranked=page_args['sort'] == 'rank_score'))
+            not_modified = check_not_modified(etag, last_modified)
+            if not_modified:
+                return not_modified
+            places, next_cursor = facade.get_places_page(**page_args)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return PLACE_SUMMARY.dump_many(places, only), 200, {
+            **page_headers(next_cursor), **validator_headers(etag, last_modified)}
+
+@api.route('/facets')
+class PlaceFacets(Resource):
+    @api.expect(facets_parser)
+    @api.response(200, 'Number of places per amenity')
+    @api.response(304, 'Not modified since the ETag / date sent by the client')
+    @api.response(400, 'Invalid filter parameters')
     def get(self):
-        """Retrieve a list of all places (public)"""
-        places = facade.get_all_places()
-        return [{
-            'id': p.id,
-            'title': p.title,
-            'latitude': p.latitude,
-            'longitude': p.longitude,
-            'price': p.price,
-            'owner': {
-                'id': p.owner.id,
-                'first_name': p.owner.first_name,
-                'last_name': p.owner.last_name
-            } if getattr(p, 'owner', None) else None,
-            'amenities': [{'id': a.id, 'name': a.name} for a in getattr(p, 'amenities', [])],
-            'image_url': p.image_url
-        } for p in places], 200
+        """
+        Amenity facet counts (public): for each amenity, how many places
+        matching the same filters as GET /places/ also have it.
+        """
+        try:
+            page_args = parse_page_args(PLACE_SORT_FIELDS, PLACE_FILTER_FIELDS, PLACE_RANGE_FIELDS)
+            amenities, match_all = parse_amenity_filter()
+            # The ETag covers the query string, i.e. the filters
+            etag, last_modified = make_validators(*facade.get_places_version())
+            not_modified = check_not_modified(etag, last_modified)
+            if not_modified:
+                return not_modified
+            total, facets = facade.get_place_facets(amenities, match_all,
+                                                    page_args['filters'], page_args['ranges'])
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return {'total': total, 'amenities': facets}, 200, validator_headers(etag, last_modified)
+
+@api.route('/price-histogram')
+class PlacePriceHistogram(Resource):
+    @api.expect(histogram_parser)
+    @api.response(200, 'Number of places per price range')
+    @api.response(304, 'Not modified since the ETag / date sent by the client')
+    @api.response(400, 'Invalid number of buckets')
+    def get(self):
+        """
+        Price distribution of all places in equal-width buckets (public),
+        from a summary table maintained on every place write.
+        """
+        try:
+            buckets = int(request.args.get('buckets', 10))
+            etag, last_modified = make_validators(*facade.get_places_version())
+            not_modified = check_not_modified(etag, last_modified)
+            if not_modified:
+                return not_modified
+            histogram = facade.get_price_histogram(buckets)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return histogram, 200, validator_headers(etag, last_modified)
+
+@api.route('/search')
+class PlaceSearch(Resource):
+    @api.expect(search_parser)
+    @api.response(200, 'Places matching the search')
+    @api.response(304, 'Not modified since the ETag / date sent by the client')
+    @api.response(400, 'Invalid search parameters')
+    def get(self):
+        """
+        Search places by text (q), radius (lat, lon, radius_km) or bounding box (bbox),
+        optionally within a price range (public). Text results are ordered by
+        relevance, radius results by distance.
+        """
+        args = request.args
+        try:
+            only = parse_fields(PLACE_SUMMARY)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        # Any place or review change may change the results: validate against all of them
+        etag, last_modified = make_validators(
+            *facade.get_places_version(), *facade.get_reviews_version())
+        not_modified = check_not_modified(etag, last_modified)
+        if not_modified:
+            return not_modified
+        headers = validator_headers(etag, last_modified)
+        max_limit = current_app.config.get('PAGE_SIZE_MAX', 1000)
+        try:
+            limit = int(args.get('limit', current_app.config.get('PAGE_SIZE_DEFAULT', 100)))
+            if not (1 <= limit <= max_limit):
+                raise ValueError(f"limit must be between 1 and {max_limit}")
+            prices = {k: float(args[k]) for k in ('min_price', 'max_price') if k in args}
+            bbox = near = None
+            if 'bbox' in args:
+                parts = [float(v) for v in args['bbox'].split(',')]
+                if len(parts) != 4:
+                    raise ValueError("bbox must be min_lon,min_lat,max_lon,max_lat")
+                min_lon, min_lat, max_lon, max_lat = parts
+                bbox = (min_lat, min_lon, max_lat, max_lon)
+            elif any(k in args for k in ('lat', 'lon', 'radius_km')):
+                if not all(k in args for k in ('lat', 'lon', 'radius_km')):
+                    raise ValueError("Provide lat, lon and radius_km together")
+                near = (float(args['lat']), float(args['lon']), float(args['radius_km']))
+
+            if 'q' in args:
+                results = facade.search_places_text(args['q'], limit, bbox=bbox, near=near, **prices)
+            elif bbox is not None:
+                places = facade.search_places_in_bbox(*bbox, limit, **prices)
+                return PLACE_SUMMARY.dump_many(places, only), 200, headers
+            elif near is not None:
+                results = [(p, None, d) for p, d in facade.search_places_nearby(*near, limit, **prices)]
+            else:
+                raise ValueError("Provide q, lat, lon and radius_km, or bbox")
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        fields = PLACE_SUMMARY.select(only)
+        body = []
+        for place, relevance, distance in results:
+            item = {name: get(place) for name, get in fields}
+            if relevance is not None:
+                item['relevance'] = round(relevance, 4)
+            if distance is not None:
+                item['distance_km'] = round(distance, 3)
+            body.append(item)
+        return body, 200, headers
 
 @api.route('/<place_id>')
 class PlaceResource(Resource):
+    @api.expect(detail_parser)
     @api.response(200, 'Place details retrieved successfully')
+    @api.response(304, 'Not modified since the ETag / date sent by the client')
     @api.response(404, 'Place not found')
+    @api.response(400, 'Unknown field in fields')
     def get(self, place_id):
         """Get place details by ID (public)"""
+        try:
+            only = parse_fields(PLACE_DETAIL)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        # One small query decides whether the client's copy is still current,
+        # before the place, owner, amenities and reviews are loaded
+        version = facade.get_place_version(place_id)
+        if version is None:
+            return {'error': 'Place not found'}, 404
+        etag, last_modified = make_validators(place_id, *version)
+        not_modified = check_not_modified(etag, last_modified)
+        if not_modified:
+            return not_modified
+
         place = facade.get_place(place_id)
         if place is None:
             return {'error': 'Place not found'}, 404
-        reviews = facade.get_reviews_by_place(place_id)
-        return {
-            'id': place.id,
-            'title': place.title,
-            'description': place.description,
-            'price': place.price,
-            'latitude': place.latitude,
-            'longitude': place.longitude,
-            'owner': {
-                'id': getattr(place.owner, 'id', None),
-                'first_name': getattr(place.owner, 'first_name', None),
-                'last_name': getattr(place.owner, 'last_name', None),
-                'email': getattr(place.owner, 'email', None)
-            } if getattr(place, 'owner', None) else None,
-            'amenities': [{'id': a.id, 'name': a.name} for a in getattr(place, 'amenities', [])],
-            'reviews': [{'id': r.id, 'text': r.text, 'rating': r.rating, 'user_id': r.user_id, 'created_at': r.created_at.isoformat() if r.created_at else None} for r in reviews] if reviews else [],
-            'image_url': place.image_url,
-            'images': [{'id': img.id, 'image_url': img.image_url} for img in getattr(place, 'images', [])]
-        }, 200
+        body = PLACE_DETAIL.dump(place, only)
+        headers = validator_headers(etag, last_modified)
+        # Reviews come from their own indexed query (reviewers joined in),
+        # skipped when not requested. Newest page only: X-Reviews-Next-Cursor
+        # continues at /places/<id>/reviews?sort=-created_at&cursor=
+        if PLACE_DETAIL.wants('reviews', only):
+            reviews, next_cursor = facade.get_reviews_page_by_place(
+                place_id, limit=current_app.config.get('PLACE_DETAIL_REVIEWS', 20),
+                sort='created_at', descending=True)
+            body['reviews'] = PLACE_REVIEW.dump_many(reviews)
+            if next_cursor:
+                headers['X-Reviews-Next-Cursor'] = next_cursor
+        return body, 200, headers
 
     @jwt_required()
     @api.expect(place_model)
@@ -148,16 +346,7 @@ class PlaceResource(Resource):
             updated_place = facade.update_place(place_id, request.json)
             if updated_place is None:
                 return {'error': 'Place not found'}, 404
-            return {
-                'id': updated_place.id,
-                'title': updated_place.title,
-                'description': updated_place.description,
-                'price': updated_place.price,
-                'latitude': updated_place.latitude,
-                'longitude': updated_place.longitude,
-                'owner_id': updated_place.owner_id,
-                'image_url': updated_place.image_url
-            }, 200
+            return PLACE.dump(updated_place), 200
         except ValueError as e:
             return {'error': str(e)}, 400
 
@@ -165,27 +354,45 @@ class PlaceResource(Resource):
 @api.route('/<place_id>/reviews')
 class PlaceReviewList(Resource):
     @api.response(200, 'List of reviews for the place retrieved successfully')
+    @api.response(304, 'Not modified since the ETag / date sent by the client')
     @api.response(404, 'Place not found')
+    @api.expect(place_review_page_parser)
+    @api.response(400, 'Invalid pagination or sort parameters')
     def get(self, place_id):
-        """Get all reviews for a specific place"""
-        reviews = facade.get_reviews_by_place(place_id)
-        if reviews is None:
+        """Get one page of the reviews of a specific place"""
+        try:
+            page_args = parse_page_args(PLACE_REVIEW_SORT_FIELDS)
+            only = parse_fields(PLACE_REVIEW)
+            etag, last_modified = make_validators(*facade.get_place_reviews_version(place_id))
+            not_modified = check_not_modified(etag, last_modified)
+            if not_modified:
+                return not_modified
+            page = facade.get_reviews_page_by_place(place_id, **page_args)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        if page is None:
             return {'error': 'Place not found'}, 404
-        return [{
-            'id': r.id,
-            'text': r.text,
-            'rating': r.rating,
-            'user_id': r.user_id
-            } for r in reviews], 200
+        reviews, next_cursor = page
+        return PLACE_REVIEW.dump_many(reviews, only), 200, {
+                **page_headers(next_cursor), **validator_headers(etag, last_modified)}
 
 @api.route('/<place_id>/images')
 class PlaceImageList(Resource):
     @api.response(200, 'Images retrieved successfully')
+    @api.response(304, 'Not modified since the ETag / date sent by the client')
     @api.response(404, 'Place not found')
     def get(self, place_id):
         """Get all gallery images for a place (public)"""
+        version = facade.get_place_version(place_id)
+        headers = {}
+        if version is not None:
+            etag, last_modified = make_validators(place_id, *version)
+            not_modified = check_not_modified(etag, last_modified)
+            if not_modified:
+                return not_modified
+            headers = validator_headers(etag, last_modified)
         images = facade.get_place_images(place_id)
-        return [{'id': img.id, 'image_url': img.image_url} for img in images], 200
+        return PLACE_IMAGE.dump_many(images), 200, headers
 
     @jwt_required()
     @api.response(201, 'Image added successfully')
@@ -209,7 +416,7 @@ class PlaceImageList(Resource):
 
         try:
             img = facade.add_place_image(place_id, data['image_url'])
-            return {'id': img.id, 'image_url': img.image_url}, 201
+            return PLACE_IMAGE.dump(img), 201
         except ValueError as e:
             return {'error': str(e)}, 400
 
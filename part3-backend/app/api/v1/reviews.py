@@ -1,6 +1,10 @@
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from app.services import facade
+from app.api.v1.pagination import (page_parser, parse_page_args, page_headers, parse_ids,
+                                   batch_response)
+from app.api.v1.conditional import make_validators, check_not_modified, validator_headers
+from app.api.v1.serializers import REVIEW, parse_fields
 from flask import request
 
 api = Namespace('reviews', description='Review operations')
@@ -13,6 +17,12 @@ review_model = api.model('Review', {
     'place_id': fields.String(required=True, description='ID of the place')
 })
 
+# Query parameters accepted by GET /reviews/
+REVIEW_SORT_FIELDS = {'created_at': 'created_at', 'rating': 'rating'}
+REVIEW_FILTER_FIELDS = ('place_id', 'user_id')
+REVIEW_RANGE_FIELDS = ('rating', 'created_at')
+review_page_parser = page_parser(REVIEW_SORT_FIELDS, REVIEW_FILTER_FIELDS, REVIEW_RANGE_FIELDS, batch=True)
+
 @api.route('/')
 class ReviewList(Resource):
     @jwt_required()
@@ -37,50 +47,58 @@ class ReviewList(Resource):
             return {'error': 'You cannot review your own place'}, 400
 
         # Check that the user has not already reviewed this place
-        existing_reviews = facade.get_reviews_by_place(review_data['place_id'])
-        for review in existing_reviews:
-            if review.user_id == current_user:
-                return {'error': 'You have already reviewed this place'}, 400
+        # (single indexed existence probe; the unique constraint catches races)
+        if facade.has_reviewed_place(current_user, review_data['place_id']):
+            return {'error': 'You have already reviewed this place'}, 400
         try:
             r = facade.create_review(review_data)
-            return {
-                'id': r.id,
-                'text': r.text,
-                'rating': r.rating,
-                'user_id': r.user_id,
-                'place_id': r.place_id
-            }, 201
+            return REVIEW.dump(r), 201
         except ValueError as e:
             return {'error': str(e)}, 400
 
+    @api.expect(review_page_parser)
     @api.response(200, 'List of reviews retrieved successfully')
+    @api.response(304, 'Not modified since the ETag / date sent by the client')
+    @api.response(400, 'Invalid pagination, sort or filter parameters')
     def get(self):
-        """Retrieve a list of all reviews"""
-        reviews = facade.get_all_reviews()
-        return [{
-            'id': r.id,
-            'text': r.text,
-            'rating': r.rating,
-            'user_id': r.user_id,
-            'place_id': r.place_id
-        } for r in reviews], 200
+        """Retrieve one page of reviews, or the reviews listed in ?ids="""
+        try:
+            only = parse_fields(REVIEW)
+            ids = parse_ids()
+            if ids is not None:
+                reviews, missing = facade.get_reviews_by_ids(ids)
+                return batch_response(REVIEW, reviews, missing, only)
+            page_args = parse_page_args(REVIEW_SORT_FIELDS, REVIEW_FILTER_FIELDS, REVIEW_RANGE_FIELDS)
+            etag, last_modified = make_validators(
+                *facade.get_reviews_version(page_args['filters'], page_args['ranges']))
+            not_modified = check_not_modified(etag, last_modified)
+            if not_modified:
+                return not_modified
+            reviews, next_cursor = facade.get_reviews_page(**page_args)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return REVIEW.dump_many(reviews, only), 200, {
+            **page_headers(next_cursor), **validator_headers(etag, last_modified)}
 
 @api.route('/<review_id>')
 class ReviewResource(Resource):
     @api.response(200, 'Review details retrieved successfully')
+    @api.response(304, 'Not modified since the ETag / date sent by the client')
     @api.response(404, 'Review not found')
     def get(self, review_id):
         """Get review details by ID (public)"""
+        try:
+            only = parse_fields(REVIEW)
+        except ValueError as e:
+            return {'error': str(e)}, 400
         r = facade.get_review(review_id)
         if r is None:
             return {'error': 'Review not found'}, 404
-        return {
-            'id': r.id,
-            'text': r.text,
-            'rating': r.rating,
-            'user_id': r.user_id,
-            'place_id': r.place_id
-        }, 200
+        etag, last_modified = make_validators(r.id, r.updated_at)
+        not_modified = check_not_modified(etag, last_modified)
+        if not_modified:
+            return not_modified
+        return REVIEW.dump(r, only), 200, validator_headers(etag, last_modified)
 
     @jwt_required()
     @api.expect(review_model)
@@ -105,13 +123,7 @@ class ReviewResource(Resource):
 
         try:
             updated = facade.update_review(review_id, request.json)
-            return {
-                'id': updated.id,
-                'text': updated.text,
-                'rating': updated.rating,
-                'user_id': updated.user_id,
-                'place_id': updated.place_id
-            }, 200
+            return REVIEW.dump(updated), 200
         except ValueError as e:
             return {'error': str(e)}, 400
 
@@ -0,0 +1,194 @@
+#!/usr/bin/python3
+"""
+Response serialization.
+
+Each representation (place summary, place detail, review, public user, ...)
+is a Serializer registered once at import time. Its fields are compiled to
+extractors up front: a plain attribute becomes attr(name) and nested
+objects reuse the nested serializer, so dumping a row is one dict
+comprehension over prepared callables.
+
+    PLACE_SUMMARY.dump_many(places, only=parse_fields(PLACE_SUMMARY))
+
+?fields=id,title,owner keeps only the listed top-level fields (sparse
+fieldsets); an unknown name is a ValueError (400).
+
+Responses are encoded by `dumps`: orjson when it is installed, the stdlib
+json module otherwise (output_json is the Api's application/json
+representation).
+"""
+import json
+from datetime import date, datetime
+from flask import make_response, request
+from app.utils.profiling import span
+
+try:
+    import orjson
+except ImportError:  # optional, the stdlib encoder is used without it
+    orjson = None
+
+
+# ------------------- Field extractors -------------------
+def attr(name):
+    """
+    Attribute value. Loaded columns and relationships of an ORM object sit
+    in its __dict__: reading them there skips the instrumented descriptor,
+    which is most of the cost of a dump. Anything else (unloaded or
+    expired attributes, properties) goes through getattr.
+    """
+    def extract(obj):
+        try:
+            return obj.__dict__[name]
+        except KeyError:
+            return getattr(obj, name)
+    return extract
+
+
+def or_default(name, default):
+    """Attribute, or default when it is None (aggregates of a new row)"""
+    get = attr(name)
+
+    def extract(obj):
+        value = get(obj)
+        return default if value is None else value
+    return extract
+
+
+def isoformat(name):
+    get = attr(name)
+
+    def extract(obj):
+        value = get(obj)
+        return value.isoformat() if value is not None else None
+    return extract
+
+
+def nested(name, serializer):
+    """One related object dumped with serializer, None when missing"""
+    fields, get_related = serializer.fields, attr(name)
+
+    def extract(obj):
+        related = get_related(obj)
+        return {key: get(related) for key, get in fields} if related is not None else None
+    return extract
+
+
+def nested_list(name, serializer):
+    """A related collection dumped with serializer"""
+    fields, get_items = serializer.fields, attr(name)
+    return lambda obj: [{key: get(item) for key, get in fields} for item in get_items(obj) or ()]
+
+
+# ------------------- Serializer and registry -------------------
+class Serializer:
+    """
+    Ordered (name, extractor) pairs; a bare string stands for attr(name).
+    `provided` names are valid in ?fields= but filled in by the caller
+    (e.g. the reviews of a place detail come from their own query).
+    """
+
+    def __init__(self, *fields, provided=()):
+        self.fields = tuple((f, attr(f)) if isinstance(f, str) else tuple(f) for f in fields)
+        self.provided = tuple(provided)
+        self.names = tuple(name for name, _ in self.fields) + self.provided
+
+    def select(self, only=None):
+        """Extractors of the fields in only (all of them when None)"""
+        if only is None:
+            return self.fields
+        unknown = set(only).difference(self.names)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}; "
+                             f"allowed: {', '.join(self.names)}")
+        return tuple(field for field in self.fields if field[0] in only)
+
+    def wants(self, name, only=None):
+        """Whether the response includes field name"""
+        return only is None or name in only
+
+    def dump(self, obj, only=None):
+        with span('serialize'):
+            return {name: get(obj) for name, get in self.select(only)}
+
+    def dump_many(self, objs, only=None):
+        fields = self.select(only)
+        with span('serialize'):
+            return [{name: get(obj) for name, get in fields} for obj in objs]
+
+
+SERIALIZERS = {}
+
+
+def register(name, *fields, provided=()):
+    SERIALIZERS[name] = Serializer(*fields, provided=provided)
+    return SERIALIZERS[name]
+
+
+def get_serializer(name):
+    return SERIALIZERS[name]
+
+
+def parse_fields(serializer):
+    """
+    The ?fields= selection as a tuple of names, or None for all fields.
+    Raises ValueError on an unknown name.
+    """
+    value = request.args.get('fields')
+    if value is None:
+        return None
+    only = tuple(name.strip() for name in value.split(',') if name.strip())
+    serializer.select(only)
+    return only
+
+
+AMENITY = register('amenity', 'id', 'name')
+USER_PUBLIC = register('user_public', 'id', 'first_name', 'last_name', 'email')
+PLACE_OWNER = register('place_owner', 'id', 'first_name', 'last_name')
+PLACE_IMAGE = register('place_image', 'id', 'image_url')
+REVIEWER = register('reviewer', 'id', 'first_name', 'last_name')
+REVIEW = register('review', 'id', 'text', 'rating', 'user_id', 'place_id')
+PLACE_REVIEW = register('place_review', 'id', 'text', 'rating', 'user_id',
+                        ('created_at', isoformat('created_at')),
+                        ('user', nested('user', REVIEWER)))
+PLACE = register('place', 'id', 'title', 'description', 'price', 'latitude', 'longitude',
+                 'owner_id', 'image_url')
+PLACE_SUMMARY = register(
+    'place_summary', 'id', 'title', 'latitude', 'longitude', 'price',
+    ('owner', nested('owner', PLACE_OWNER)),
+    ('amenities', nested_list('amenities', AMENITY)),
+    'image_url',
+    ('review_count', or_default('review_count', 0)),
+    ('average_rating', or_default('average_rating', 0.0)))
+PLACE_DETAIL = register(
+    'place_detail', 'id', 'title', 'description', 'price', 'latitude', 'longitude',
+    ('owner', nested('owner', USER_PUBLIC)),
+    ('amenities', nested_list('amenities', AMENITY)),
+    'image_url',
+    ('images', nested_list('images', PLACE_IMAGE)),
+    ('review_count', or_default('review_count', 0)),
+    ('average_rating', or_default('average_rating', 0.0)),
+    'rating_histogram',
+    provided=('reviews',))
+
+
+# ------------------- JSON encoding -------------------
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(data):
+    """JSON bytes, with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=_default, separators=(',', ':')).encode('utf-8')
+
+
+def output_json(data, code, headers=None):
+    """flask-restx representation for application/json"""
+    with span('serialize'):
+        body = dumps(data)
+    response = make_response(body, code)
+    response.headers.extend(headers or {})
+    return response
@@ -4,6 +4,10 @@ from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 # Import the shared facade instance to ensure a single in-memory data context.
 # Avoids creating multiple HBnBFacade instances with isolated state.
 from app.services import facade
+from app.api.v1.pagination import (page_parser, parse_page_args, page_headers, parse_ids,
+                                   batch_response)
+from app.api.v1.conditional import make_validators, check_not_modified, validator_headers
+from app.api.v1.serializers import USER_PUBLIC, parse_fields
 
 # Create the "users" namespace
 api = Namespace('users', description='User operations')
@@ -16,6 +20,12 @@ user_model = api.model('User', {
     'password': fields.String(required=True, description='Password of the user')
 })
 
+# Query parameters accepted by GET /users/
+USER_SORT_FIELDS = {'created_at': 'created_at'}
+USER_FILTER_FIELDS = ('email',)
+USER_RANGE_FIELDS = ('created_at',)
+user_page_parser = page_parser(USER_SORT_FIELDS, USER_FILTER_FIELDS, USER_RANGE_FIELDS, batch=True)
+
 # ------------------- User List / Create -------------------
 @api.route('/')
 class UserList(Resource):
@@ -33,43 +43,55 @@ class UserList(Resource):
         try:
             # The facade checks for duplicates and raises ValueError if found
             new_user = facade.create_user(user_data)
-            return {
-                'id': new_user.id,
-                'first_name': new_user.first_name,
-                'last_name': new_user.last_name,
-                'email': new_user.email
-            }, 201
+            return USER_PUBLIC.dump(new_user), 201
         except ValueError as e:
             # We catch the error and return the 400 status code expected by Postman
             return {'error': str(e)}, 400
 
+    @api.expect(user_page_parser)
     @api.response(200, 'List of users retrieved successfully')
+    @api.response(304, 'Not modified since the ETag / date sent by the client')
+    @api.response(400, 'Invalid pagination, sort or filter parameters')
     def get(self):
-        """Retrieve all users (public)"""
-        users = facade.get_all_users()
-        return [{
-            'id': user.id,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'email': user.email
-        } for user in users], 200
+        """Retrieve one page of users, or the users listed in ?ids= (public)"""
+        try:
+            only = parse_fields(USER_PUBLIC)
+            ids = parse_ids()
+            if ids is not None:
+                users, missing = facade.get_users_by_ids(ids)
+                return batch_response(USER_PUBLIC, users, missing, only)
+            page_args = parse_page_args(USER_SORT_FIELDS, USER_FILTER_FIELDS, USER_RANGE_FIELDS)
+            etag, last_modified = make_validators(
+                *facade.get_users_version(page_args['filters'], page_args['ranges']))
+            not_modified = check_not_modified(etag, last_modified)
+            if not_modified:
+                return not_modified
+            users, next_cursor = facade.get_users_page(**page_args)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return USER_PUBLIC.dump_many(users, only), 200, {
+            **page_headers(next_cursor), **validator_headers(etag, last_modified)}
 
 # ------------------- Retrieve / Update a single user -------------------
 @api.route('/<string:user_id>')
 class UserResource(Resource):
     @api.response(200, 'User details retrieved successfully')
+    @api.response(304, 'Not modified since the ETag / date sent by the client')
     @api.response(404, 'User not found')
     def get(self, user_id):
         """Retrieve a single user by ID"""
+        try:
+            only = parse_fields(USER_PUBLIC)
+        except ValueError as e:
+            return {'error': str(e)}, 400
         user = facade.get_user(user_id)
         if not user:
             return {'error': 'User not found'}, 404
-        return {
-            'id': user.id,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'email': user.email
-        }, 200
+        etag, last_modified = make_validators(user.id, user.updated_at)
+        not_modified = check_not_modified(etag, last_modified)
+        if not_modified:
+            return not_modified
+        return USER_PUBLIC.dump(user, only), 200, validator_headers(etag, last_modified)
 
     @jwt_required()
     @api.expect(user_model, validate=True)
@@ -111,9 +133,4 @@ class UserResource(Resource):
             # The facade raises a ValueError if the email is taken
             return {'error': str(e)}, 400
 
-        return {
-            'id': updated_user.id,
-            'first_name': updated_user.first_name,
-            'last_name': updated_user.last_name,
-            'email': updated_user.email
-        }, 200
+        return USER_PUBLIC.dump(updated_user), 200
@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+import click
+from flask.cli import AppGroup
+from app.services.bulk_import import BulkImporter, DEFAULT_CHUNK_SIZE
+
+# Maintenance commands, run as: flask --app run hbnb <command>
+hbnb_cli = AppGroup('hbnb', help='HBnB maintenance commands')
+
+
+@hbnb_cli.command('rebuild-aggregates')
+def rebuild_aggregates():
+    """Recompute review count, rating sum and histogram of every place."""
+    from app.services import facade
+    count = facade.rebuild_review_aggregates()
+    click.echo(f"Rebuilt review aggregates for {count} places")
+
+
+@hbnb_cli.command('recompute-rank')
+def recompute_rank():
+    """Recompute the rank score of every place (sort=rank); run it periodically."""
+    from app.services import facade
+    count = facade.recompute_rank_scores()
+    click.echo(f"Updated the rank score of {count} places")
+
+
+@hbnb_cli.command('rebuild-price-histogram')
+def rebuild_price_histogram():
+    """Recount the places per price step (GET /places/price-histogram)."""
+    from app.services import facade
+    count = facade.rebuild_price_histogram()
+    click.echo(f"Counted {count} places")
+
+
+@hbnb_cli.command('rebuild-search-index')
+def rebuild_search_index():
+    """Index the title, description and reviews of every place again."""
+    from app.services import facade
+    count = facade.rebuild_search_index()
+    click.echo(f"Indexed {count} places")
+
+
+@hbnb_cli.command('import')
+@click.argument('entity', type=click.Choice(BulkImporter.ENTITIES))
+@click.argument('source', type=click.File('rb'))
+@click.option('--chunk-size', default=DEFAULT_CHUNK_SIZE, show_default=True,
+              help='Rows validated and inserted per batch')
+def import_ndjson(entity, source, chunk_size):
+    """Import ENTITY rows from an NDJSON file (- for stdin)."""
+    from app.services import facade
+    report = facade.bulk_import(entity, source, chunk_size)
+    click.echo(f"Imported {report['inserted']} {entity}, rejected {report['failed']}")
+    for error in report['errors']:
+        click.echo(f"line {error['line']}: {error['error']}", err=True)
+
+
+def register_commands(app):
+    """Attach the hbnb command group to the Flask CLI"""
+    app.cli.add_command(hbnb_cli)
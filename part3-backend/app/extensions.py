@@ -3,7 +3,12 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
+from app.utils.passwords import PasswordHasher
+from app.persistence.routing import RoutingSession
 
-db = SQLAlchemy()
+# RoutingSession sends the reads of @replica_reads facade methods to replicas
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 bcrypt = Bcrypt()
 jwt = JWTManager()
+# bcrypt with the configured cost, optionally on a process pool
+hasher = PasswordHasher()
@@ -3,10 +3,15 @@
 import uuid
 from datetime import datetime, timezone
 from app.extensions import db
+from app.persistence.unit_of_work import commit
 
 
 class BaseModel(db.Model):
     __abstract__ = True  # SQLAlchemy does not create a table for BaseModel
+    # Columns that update() must never take from client data
+    READONLY_FIELDS = ()
+    # Columns left out of the NDJSON export
+    EXPORT_EXCLUDE = ()
 
     id = db.Column(
         db.String(36),
@@ -31,13 +36,13 @@ class BaseModel(db.Model):
 
     def update(self, data):
         """Update the attributes of the object based on the provided dictionary"""
-        PROTECTED = {"id", "created_at"}
+        PROTECTED = {"id", "created_at"} | set(self.READONLY_FIELDS)
         for key, value in data.items():
             if hasattr(self, key) and key not in PROTECTED:
                 setattr(self, key, value)
         self.updated_at = datetime.now(timezone.utc)
         try:
-            db.session.commit()
+            commit()
         except Exception:
             db.session.rollback()
             raise
@@ -46,7 +51,7 @@ class BaseModel(db.Model):
         """Placeholder for delete operation"""
         try:
             db.session.delete(self)
-            db.session.commit()
+            commit()
         except Exception:
             db.session.rollback()
             raise
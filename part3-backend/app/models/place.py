@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 from app.extensions import db
 from app.models.base_model import BaseModel
+from app.utils import geo
 
 # Association table for Many-to-Many relationship between Place and Amenity
 place_amenity = db.Table('place_amenity',
@@ -8,17 +9,47 @@ place_amenity = db.Table('place_amenity',
     db.Column('amenity_id', db.String(36), db.ForeignKey('amenities.id'), primary_key=True)
 )
 
+# Number of places per price step of PRICE_BUCKET_WIDTH (bucket = floor(price / width)),
+# kept current on every place write by app/persistence/price_histogram.py
+PRICE_BUCKET_WIDTH = 1.0
+price_buckets = db.Table('price_buckets',
+    db.Column('bucket', db.Integer, primary_key=True),
+    db.Column('places', db.Integer, nullable=False, default=0)
+)
+
 class Place(BaseModel):
     __tablename__ = 'places'
+    # Maintained by the facade from the reviews, never set by clients
+    READONLY_FIELDS = ('review_count', 'rating_sum', 'rating_1', 'rating_2', 'rating_3',
+                       'rating_4', 'rating_5', 'average_rating', 'last_review_at', 'rank_score')
     
     # Columns mapped to the database
     title       = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(500), nullable=True)
-    price       = db.Column(db.Float, nullable=False)
+    # Indexed for min_price/max_price filters and sort=price
+    price       = db.Column(db.Float, nullable=False, index=True)
     latitude    = db.Column(db.Float, nullable=False)
     longitude   = db.Column(db.Float, nullable=False)
     owner_id    = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
     image_url   = db.Column(db.String(500), nullable=True)
+    # Geohash of (latitude, longitude), indexed for prefix (grid cell) scans
+    geohash     = db.Column(db.String(12), nullable=True, index=True)
+
+    # Review aggregates, maintained by the facade on every review write
+    review_count   = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum     = db.Column(db.Integer, nullable=False, default=0)
+    rating_1       = db.Column(db.Integer, nullable=False, default=0)
+    rating_2       = db.Column(db.Integer, nullable=False, default=0)
+    rating_3       = db.Column(db.Integer, nullable=False, default=0)
+    rating_4       = db.Column(db.Integer, nullable=False, default=0)
+    rating_5       = db.Column(db.Integer, nullable=False, default=0)
+    # rating_sum / review_count, stored so sort=rating is an index scan
+    average_rating = db.Column(db.Float, nullable=False, default=0.0, index=True)
+    # Creation date of the newest review
+    last_review_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    # Bayesian average blended with review recency (app/persistence/ranking.py),
+    # stored so sort=rank is an index scan
+    rank_score     = db.Column(db.Float, nullable=False, default=0.0, index=True)
 
     # One-to-Many: Place → Review
     reviews   = db.relationship('Review', backref='place', lazy=True)
@@ -29,6 +60,31 @@ class Place(BaseModel):
     images    = db.relationship('PlaceImage', backref='place', lazy=True,
                                 cascade='all, delete-orphan')
     
+    @property
+    def rating_histogram(self):
+        """Number of reviews per rating, e.g. {'1': 0, ..., '5': 3}"""
+        return {str(r): getattr(self, f"rating_{r}") or 0 for r in range(1, 6)}
+
+    def apply_review_rating(self, added=None, removed=None):
+        """
+        Adjust the review aggregates for one added and/or removed rating.
+        Only changes the object: the caller's commit persists it together
+        with the review itself.
+        """
+        for rating, delta in ((added, 1), (removed, -1)):
+            if rating is None:
+                continue
+            bucket = f"rating_{rating}"
+            setattr(self, bucket, (getattr(self, bucket) or 0) + delta)
+            self.review_count = (self.review_count or 0) + delta
+            self.rating_sum = (self.rating_sum or 0) + delta * rating
+        self.average_rating = (self.rating_sum / self.review_count
+                               if self.review_count else 0.0)
+
+    def refresh_geohash(self):
+        """Recompute the geohash from the current coordinates"""
+        self.geohash = geo.encode(self.latitude, self.longitude)
+
     def update_details(self, data):
         """Update place details with validation"""
         if "title" in data:
@@ -59,5 +115,10 @@ class Place(BaseModel):
             if not (-180 <= data["longitude"] <= 180):
                 raise ValueError("Longitude must be between -180 and 180")
 
+        # Keep the geohash in sync with the coordinates
+        if "latitude" in data or "longitude" in data:
+            data["geohash"] = geo.encode(data.get("latitude", self.latitude),
+                                         data.get("longitude", self.longitude))
+
         # All validations passed, now apply the changes and update the timestamp
         self.update(data)
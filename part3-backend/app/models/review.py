@@ -4,24 +4,33 @@ from app.models.base_model import BaseModel
 
 class Review(BaseModel):
     __tablename__ = 'reviews'
+    # A user can review a place only once (same constraint as create_tables.sql)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'place_id', name='uq_reviews_user_place'),
+    )
 
     # Columns mapped to the database
     text     = db.Column(db.String(1000), nullable=False)
     rating   = db.Column(db.Integer, nullable=False)
     # ForeignKeys: references places and users tables
-    place_id = db.Column(db.String(36), db.ForeignKey('places.id'), nullable=False)
-    user_id  = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    # Indexed: reviews are looked up by place (detail page) and by user
+    place_id = db.Column(db.String(36), db.ForeignKey('places.id'), nullable=False, index=True)
+    user_id  = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
 
     def validate_rating(self, rating):
         """Validates that rating is between 1 and 5"""
         if isinstance(rating, bool) or not isinstance(rating, int) or not (1 <= rating <= 5):
             raise ValueError("Rating must be an integer between 1 and 5")
 
-    def update_review(self, data):
-        """Update review with validation"""
+    def validate_update(self, data):
+        """Validate an update without applying it"""
         if "text" in data:
             if not data["text"] or not data["text"].strip():
                 raise ValueError("text is required")
         if "rating" in data:
             self.validate_rating(data["rating"])
+
+    def update_review(self, data):
+        """Update review with validation"""
+        self.validate_update(data)
         self.update(data)
@@ -0,0 +1,19 @@
+#!/usr/bin/python3
+from app.extensions import db
+
+# Full-text search documents, one per place (app/persistence/search_index.py).
+# doc_id is the integer key of the index rows: the FTS5 rowid, or the
+# postings' doc_id. length is the weighted token count (BM25 normalization).
+search_documents = db.Table('search_documents',
+    db.Column('doc_id', db.Integer, primary_key=True, autoincrement=True),
+    db.Column('place_id', db.String(36), nullable=False, unique=True),
+    db.Column('length', db.Float, nullable=False, default=0.0)
+)
+
+# Postings of the portable inverted index (databases without FTS5):
+# weighted frequency of each term in each document
+search_postings = db.Table('search_postings',
+    db.Column('term', db.String(64), primary_key=True),
+    db.Column('doc_id', db.Integer, primary_key=True, index=True),
+    db.Column('tf', db.Float, nullable=False)
+)
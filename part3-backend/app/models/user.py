@@ -1,11 +1,13 @@
 #!/usr/bin/python3
 import re
-from app.extensions import db, bcrypt
+from app.extensions import db, hasher
 from app.models.base_model import BaseModel
 
 class User(BaseModel):
     __tablename__ = 'users'
-    
+    # Never written to exports
+    EXPORT_EXCLUDE = ('password',)
+
     # Columns mapped to the database
     first_name = db.Column(db.String(50), nullable=False)
     last_name  = db.Column(db.String(50), nullable=False)
@@ -20,11 +22,15 @@ class User(BaseModel):
 
     def hash_password(self, password):
         """Hashes the password before storing it."""
-        self.password = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password = hasher.hash(password)
 
     def verify_password(self, password):
         """Verifies if the provided password matches the hashed password."""
-        return bcrypt.check_password_hash(self.password, password)
+        return hasher.check(self.password, password)
+
+    def password_needs_rehash(self):
+        """True if the stored hash was made with another bcrypt cost than configured."""
+        return hasher.needs_rehash(self.password)
     
     def update_profile(self, data):
         """Update user profile with validation"""
@@ -41,7 +47,6 @@ class User(BaseModel):
         if "password" in data:
             if not data["password"] or not data["password"].strip():
                 raise ValueError("password cannot be empty")
-            data["password"] = bcrypt.generate_password_hash(
-                data["password"]).decode('utf-8')
+            data["password"] = hasher.hash(data["password"])
         # All validations passed, now apply the changes and update the timestamp
         self.update(data)
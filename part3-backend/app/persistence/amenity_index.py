@@ -0,0 +1,286 @@
+#!/usr/bin/python3
+"""
+In-memory bitmap index of place amenities, for ?amenities= filters and
+facet counts without joining place_amenity for every place.
+
+Each place gets a small integer ordinal; each amenity maps to a bitmap
+(a Python int used as a bitset) with bit `ordinal` set for every place
+that has it. AND / OR of several amenities is one & / | over the bitmaps
+and a facet count is a popcount of an intersection, so neither depends on
+how many places are loaded as rows.
+
+The index is built from the database at startup and kept current by the
+facade and the bulk importer: every change is staged on the session and
+applied when the transaction commits (dropped on rollback). Other worker
+processes do not see those updates; each process rebuilds its copy when
+it is older than AMENITY_INDEX_MAX_AGE seconds, which bounds the drift
+the same way CACHE_TTL does for the entity cache. That rebuild runs on a
+background thread, one at a time, while requests keep reading the
+current maps; commits applied during it are replayed onto the new maps
+before they replace the old ones.
+
+Ordinals of deleted places are never reused, rebuilds included: a
+bitmap taken before a rebuild still names the same places after it.
+Each deleted place costs one bit per bitmap.
+"""
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event, select
+from app.extensions import db
+from app.models.place import Place, place_amenity
+
+_PENDING_KEY = 'amenity_index_pending'
+
+
+def popcount(bitmap):
+    """Number of set bits"""
+    return bin(bitmap).count('1')
+
+
+def bits(bitmap):
+    """Ordinals of the set bits, ascending"""
+    # One pass over the binary string instead of one big-int operation per bit
+    return [i for i, bit in enumerate(reversed(bin(bitmap)[2:])) if bit == '1']
+
+
+class AmenityBitmapIndex:
+    """amenity_id -> bitmap of place ordinals, plus the ordinal <-> place_id maps"""
+
+    def __init__(self, max_age=0, max_ids=5000):
+        self.max_age = max_age
+        # Largest match a caller should turn into an id IN (...) list
+        self.max_ids = max_ids
+        self._lock = threading.Lock()
+        # Held for the whole of a rebuild: one at a time
+        self._rebuild_lock = threading.Lock()
+        # Changes applied while a rebuild reads the database, or None
+        self._journal = None
+        self._reset()
+
+    def _reset(self):
+        self._ordinals = {}
+        self._place_ids = []
+        self._bitmaps = {}
+        self._live = 0
+        self.built_at = time.monotonic()
+
+    # ------------------- Building -------------------
+    def rebuild(self):
+        """Load every place and place_amenity row; returns the number of places"""
+        with self._rebuild_lock:
+            return self._rebuild()
+
+    def _rebuild(self):
+        # Call with _rebuild_lock held. The new maps are built aside and
+        # swapped in at once; readers never see a half-built index
+        with self._lock:
+            self._journal = []
+            known, size = dict(self._ordinals), len(self._place_ids)
+        try:
+            place_ids = db.session.execute(select(Place.id).order_by(Place.id)).scalars().all()
+            links = db.session.execute(
+                select(place_amenity.c.place_id, place_amenity.c.amenity_id)).all()
+            # Places keep their ordinals, so a bitmap taken before the swap
+            # still names the same places after it
+            fresh = AmenityBitmapIndex()
+            fresh._place_ids = [None] * size
+            new_places = []
+            for place_id in place_ids:
+                ordinal = known.get(place_id)
+                if ordinal is None:
+                    new_places.append(place_id)
+                else:
+                    fresh._adopt(place_id, ordinal)
+            new_links = []
+            for place_id, amenity_id in links:
+                if place_id in fresh._ordinals:
+                    fresh._set(place_id, amenity_id)
+                else:
+                    new_links.append((place_id, amenity_id))
+            with self._lock:
+                # Ordinals handed out while the database was read
+                live_ids = self._place_ids
+                fresh._place_ids.extend([None] * (len(live_ids) - size))
+                for ordinal in range(size, len(live_ids)):
+                    if live_ids[ordinal] is not None:
+                        fresh._adopt(live_ids[ordinal], ordinal)
+                for place_id in new_places:
+                    fresh._ordinal(place_id)
+                for place_id, amenity_id in new_links:
+                    fresh._set(place_id, amenity_id)
+                # Commits applied since the read may be missing from it.
+                # Each change sets the bits it touches whatever they held,
+                # so replaying those already read is harmless
+                fresh._replay(self._journal)
+                self._ordinals, self._place_ids = fresh._ordinals, fresh._place_ids
+                self._bitmaps, self._live = fresh._bitmaps, fresh._live
+                self.built_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._journal = None
+        return len(place_ids)
+
+    def _ensure_fresh(self):
+        if not self.max_age or time.monotonic() - self.built_at <= self.max_age:
+            return
+        if not self._rebuild_lock.acquire(blocking=False):
+            return  # another thread is rebuilding
+        if time.monotonic() - self.built_at <= self.max_age:
+            # Rebuilt between the check and the lock
+            self._rebuild_lock.release()
+            return
+        app = current_app._get_current_object()
+        threading.Thread(target=self._rebuild_in_background, args=(app,), daemon=True).start()
+
+    def _rebuild_in_background(self, app):
+        try:
+            with app.app_context():
+                try:
+                    self._rebuild()
+                except Exception:
+                    # built_at is unchanged: the next request tries again
+                    app.logger.exception("Amenity index rebuild failed")
+                finally:
+                    db.session.remove()
+        finally:
+            self._rebuild_lock.release()
+
+    # ------------------- Updates (lock held) -------------------
+    def _ordinal(self, place_id):
+        ordinal = self._ordinals.get(place_id)
+        if ordinal is None:
+            ordinal = self._ordinals[place_id] = len(self._place_ids)
+            self._place_ids.append(place_id)
+            self._live |= 1 << ordinal
+        return ordinal
+
+    def _adopt(self, place_id, ordinal):
+        """Give the place an ordinal it already had"""
+        self._ordinals[place_id] = ordinal
+        self._place_ids[ordinal] = place_id
+        self._live |= 1 << ordinal
+
+    def _set(self, place_id, amenity_id):
+        bit = 1 << self._ordinal(place_id)
+        self._bitmaps[amenity_id] = self._bitmaps.get(amenity_id, 0) | bit
+
+    def _apply_place(self, place_id, amenity_ids):
+        """The place exists and has exactly these amenities"""
+        bit = 1 << self._ordinal(place_id)
+        for amenity_id, bitmap in self._bitmaps.items():
+            if bitmap & bit:
+                self._bitmaps[amenity_id] = bitmap & ~bit
+        for amenity_id in amenity_ids:
+            self._set(place_id, amenity_id)
+
+    def _apply_add(self, place_id, amenity_id):
+        self._set(place_id, amenity_id)
+
+    def _apply_remove_place(self, place_id):
+        ordinal = self._ordinals.pop(place_id, None)
+        if ordinal is None:
+            return
+        bit = 1 << ordinal
+        self._place_ids[ordinal] = None
+        self._live &= ~bit
+        for amenity_id, bitmap in self._bitmaps.items():
+            if bitmap & bit:
+                self._bitmaps[amenity_id] = bitmap & ~bit
+
+    def _apply_remove_amenity(self, amenity_id):
+        self._bitmaps.pop(amenity_id, None)
+
+    def _replay(self, changes):
+        for method, args in changes:
+            getattr(self, f'_apply_{method}')(*args)
+
+    def apply(self, changes):
+        with self._lock:
+            self._replay(changes)
+            if self._journal is not None:
+                self._journal.extend(changes)
+
+    # ------------------- Staging (applied at commit) -------------------
+    def _stage(self, method, *args):
+        db.session.info.setdefault(_PENDING_KEY, []).append((self, method, args))
+
+    def set_place(self, place_id, amenity_ids):
+        self._stage('place', place_id, tuple(amenity_ids))
+
+    def add(self, place_id, amenity_id):
+        self._stage('add', place_id, amenity_id)
+
+    def remove_place(self, place_id):
+        self._stage('remove_place', place_id)
+
+    def remove_amenity(self, amenity_id):
+        self._stage('remove_amenity', amenity_id)
+
+    # ------------------- Queries -------------------
+    def match(self, amenity_ids, match_all=True):
+        """Bitmap of the places with all (or any) of the amenities"""
+        self._ensure_fresh()
+        with self._lock:
+            bitmaps = [self._bitmaps.get(a, 0) for a in amenity_ids]
+            live = self._live
+        if not bitmaps:
+            return live
+        result = bitmaps[0]
+        for bitmap in bitmaps[1:]:
+            result = result & bitmap if match_all else result | bitmap
+        return result & live
+
+    def bitmap_of(self, place_ids):
+        """Bitmap of the given places (unknown ids are ignored)"""
+        self._ensure_fresh()
+        bitmap = 0
+        with self._lock:
+            for place_id in place_ids:
+                ordinal = self._ordinals.get(place_id)
+                if ordinal is not None:
+                    bitmap |= 1 << ordinal
+        return bitmap
+
+    def place_ids(self, bitmap):
+        with self._lock:
+            place_ids = self._place_ids
+            return [place_ids[i] for i in bits(bitmap) if i < len(place_ids) and place_ids[i]]
+
+    def facets(self, bitmap):
+        """{amenity_id: number of places in bitmap that have it}"""
+        self._ensure_fresh()
+        with self._lock:
+            bitmaps = dict(self._bitmaps)
+        return {amenity_id: popcount(b & bitmap) for amenity_id, b in bitmaps.items()}
+
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_after_commit(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    by_index = {}
+    for index, method, args in pending:
+        by_index.setdefault(index, []).append((method, args))
+    for index, changes in by_index.items():
+        index.apply(changes)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def init_app(app):
+    """Call after db.create_all(); builds the index from the database"""
+    index = AmenityBitmapIndex(app.config.get('AMENITY_INDEX_MAX_AGE', 300),
+                               app.config.get('AMENITY_FILTER_MAX_IDS', 5000))
+    app.extensions['amenity_index'] = index
+    with app.app_context():
+        index.rebuild()
+        db.session.remove()
+
+
+def get_amenity_index():
+    return current_app.extensions['amenity_index']
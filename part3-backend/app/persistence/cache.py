@@ -0,0 +1,426 @@
+#!/usr/bin/python3
+"""
+Read-through cache for single-row lookups (repository get/get_by_attribute).
+
+Entries hold the column values of one row, never ORM objects: on a hit the
+object is rebuilt and attached to the session as if it had just been
+loaded, so relationships still lazy-load normally. Values are kept
+JSON-serializable (datetimes as ISO strings) and the Redis backend
+stores them as JSON, so whoever can write to the server cannot make the
+workers run code.
+
+Every flush drops the entries of the rows it wrote, and the same keys are
+dropped again when the transaction commits or rolls back, so a value read
+from an uncommitted change never outlives its transaction. Writes that
+bypass the ORM (bulk import, aggregate rebuild) invalidate explicitly.
+
+Backends (config CACHE_BACKEND):
+    'lru'   — in-process LRU with a TTL (default)
+    'redis' — any Redis-protocol server at CACHE_REDIS_URL;
+              'local://' uses the in-process LocalRedis stand-in
+    'null'  — caching disabled
+"""
+import fnmatch
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from flask import current_app, has_app_context
+from sqlalchemy import DateTime, event
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from app.extensions import db
+from app.persistence.routing import reading_from_replica
+
+try:
+    import redis
+except ImportError:  # optional, only needed for CACHE_BACKEND = 'redis'
+    redis = None
+
+_TOUCHED_KEY = 'cache_touched_keys'
+
+
+class CacheStats:
+    """Thread-safe hit/miss/eviction counters"""
+    FIELDS = ('hits', 'misses', 'evictions', 'expirations', 'invalidations', 'errors')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def incr(self, field, amount=1):
+        with self._lock:
+            self._counts[field] += amount
+
+    def __getattr__(self, name):
+        if name in CacheStats.FIELDS:
+            return self._counts[name]
+        raise AttributeError(name)
+
+    def as_dict(self):
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts['hits'] + counts['misses']
+        counts['hit_ratio'] = round(counts['hits'] / lookups, 4) if lookups else 0.0
+        return counts
+
+
+class NullCache:
+    """Caching disabled: every lookup is a miss, nothing is stored"""
+    name = 'null'
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def clear(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+class LRUCache:
+    """In-process cache: least recently used entries go first, entries expire after ttl seconds"""
+    name = 'lru'
+
+    def __init__(self, max_entries=10000, ttl=30, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                del self._data[key]
+                self.stats.incr('expirations')
+                entry = None
+            if entry is None:
+                self.stats.incr('misses')
+                return None
+            self._data.move_to_end(key)
+        self.stats.incr('hits')
+        return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (self._clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.stats.incr('evictions')
+
+    def delete(self, *keys):
+        with self._lock:
+            removed = sum(self._data.pop(key, None) is not None for key in keys)
+        if removed:
+            self.stats.incr('invalidations', removed)
+
+    def clear(self):
+        with self._lock:
+            removed = len(self._data)
+            self._data.clear()
+        if removed:
+            self.stats.incr('invalidations', removed)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LocalRedis:
+    """
+    In-process stand-in for a Redis server, implementing the subset of the
+    redis-py client API used by RedisCache (bytes values, expiry in seconds)
+    and, for the scripts registered in `scripts`, register_script.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._data = {}  # key -> (expires_at or None, bytes)
+        self._lock = threading.Lock()
+        # Lua scripts it can run: source -> Python equivalent fn(client, keys, args)
+        self.scripts = {}
+        self._script_lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            entry = self._data.get(name)
+            if entry and entry[0] is not None and entry[0] <= self._clock():
+                del self._data[name]
+                entry = None
+            return entry[1] if entry else None
+
+    def set(self, name, value, ex=None):
+        with self._lock:
+            expires = self._clock() + ex if ex else None
+            self._data[name] = (expires, bytes(value))
+        return True
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+    def scan_iter(self, match='*'):
+        with self._lock:
+            keys = list(self._data)
+        return iter([k for k in keys if fnmatch.fnmatchcase(k, match)])
+
+    def dbsize(self):
+        return len(self._data)
+
+    def register_script(self, script):
+        """Like redis-py: a callable(keys, args); runs the Python equivalent atomically"""
+        fn = self.scripts[script]
+
+        def run(keys=(), args=()):
+            with self._script_lock:
+                return fn(self, list(keys), list(args))
+        return run
+
+
+class RedisCache:
+    """
+    Shared cache on a Redis-protocol server. Expiry and eviction are done by
+    the server; connection errors are counted and treated as misses so the
+    API keeps working (uncached) when the server is down.
+    """
+    name = 'redis'
+
+    def __init__(self, client, ttl=30, prefix='hbnb:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.stats = CacheStats()
+
+    def get(self, key):
+        try:
+            raw = self.client.get(self.prefix + key)
+        except Exception:
+            self.stats.incr('errors')
+            raw = None
+        if raw is not None:
+            try:
+                value = json.loads(raw)
+            except ValueError:
+                # Not written by this version: treat as a miss
+                self.stats.incr('errors')
+                raw = None
+        if raw is None:
+            self.stats.incr('misses')
+            return None
+        self.stats.incr('hits')
+        return value
+
+    def set(self, key, value):
+        try:
+            self.client.set(self.prefix + key, json.dumps(value).encode('utf-8'), ex=self.ttl)
+        except Exception:
+            self.stats.incr('errors')
+
+    def delete(self, *keys):
+        if not keys:
+            return
+        try:
+            removed = self.client.delete(*(self.prefix + key for key in keys))
+        except Exception:
+            self.stats.incr('errors')
+            return
+        if removed:
+            self.stats.incr('invalidations', removed)
+
+    def clear(self):
+        try:
+            keys = list(self.client.scan_iter(match=self.prefix + '*'))
+            if keys:
+                self.stats.incr('invalidations', self.client.delete(*keys))
+        except Exception:
+            self.stats.incr('errors')
+
+    def __len__(self):
+        try:
+            return sum(1 for _ in self.client.scan_iter(match=self.prefix + '*'))
+        except Exception:
+            return 0
+
+
+def create_cache(config):
+    """Build the backend selected by CACHE_BACKEND"""
+    backend = config.get('CACHE_BACKEND', 'lru')
+    ttl = config.get('CACHE_TTL', 30)
+    if backend == 'null':
+        return NullCache()
+    if backend == 'lru':
+        return LRUCache(config.get('CACHE_MAX_ENTRIES', 10000), ttl)
+    if backend == 'redis':
+        url = config.get('CACHE_REDIS_URL') or 'redis://localhost:6379/0'
+        if url.startswith('local://'):
+            client = LocalRedis()
+        elif redis is None:
+            raise RuntimeError("CACHE_BACKEND='redis' requires the redis package")
+        else:
+            client = redis.Redis.from_url(url)
+        return RedisCache(client, ttl, config.get('CACHE_KEY_PREFIX', 'hbnb:'))
+    raise ValueError(f"Unknown CACHE_BACKEND: {backend}")
+
+
+def init_app(app):
+    app.extensions['hbnb_cache'] = create_cache(app.config)
+
+
+def get_cache():
+    """The current app's cache, or None outside an app context"""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('hbnb_cache')
+
+
+# ------------------- Keys and row (de)serialization -------------------
+def row_key(model, obj_id):
+    return f"{model.__tablename__}:{obj_id}"
+
+
+def attribute_key(model, attr_name, value):
+    return f"{model.__tablename__}:{attr_name}={value}"
+
+
+def _columns(model):
+    return [c.key for c in model.__mapper__.column_attrs]
+
+
+@lru_cache(maxsize=None)
+def _datetime_columns(model):
+    return {c.key for c in model.__mapper__.column_attrs
+            if isinstance(c.columns[0].type, DateTime)}
+
+
+def _row_values(model, obj):
+    """Column values of obj, JSON-serializable (datetimes as ISO strings)"""
+    values = {k: getattr(obj, k) for k in _columns(model)}
+    for key in _datetime_columns(model):
+        if values[key] is not None:
+            values[key] = values[key].isoformat()
+    return values
+
+
+def _attach(model, values):
+    """Rebuild a persistent object from cached column values, without SQL"""
+    obj = model.__mapper__.class_manager.new_instance()
+    datetimes = _datetime_columns(model)
+    for key, value in values.items():
+        if key in datetimes and value is not None:
+            value = datetime.fromisoformat(value)
+        set_committed_value(obj, key, value)
+    make_transient_to_detached(obj)
+    db.session.add(obj)
+    return obj
+
+
+def get(model, obj_id):
+    """session.get() going through the cache"""
+    cache = get_cache()
+    if cache is None or obj_id is None:
+        return db.session.get(model, obj_id)
+    # Already in this session: the identity map is cheaper than the cache
+    if db.session.identity_key(model, obj_id) in db.session.identity_map:
+        return db.session.get(model, obj_id)
+    key = row_key(model, obj_id)
+    values = cache.get(key)
+    if values is not None:
+        return _attach(model, values)
+    obj = db.session.get(model, obj_id)
+    # A lagging replica could put back a value a write just invalidated
+    if obj is not None and not reading_from_replica():
+        cache.set(key, _row_values(model, obj))
+    return obj
+
+
+def get_by_attribute(model, attr_name, value):
+    """
+    First row whose attribute equals value. The cache maps the value to an
+    id only; the row is then fetched through get() and re-checked, so a
+    stale mapping is just a miss.
+    """
+    cache = get_cache()
+    query = model.query.filter_by(**{attr_name: value})
+    if cache is None:
+        return query.first()
+    key = attribute_key(model, attr_name, value)
+    obj_id = cache.get(key)
+    if obj_id is not None:
+        obj = get(model, obj_id)
+        if obj is not None and getattr(obj, attr_name) == value:
+            return obj
+    obj = query.first()
+    if obj is not None and not reading_from_replica():
+        cache.set(key, obj.id)
+    return obj
+
+
+def invalidate(model, *ids):
+    """
+    Drop cached rows written outside the ORM (core UPDATE/DELETE); they are
+    dropped again when the transaction ends, like rows written by a flush.
+    """
+    cache = get_cache()
+    if cache is None or not ids:
+        return
+    keys = {row_key(model, obj_id) for obj_id in ids}
+    cache.delete(*keys)
+    db.session.info.setdefault(_TOUCHED_KEY, set()).update(keys)
+
+
+def clear():
+    cache = get_cache()
+    if cache is not None:
+        cache.clear()
+
+
+# ------------------- Invalidation on ORM writes -------------------
+def _written_keys(session):
+    keys = set()
+    for obj in session.deleted:
+        keys.add(row_key(type(obj), obj.id))
+    for obj in session.dirty:
+        # Relationship-only changes leave the cached columns valid
+        if session.is_modified(obj, include_collections=False):
+            keys.add(row_key(type(obj), obj.id))
+    return keys
+
+
+@event.listens_for(db.session, 'after_flush')
+def _invalidate_after_flush(session, flush_context):
+    cache = get_cache()
+    if cache is None:
+        return
+    keys = _written_keys(session)
+    if keys:
+        cache.delete(*keys)
+        session.info.setdefault(_TOUCHED_KEY, set()).update(keys)
+
+
+@event.listens_for(db.session, 'after_commit')
+@event.listens_for(db.session, 'after_rollback')
+def _invalidate_after_transaction(session):
+    # Entries cached from inside the transaction may hold uncommitted values
+    keys = session.info.pop(_TOUCHED_KEY, None)
+    cache = get_cache()
+    if keys and cache is not None:
+        cache.delete(*keys)
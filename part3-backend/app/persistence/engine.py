@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+"""
+Engine configuration: connection pool options from the config class and,
+for SQLite, a tuning profile applied to every new connection.
+
+Pool (ignored for in-memory SQLite, which shares one connection):
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+Replicas (DB_REPLICA_URIS) get engines replica_0, replica_1, ... with the
+same options (see app/persistence/routing.py).
+
+SQLite (SQLITE_PRAGMAS, applied on connect):
+    journal_mode=WAL      readers no longer block on the writer (nor it on them)
+    synchronous=NORMAL    fsync at checkpoints only; safe with WAL
+    mmap_size, cache_size larger page cache, reads served from memory-mapped I/O
+    busy_timeout          a writer waits for the lock instead of failing at once
+"""
+import os
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from app.extensions import db
+from app.persistence.routing import replica_binds
+
+
+def _is_memory_sqlite(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def engine_options(config, uri=None):
+    """SQLALCHEMY_ENGINE_OPTIONS built from the DB_POOL_* settings"""
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    options.setdefault('pool_pre_ping', config.get('DB_POOL_PRE_PING', True))
+    uri = uri or config.get('SQLALCHEMY_DATABASE_URI')
+    if uri and not _is_memory_sqlite(uri):
+        for option, key in (('pool_size', 'DB_POOL_SIZE'), ('max_overflow', 'DB_MAX_OVERFLOW'),
+                            ('pool_timeout', 'DB_POOL_TIMEOUT'), ('pool_recycle', 'DB_POOL_RECYCLE')):
+            if config.get(key) is not None:
+                options.setdefault(option, config[key])
+    return options
+
+
+def configure(app):
+    """Set the engine options; call before db.init_app(app)"""
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+
+
+def create_replica_engines(app):
+    """
+    One engine per DB_REPLICA_URIS entry, with the same pool options.
+    Kept out of SQLALCHEMY_BINDS: no model is bound to a replica and
+    create_all/drop_all must never touch them.
+    """
+    engines = {}
+    for name, uri in zip(replica_binds(app.config), app.config.get('DB_REPLICA_URIS') or ()):
+        url = make_url(uri)
+        if url.get_backend_name() == 'sqlite' and url.database and not os.path.isabs(url.database):
+            # Same rule as the primary: relative SQLite paths live in instance/
+            url = url.set(database=os.path.join(app.instance_path, url.database))
+        engines[name] = create_engine(url, **engine_options(app.config, uri))
+    app.extensions['replica_engines'] = engines
+    return engines
+
+
+def apply_sqlite_pragmas(app):
+    """Run SQLITE_PRAGMAS on every new SQLite connection; call after db.init_app(app)"""
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    if not pragmas:
+        return
+    with app.app_context():
+        engines = list(db.engines.values())
+    engines += list(app.extensions.get('replica_engines', {}).values())
+    for engine in engines:
+        if engine.dialect.name == 'sqlite':
+            event.listen(engine, 'connect', _pragma_listener(pragmas))
+
+
+def _pragma_listener(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+    return on_connect
@@ -0,0 +1,206 @@
+#!/usr/bin/python3
+from sqlalchemy import and_, bindparam, func, or_, select
+from app.extensions import db
+from sqlalchemy.orm import aliased, joinedload, subqueryload
+from app.models.place import Place, place_amenity
+from app.models.review import Review
+from app.models.user import User
+from app.models.amenity import Amenity
+from app.models.place_image import PlaceImage
+from app.persistence import cache, price_histogram, ranking
+from app.persistence.search_index import get_search_index
+from app.persistence.repository import SQLAlchemyRepository
+from app.persistence.unit_of_work import commit
+
+
+class PlaceRepository(SQLAlchemyRepository):
+    def __init__(self):
+        # Passes the Place model to the parent class SQLAlchemyRepository
+        super().__init__(Place)
+
+    @staticmethod
+    def _listing_options():
+        # Everything the place list serializer touches, loaded in 2 statements:
+        # SELECT places JOIN users (owner) + one subquery load for amenities,
+        # no matter how many places or distinct owners there are.
+        return (joinedload(Place.owner), subqueryload(Place.amenities))
+
+    def get_all_for_listing(self):
+        return self.model.query.options(*self._listing_options()).all()
+
+    def get_page_for_listing(self, **page_args):
+        # Same eager loading as get_all_for_listing, one keyset page at a time
+        return self.query_page(options=self._listing_options(), **page_args)
+
+    def get_many_for_listing(self, ids):
+        # get_many() with the listing's eager loading
+        return self.get_many(ids, self._listing_options())
+
+    @staticmethod
+    def in_boxes(boxes):
+        """Condition: inside one of the (min_lat, min_lon, max_lat, max_lon) boxes"""
+        return or_(*[
+            and_(Place.latitude.between(min_lat, max_lat),
+                 Place.longitude.between(min_lon, max_lon))
+            for min_lat, min_lon, max_lat, max_lon in boxes
+        ])
+
+    @staticmethod
+    def price_between(min_price=None, max_price=None):
+        """Conditions for an inclusive price range; either bound may be None"""
+        conditions = []
+        if min_price is not None:
+            conditions.append(Place.price >= min_price)
+        if max_price is not None:
+            conditions.append(Place.price <= max_price)
+        return conditions
+
+    @staticmethod
+    def has_amenities(amenity_ids, match_all=True):
+        """Conditions: the place has all (or any) of the amenities, checked in SQL"""
+        links = place_amenity.c
+        if not match_all:
+            return [select(links.place_id).where(links.place_id == Place.id,
+                                                 links.amenity_id.in_(amenity_ids)).exists()]
+        return [select(links.place_id).where(links.place_id == Place.id,
+                                             links.amenity_id == amenity_id).exists()
+                for amenity_id in amenity_ids]
+
+    def get_in_cells(self, prefixes, boxes, limit=None, conditions=()):
+        """
+        Places whose geohash starts with one of the prefixes and whose
+        coordinates fall inside one of the (min_lat, min_lon, max_lat, max_lon) boxes.
+        Each prefix is an index range scan: prefix <= geohash < prefix + '{'
+        ('{' sorts right after 'z', the last geohash character).
+        """
+        query = self.model.query.options(*self._listing_options())
+        cells = [and_(Place.geohash >= p, Place.geohash < p + '{') for p in prefixes if p]
+        query = query.filter(or_(*cells)) if cells else query.filter(Place.geohash.isnot(None))
+        query = query.filter(self.in_boxes(boxes), *conditions)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def search_text(self, terms, conditions=(), limit=100, offset=0):
+        """
+        (place, relevance) of the full-text matches, best first, with the
+        listing's owner and amenities loaded (app/persistence/search_index.py).
+        """
+        ranked = get_search_index().search(terms, conditions, limit, offset)
+        if not ranked:
+            return []
+        places = {p.id: p for p in self.model.query.options(*self._listing_options())
+                  .filter(Place.id.in_([place_id for place_id, _ in ranked])).all()}
+        return [(places[place_id], relevance) for place_id, relevance in ranked if place_id in places]
+
+    def rebuild_review_aggregates(self):
+        """
+        Recompute review_count, rating_sum, the histogram, average_rating
+        and last_review_at of every place from the reviews table, then the
+        rank scores. Returns the number of places that have reviews.
+        """
+        aggregates = {}
+        rows = (db.session.query(Review.place_id, Review.rating, func.count())
+                .group_by(Review.place_id, Review.rating).all())
+        for place_id, rating, count in rows:
+            values = aggregates.setdefault(place_id, {
+                'pid': place_id, 'review_count': 0, 'rating_sum': 0,
+                'rating_1': 0, 'rating_2': 0, 'rating_3': 0, 'rating_4': 0, 'rating_5': 0
+            })
+            values[f'rating_{rating}'] += count
+            values['review_count'] += count
+            values['rating_sum'] += rating * count
+        newest = dict(db.session.query(Review.place_id, func.max(Review.created_at))
+                      .group_by(Review.place_id).all())
+        for values in aggregates.values():
+            values['average_rating'] = values['rating_sum'] / values['review_count']
+            values['last_review_at'] = newest[values['pid']]
+
+        table = Place.__table__
+        # Derived data, not an edit of the places: updated_at (and with it
+        # their Last-Modified/ETag) stays as it is
+        keep_updated_at = {'updated_at': table.c.updated_at}
+        try:
+            db.session.execute(table.update().values(
+                review_count=0, rating_sum=0, rating_1=0, rating_2=0, rating_3=0,
+                rating_4=0, rating_5=0, average_rating=0.0, last_review_at=None,
+                **keep_updated_at))
+            if aggregates:
+                # Bind names must differ from the column names they set
+                columns = [k for k in next(iter(aggregates.values())) if k != 'pid']
+                db.session.execute(
+                    table.update()
+                    .where(table.c.id == bindparam('pid'))
+                    .values({**{c: bindparam(f'new_{c}') for c in columns}, **keep_updated_at}),
+                    [{'pid': v['pid'], **{f'new_{c}': v[c] for c in columns}}
+                     for v in aggregates.values()])
+            commit()
+            ranking.recompute()
+        except Exception:
+            db.session.rollback()
+            raise
+        # Objects already in the session and the cache hold the old values
+        db.session.expire_all()
+        cache.clear()
+        return len(aggregates)
+
+    def recompute_rank_scores(self):
+        """Recompute rank_score for every place; returns the number of places changed"""
+        return ranking.recompute()
+
+    def get_price_histogram(self, buckets):
+        return price_histogram.histogram(buckets)
+
+    def rebuild_price_histogram(self):
+        """Recompute the price_buckets summary; returns the number of places counted"""
+        count = price_histogram.rebuild()
+        commit()
+        return count
+
+    def get_amenity_ids(self, place_ids):
+        """{place_id: [amenity_id, ...]} for the given places, in one query"""
+        result = {place_id: [] for place_id in place_ids}
+        rows = db.session.execute(
+            place_amenity.select().where(place_amenity.c.place_id.in_(place_ids)))
+        for place_id, amenity_id in rows:
+            result[place_id].append(amenity_id)
+        return result
+
+    def get_listing_version(self, filters=None, ranges=None, conditions=(), ranked=False):
+        """
+        get_version() of the places, plus the newest owner and amenity
+        change since the listing embeds their names. ranked: also the sum
+        of the rank scores, which the periodic recompute rewrites without
+        touching updated_at (sort=rank).
+        """
+        owners = db.session.query(func.max(User.updated_at)).scalar()
+        amenities = db.session.query(func.max(Amenity.updated_at)).scalar()
+        extra = (func.sum(Place.rank_score),) if ranked else ()
+        return self.get_version(filters, ranges, conditions, extra) + (owners, amenities)
+
+    def get_detail_version(self, place_id):
+        """
+        Everything the place detail view is built from, in one query:
+        the place, its owner, count + newest change of its reviews, the
+        newest change of their reviewers, and count + newest change of its
+        amenities and images. None if the place does not exist.
+        """
+        def count_and_newest(model, *where):
+            return (select(func.count(model.id)).where(*where).scalar_subquery(),
+                    select(func.max(model.updated_at)).where(*where).scalar_subquery())
+
+        # Aliased: the outer query's users row is the owner
+        reviewer = aliased(User)
+        reviewers = (select(func.max(reviewer.updated_at))
+                     .join(Review, Review.user_id == reviewer.id)
+                     .where(Review.place_id == place_id).scalar_subquery())
+        row = db.session.execute(
+            select(Place.updated_at, User.updated_at,
+                   *count_and_newest(Review, Review.place_id == place_id), reviewers,
+                   *count_and_newest(Amenity, Amenity.id == place_amenity.c.amenity_id,
+                                     place_amenity.c.place_id == place_id),
+                   *count_and_newest(PlaceImage, PlaceImage.place_id == place_id))
+            .join(User, User.id == Place.owner_id)
+            .where(Place.id == place_id)
+        ).first()
+        return tuple(row) if row else None
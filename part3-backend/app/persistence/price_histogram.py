@@ -0,0 +1,142 @@
+#!/usr/bin/python3
+"""
+Price distribution of the places, kept as a summary table.
+
+price_buckets holds the number of places per price step of
+PRICE_BUCKET_WIDTH. Every ORM flush that creates, deletes or re-prices a
+place adjusts the affected buckets in the same transaction; Core inserts
+(the bulk importer) call add_prices(). A histogram with any number of
+buckets is then built from those few hundred rows instead of the places
+table.
+
+`flask hbnb rebuild-price-histogram` recomputes the table from the
+places; init_app does it once when the table is empty but places exist
+(a database created before the summary table).
+"""
+import math
+from collections import Counter
+from sqlalchemy import Integer, bindparam, cast, delete, event, func, insert, select
+from app.extensions import db
+from app.models.place import Place, PRICE_BUCKET_WIDTH, price_buckets
+
+_DELTAS_KEY = 'price_bucket_deltas'
+MAX_BUCKETS = 100
+
+
+def bucket_of(price):
+    return math.floor(price / PRICE_BUCKET_WIDTH)
+
+
+def apply_deltas(connection, deltas):
+    """Add {bucket: delta} to the place counts"""
+    deltas = {bucket: delta for bucket, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    c = price_buckets.c
+    existing = set(connection.execute(
+        select(c.bucket).where(c.bucket.in_(list(deltas)))).scalars())
+    if existing:
+        connection.execute(
+            price_buckets.update().where(c.bucket == bindparam('b'))
+            .values(places=c.places + bindparam('delta')),
+            [{'b': bucket, 'delta': deltas[bucket]} for bucket in existing])
+    missing = [{'bucket': bucket, 'places': delta}
+               for bucket, delta in deltas.items() if bucket not in existing]
+    if missing:
+        connection.execute(insert(price_buckets), missing)
+
+
+def add_prices(prices):
+    """Count places inserted without the ORM"""
+    apply_deltas(db.session.connection(), Counter(bucket_of(p) for p in prices))
+
+
+def rebuild():
+    """Recompute every bucket from the places table; returns the number of places"""
+    # Prices are never negative: truncating is flooring
+    bucket = cast(Place.price / PRICE_BUCKET_WIDTH, Integer)
+    rows = db.session.execute(select(bucket, func.count()).group_by(bucket)).all()
+    db.session.execute(delete(price_buckets))
+    if rows:
+        db.session.execute(insert(price_buckets),
+                           [{'bucket': int(b), 'places': count} for b, count in rows])
+    return sum(count for _, count in rows)
+
+
+def histogram(buckets):
+    """
+    {'min_price', 'max_price', 'total', 'buckets': [{'min', 'max', 'count'}, ...]}
+    with at most `buckets` equal-width buckets from the cheapest to the most
+    expensive place. Bucket edges are multiples of PRICE_BUCKET_WIDTH, so
+    the counts are exact; a bucket covers min <= price < max.
+    """
+    if not (1 <= buckets <= MAX_BUCKETS):
+        raise ValueError(f"buckets must be between 1 and {MAX_BUCKETS}")
+    c = price_buckets.c
+    rows = db.session.execute(
+        select(c.bucket, c.places).where(c.places > 0).order_by(c.bucket)).all()
+    # Exact bounds from the price index (two index lookups)
+    min_price, max_price = db.session.execute(select(func.min(Place.price), func.max(Place.price))).one()
+    if not rows:
+        return {'min_price': min_price, 'max_price': max_price, 'total': 0, 'buckets': []}
+
+    low, high = rows[0].bucket, rows[-1].bucket
+    step = -(-(high - low + 1) // buckets)   # price steps per bucket, rounded up
+    counts = [0] * (-(-(high - low + 1) // step))
+    for bucket, places in rows:
+        counts[(bucket - low) // step] += places
+    return {
+        'min_price': min_price,
+        'max_price': max_price,
+        'total': sum(counts),
+        'buckets': [{'min': (low + i * step) * PRICE_BUCKET_WIDTH,
+                     'max': (low + (i + 1) * step) * PRICE_BUCKET_WIDTH,
+                     'count': count} for i, count in enumerate(counts)],
+    }
+
+
+# ------------------- Maintenance on ORM writes -------------------
+@event.listens_for(db.session, 'before_flush')
+def _collect_price_changes(session, flush_context, instances):
+    deltas = session.info.setdefault(_DELTAS_KEY, Counter())
+    for obj in session.new:
+        if isinstance(obj, Place) and obj.price is not None:
+            deltas[bucket_of(obj.price)] += 1
+    for obj in session.deleted:
+        if isinstance(obj, Place):
+            history = db.inspect(obj).attrs.price.history
+            price = history.deleted[0] if history.deleted else obj.price
+            deltas[bucket_of(price)] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, Place) and obj not in session.deleted:
+            history = db.inspect(obj).attrs.price.history
+            if not history.added:
+                continue
+            # Set on an expired object: the old price was never loaded
+            old = history.deleted[0] if history.deleted else session.execute(
+                select(Place.price).where(Place.id == obj.id)).scalar()
+            deltas[bucket_of(old)] -= 1
+            deltas[bucket_of(history.added[0])] += 1
+
+
+@event.listens_for(db.session, 'after_flush')
+def _apply_price_changes(session, flush_context):
+    deltas = session.info.pop(_DELTAS_KEY, None)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_price_changes(session):
+    # A failed flush leaves its deltas behind
+    session.info.pop(_DELTAS_KEY, None)
+
+
+def init_app(app):
+    """Call after db.create_all(); fills an empty table from the places"""
+    with app.app_context():
+        empty = db.session.execute(select(price_buckets.c.bucket).limit(1)).first() is None
+        if empty and db.session.execute(select(Place.id).limit(1)).first() is not None:
+            rebuild()
+            db.session.commit()
+        db.session.remove()
@@ -0,0 +1,123 @@
+#!/usr/bin/python3
+"""
+Ranking score of a place, stored in places.rank_score so sort=rank is a
+scan of its index:
+
+    rank_score = (RANK_PRIOR_WEIGHT * RANK_PRIOR_MEAN + rating_sum)
+                 / (RANK_PRIOR_WEIGHT + review_count)
+               + RANK_RECENCY_WEIGHT * 0.5 ** (days since the newest review
+                                              / RANK_RECENCY_HALF_LIFE_DAYS)
+
+The first term is a Bayesian average: every place starts with
+RANK_PRIOR_WEIGHT imaginary reviews of RANK_PRIOR_MEAN stars, so a single
+5-star review does not outrank fifty 4.8-star ones. The second favours
+places reviewed lately and halves every half-life; a place without
+reviews gets none of it.
+
+The facade refreshes the score of a place on each review write and the
+bulk importer after each chunk of reviews. The recency term keeps
+decaying without writes, so `flask hbnb recompute-rank` (run from cron,
+e.g. hourly) recomputes every place.
+"""
+from datetime import datetime, timezone
+from flask import current_app
+from sqlalchemy import bindparam, select
+from app.extensions import db
+from app.models.place import Place
+from app.persistence import cache
+from app.persistence.unit_of_work import commit
+
+CHUNK_SIZE = 1000
+# Config key -> default
+SETTINGS = {
+    'RANK_PRIOR_MEAN': 3.5,
+    'RANK_PRIOR_WEIGHT': 5,
+    'RANK_RECENCY_WEIGHT': 0.5,
+    'RANK_RECENCY_HALF_LIFE_DAYS': 90,
+}
+
+
+def settings():
+    """The ranking parameters of the current app"""
+    return {key: current_app.config.get(key, default) for key, default in SETTINGS.items()}
+
+
+def _utc(value):
+    # SQLite returns naive datetimes; they are stored in UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def rank_score(rating_sum, review_count, last_review_at, now, params):
+    """The score of a place from its review aggregates"""
+    prior = params['RANK_PRIOR_WEIGHT']
+    score = (prior * params['RANK_PRIOR_MEAN'] + (rating_sum or 0)) / (prior + (review_count or 0))
+    if review_count and last_review_at is not None:
+        days = max((now - _utc(last_review_at)).total_seconds() / 86400, 0.0)
+        score += params['RANK_RECENCY_WEIGHT'] * 0.5 ** (days / params['RANK_RECENCY_HALF_LIFE_DAYS'])
+    return score
+
+
+def refresh(place, now=None):
+    """Recompute the score of a place object; the caller's commit persists it"""
+    place.rank_score = rank_score(place.rating_sum, place.review_count, place.last_review_at,
+                                  now or datetime.now(timezone.utc), settings())
+
+
+def recompute(place_ids=None, now=None):
+    """
+    Recompute the stored score of the given places from their aggregate
+    columns, CHUNK_SIZE places per statement; only changed rows are
+    written. Without place_ids every place is recomputed and each chunk
+    is committed, otherwise the caller's commit persists the scores.
+    Returns the number of places written.
+    """
+    params = settings()
+    now = now or datetime.now(timezone.utc)
+    c = Place.__table__.c
+    query = select(c.id, c.rating_sum, c.review_count, c.last_review_at, c.rank_score)
+    # updated_at pinned: a score change is not an edit of the place, and
+    # would otherwise move its Last-Modified/ETag on every periodic run
+    update = (Place.__table__.update().where(c.id == bindparam('pid'))
+              .values(rank_score=bindparam('score'), updated_at=c.updated_at))
+    written = 0
+    for rows in _chunks(query, place_ids):
+        changes = []
+        for place_id, rating_sum, review_count, last_review_at, current in rows:
+            score = rank_score(rating_sum, review_count, last_review_at, now, params)
+            if current is None or abs(score - current) > 1e-9:
+                changes.append({'pid': place_id, 'score': score})
+        if not changes:
+            continue
+        db.session.execute(update, changes)
+        ids = [change['pid'] for change in changes]
+        cache.invalidate(Place, *ids)
+        # Loaded objects would otherwise keep (and write back) the old score
+        for place_id in ids:
+            obj = db.session.identity_map.get(db.session.identity_key(Place, place_id))
+            if obj is not None:
+                db.session.expire(obj, ['rank_score'])
+        if place_ids is None:
+            commit()
+        written += len(changes)
+    return written
+
+
+def _chunks(query, place_ids):
+    c = Place.__table__.c
+    if place_ids is not None:
+        place_ids = list(place_ids)
+        for start in range(0, len(place_ids), CHUNK_SIZE):
+            yield db.session.execute(
+                query.where(c.id.in_(place_ids[start:start + CHUNK_SIZE]))).all()
+        return
+    # Keyset over the primary key: no cursor stays open across the updates
+    last_id = None
+    while True:
+        page = query.order_by(c.id).limit(CHUNK_SIZE)
+        if last_id is not None:
+            page = page.where(c.id > last_id)
+        rows = db.session.execute(page).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
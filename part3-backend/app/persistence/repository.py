@@ -1,6 +1,47 @@
 #!/usr/bin/python3
+import base64
+import json
 from abc import ABC, abstractmethod
+from datetime import datetime
+from sqlalchemy import and_, func, or_, select
 from app.extensions import db
+from app.persistence import cache
+from app.persistence.unit_of_work import commit
+
+
+def encode_cursor(values):
+    """Encode the keyset values of the last row of a page as an opaque string."""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor. Raises ValueError if malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def coerce_value(column, value):
+    """Convert a query-string value to the Python type of the column."""
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if isinstance(value, python_type):
+        return value
+    try:
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if python_type is bool:
+            return str(value).lower() in ('1', 'true', 'yes')
+        return python_type(value)
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid value for {column.key}: {value}")
 
 
 class Repository(ABC):
@@ -12,6 +53,10 @@ class Repository(ABC):
     def get(self, obj_id):
         pass
 
+    @abstractmethod
+    def get_many(self, ids):
+        pass
+
     @abstractmethod
     def get_all(self):
         pass
@@ -39,6 +84,12 @@ class InMemoryRepository(Repository):
     def get(self, obj_id):
         return self._storage.get(obj_id)
 
+    def get_many(self, ids):
+        # (objects in the order of ids, ids not found); duplicates count once
+        ids = list(dict.fromkeys(ids))
+        return ([self._storage[i] for i in ids if i in self._storage],
+                [i for i in ids if i not in self._storage])
+
     def get_all(self):
         return list(self._storage.values())
 
@@ -64,10 +115,24 @@ class SQLAlchemyRepository(Repository):
 
     def add(self, obj):
         db.session.add(obj)
-        db.session.commit()
+        commit()
 
     def get(self, obj_id):
-        return db.session.get(self.model, obj_id) # SELECT * WHERE id = 'obj_id'
+        # SELECT * WHERE id = 'obj_id', unless the row is cached (app/persistence/cache.py)
+        return cache.get(self.model, obj_id)
+
+    def get_many(self, ids, options=()):
+        """
+        (objects in the order of ids, ids not found), loaded with a single
+        SELECT ... WHERE id IN (...) instead of one get() per id.
+        Duplicate ids count once. options: loader options (eager loading).
+        """
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return [], []
+        query = self.model.query.options(*options).filter(self.model.id.in_(ids))
+        found = {obj.id: obj for obj in query}
+        return [found[i] for i in ids if i in found], [i for i in ids if i not in found]
 
     def get_all(self):
         return self.model.query.all() # SELECT * FROM users
@@ -77,14 +142,95 @@ class SQLAlchemyRepository(Repository):
         if obj:
             for key, value in data.items():
                 setattr(obj, key, value)
-            db.session.commit()
+            commit()
 
     def delete(self, obj_id):
         obj = self.get(obj_id)
         if obj:
             db.session.delete(obj)
-            db.session.commit()
+            commit()
 
     def get_by_attribute(self, attr_name, attr_value):
-        # SELECT * WHERE {attr_name} = '{attr_value}' LIMIT 1
-        return self.model.query.filter_by(**{attr_name: attr_value}).first()
+        # SELECT * WHERE {attr_name} = '{attr_value}' LIMIT 1, read through the cache
+        return cache.get_by_attribute(self.model, attr_name, attr_value)
+
+    def _filtered(self, query, filters=None, ranges=None):
+        """Apply {column: value} equality filters and {column: (low, high)} ranges"""
+        for name, value in (filters or {}).items():
+            column = getattr(self.model, name)
+            query = query.filter(column == coerce_value(column, value))
+        for name, (low, high) in (ranges or {}).items():
+            column = getattr(self.model, name)
+            if low is not None:
+                query = query.filter(column >= coerce_value(column, low))
+            if high is not None:
+                query = query.filter(column <= coerce_value(column, high))
+        return query
+
+    def get_version(self, filters=None, ranges=None, conditions=(), extra=()):
+        """
+        (row count, newest updated_at) of the rows matching the filters.
+        Changes whenever one of them is created, updated or deleted, so it
+        can validate a cached copy of the collection (ETag).
+        extra: more aggregates appended to the tuple, for columns written
+        without moving updated_at.
+        """
+        query = db.session.query(func.count(self.model.id), func.max(self.model.updated_at), *extra)
+        return tuple(self._filtered(query, filters, ranges).filter(*conditions).one())
+
+    def get_ids(self, filters=None, ranges=None):
+        """Ids of the rows matching the filters"""
+        query = db.session.query(self.model.id)
+        return [row_id for row_id, in self._filtered(query, filters, ranges)]
+
+    def query_page(self, limit, cursor=None, sort='created_at', descending=False,
+                   filters=None, ranges=None, options=(), conditions=()):
+        """
+        Return one page of rows as (items, next_cursor).
+        Rows are ordered by (sort, id) and the cursor holds the keyset of the
+        last row, so every page is an index range scan instead of an OFFSET.
+        filters: {column: value} equality filters.
+        ranges: {column: (low, high)} inclusive bounds, None leaves a side open.
+        conditions: extra SQL conditions on the model.
+        next_cursor is None on the last page.
+        """
+        sort_col = getattr(self.model, sort)
+        id_col = self.model.id
+        query = self._filtered(self.model.query.options(*options), filters, ranges).filter(*conditions)
+
+        if cursor:
+            last_value, last_id = decode_cursor(cursor)
+            last_value = coerce_value(sort_col, last_value)
+            if descending:
+                query = query.filter(or_(sort_col < last_value,
+                                         and_(sort_col == last_value, id_col < last_id)))
+            else:
+                query = query.filter(or_(sort_col > last_value,
+                                         and_(sort_col == last_value, id_col > last_id)))
+
+        if descending:
+            query = query.order_by(sort_col.desc(), id_col.desc())
+        else:
+            query = query.order_by(sort_col.asc(), id_col.asc())
+
+        # Fetch one extra row to know whether there is a next page
+        items = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            next_cursor = encode_cursor([getattr(last, sort), last.id])
+        return items, next_cursor
+
+    def iter_chunks(self, chunk_size=1000, exclude=()):
+        """
+        Yield every row of the table as lists of at most chunk_size plain dicts.
+        Rows are streamed from the cursor (yield_per) and never become ORM
+        objects, so memory stays constant whatever the table size.
+        """
+        table = self.model.__table__
+        columns = [c for c in table.columns if c.name not in exclude]
+        result = db.session.execute(
+            select(*columns).order_by(table.c.id).execution_options(yield_per=chunk_size))
+        for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
@@ -0,0 +1,51 @@
+#!/usr/bin/python3
+from sqlalchemy import exists, func
+from sqlalchemy.orm import joinedload
+from app.extensions import db
+from app.models.review import Review
+from app.models.user import User
+from app.persistence.repository import SQLAlchemyRepository
+
+
+class ReviewRepository(SQLAlchemyRepository):
+    def __init__(self):
+        # Passes the Review model to the parent class SQLAlchemyRepository
+        super().__init__(Review)
+
+    @staticmethod
+    def _with_reviewer():
+        # The reviewer (review.user) is joined into the same SELECT, so
+        # serializing the reviewer names costs no query per review
+        return (joinedload(Review.user),)
+
+    def get_by_place(self, place_id):
+        # SELECT * FROM reviews JOIN users WHERE place_id = 'place_id' (uses ix_reviews_place_id)
+        return (self.model.query.options(*self._with_reviewer())
+                .filter_by(place_id=place_id).order_by(Review.created_at).all())
+
+    def get_page_by_place(self, place_id, **page_args):
+        # One keyset page of the reviews of a place, reviewers included
+        filters = dict(page_args.pop('filters', None) or {}, place_id=place_id)
+        return self.query_page(filters=filters, options=self._with_reviewer(), **page_args)
+
+    def get_newest_date(self, place_id):
+        """created_at of the place's newest review, or None (uses ix_reviews_place_id)"""
+        return (db.session.query(func.max(Review.created_at))
+                .filter(Review.place_id == place_id).scalar())
+
+    def get_place_version(self, place_id):
+        """
+        get_version() of a place's reviews, plus the newest change of their
+        reviewers since each review embeds its reviewer's name.
+        """
+        reviewers = (db.session.query(func.max(User.updated_at))
+                     .join(Review, Review.user_id == User.id)
+                     .filter(Review.place_id == place_id).scalar())
+        return self.get_version(filters={'place_id': place_id}) + (reviewers,)
+
+    def exists_for(self, user_id, place_id):
+        # SELECT EXISTS (SELECT 1 FROM reviews WHERE user_id = ? AND place_id = ?)
+        # answered from the (user_id, place_id) unique index
+        return db.session.query(
+            exists().where(Review.user_id == user_id, Review.place_id == place_id)
+        ).scalar()
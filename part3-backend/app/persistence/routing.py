@@ -0,0 +1,215 @@
+#!/usr/bin/python3
+"""
+Read-replica routing.
+
+Replicas are listed in DB_REPLICA_URIS and get the engines replica_0,
+replica_1, ... (app.extensions['replica_engines']). Facade read methods
+decorated with @replica_reads run their SELECTs on a random replica when it is safe:
+
+    - the request is a GET/HEAD/OPTIONS (writes read from the primary
+      what they are about to change),
+    - the session has not written in its current transaction,
+    - the user has not written in the last REPLICA_STICKY_SECONDS
+      (read-your-writes: replicas may lag behind the primary).
+
+Everything else — writes, flushes, lazy loads after the method returns,
+CLI commands — uses the primary.
+
+Who wrote recently is kept in a store (config REPLICA_STICKY_BACKEND):
+    'memory' — in-process; a read served by another worker process
+               may still hit a lagging replica (default)
+    'redis'  — shared by every worker, on the Redis server at
+               REPLICA_STICKY_REDIS_URL ('local://' uses the in-process
+               LocalRedis stand-in)
+"""
+import math
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+try:
+    import redis
+except ImportError:  # optional, only needed for REPLICA_STICKY_BACKEND = 'redis'
+    redis = None
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+_REPLICA_KEY = 'replica_bind'
+_WROTE_KEY = 'wrote_in_transaction'
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session sending SELECTs to the replica chosen by read_from_replica()"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get(_REPLICA_KEY)
+        if (replica and bind is None and not self._flushing
+                and getattr(clause, 'is_select', False)):
+            return current_app.extensions['replica_engines'][replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_written(session, flush_context):
+    session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+@event.listens_for(RoutingSession, 'after_rollback')
+def _clear_written(session):
+    session.info.pop(_WROTE_KEY, None)
+
+
+class StickyTracker:
+    """In-process record of who wrote recently, bounded to max_keys users"""
+
+    def __init__(self, max_keys=100000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._until = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mark(self, who, seconds):
+        with self._lock:
+            self._until.pop(who, None)
+            self._until[who] = self._clock() + seconds
+            while len(self._until) > self.max_keys:
+                self._until.popitem(last=False)
+
+    def is_sticky(self, who):
+        with self._lock:
+            until = self._until.get(who)
+        return until is not None and until > self._clock()
+
+
+class RedisStickyTracker:
+    """
+    Record of who wrote recently shared between processes: one key per
+    user, expiring with its sticky window. If the server cannot be
+    reached the caller counts as sticky and reads from the primary.
+    """
+
+    def __init__(self, client, prefix='hbnb:sticky:'):
+        self.client = client
+        self.prefix = prefix
+
+    def mark(self, who, seconds):
+        try:
+            self.client.set(self.prefix + who, b'1', ex=max(1, math.ceil(seconds)))
+        except Exception:
+            pass
+
+    def is_sticky(self, who):
+        try:
+            return self.client.get(self.prefix + who) is not None
+        except Exception:
+            return True
+
+
+def create_sticky_tracker(config):
+    """Build the tracker selected by REPLICA_STICKY_BACKEND"""
+    backend = config.get('REPLICA_STICKY_BACKEND', 'memory')
+    if backend == 'memory':
+        return StickyTracker()
+    if backend == 'redis':
+        url = config.get('REPLICA_STICKY_REDIS_URL') or 'redis://localhost:6379/0'
+        if url.startswith('local://'):
+            from app.persistence.cache import LocalRedis  # cache imports this module
+            client = LocalRedis()
+        elif redis is None:
+            raise RuntimeError("REPLICA_STICKY_BACKEND='redis' requires the redis package")
+        else:
+            client = redis.Redis.from_url(url)
+        return RedisStickyTracker(client)
+    raise ValueError(f"Unknown REPLICA_STICKY_BACKEND: {backend}")
+
+
+def replica_binds(config):
+    """Names of the configured replicas"""
+    return [f'replica_{i}' for i in range(len(config.get('DB_REPLICA_URIS') or ()))]
+
+
+def _requester():
+    """JWT identity of the caller, or its address for anonymous requests"""
+    from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        identity = None
+    return f'user:{identity}' if identity else f'ip:{request.remote_addr}'
+
+
+def _choose_replica(session):
+    if not has_request_context() or request.method not in SAFE_METHODS:
+        return None
+    binds = list(current_app.extensions.get('replica_engines', ()))
+    if not binds or session.info.get(_WROTE_KEY):
+        return None
+    if current_app.extensions['replica_sticky'].is_sticky(_requester()):
+        return None
+    return random.choice(binds)
+
+
+@contextmanager
+def read_from_replica():
+    """Route the SELECTs of the block to a replica when it is safe"""
+    from app.extensions import db
+    session = db.session()
+    previous = session.info.get(_REPLICA_KEY)
+    session.info[_REPLICA_KEY] = previous or _choose_replica(session)
+    try:
+        yield session.info[_REPLICA_KEY]
+    finally:
+        session.info[_REPLICA_KEY] = previous
+
+
+def reading_from_replica():
+    """True inside a read_from_replica() block that picked a replica"""
+    from app.extensions import db
+    return bool(db.session.info.get(_REPLICA_KEY))
+
+
+def replica_reads(method):
+    """Decorator for facade methods that only read"""
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        with read_from_replica():
+            return method(*args, **kwargs)
+    return wrapper
+
+
+def init_app(app):
+    """Call after engine.create_replica_engines(app)"""
+    app.extensions['replica_sticky'] = create_sticky_tracker(app.config)
+    sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 5)
+
+    @app.after_request
+    def _stick_to_primary_after_write(response):
+        # Reads of this user go to the primary until the replicas caught up
+        if (app.extensions['replica_engines'] and request.method not in SAFE_METHODS
+                and response.status_code < 400):
+            app.extensions['replica_sticky'].mark(_requester(), sticky_seconds)
+        return response
+
+
+def sync_sqlite_replica(primary_engine, replica_engine):
+    """
+    Stand-in for replication in local runs and tests: copy the primary
+    SQLite file over the replica with SQLite's online backup API.
+    """
+    source = sqlite3.connect(primary_engine.url.database)
+    target = sqlite3.connect(replica_engine.url.database)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+    # Pooled replica connections may have cached the old pages
+    replica_engine.dispose()
@@ -0,0 +1,340 @@
+#!/usr/bin/python3
+"""
+Full-text index of places: title, description and the text of their reviews.
+
+One document per place, fields weighted title 10, description 4, reviews 1.
+Two backends with the same interface (config SEARCH_BACKEND):
+    'fts5'     — SQLite FTS5 virtual table places_fts, ranked by bm25()
+    'inverted' — portable postings table (term, doc_id, weighted tf) with
+                 BM25 computed by one GROUP BY query, for databases
+                 without FTS5
+    'auto'     — fts5 when the SQLite build has it, inverted otherwise
+
+The facade calls reindex() for every place whose title, description or
+reviews it writes, inside the same transaction as the write; the bulk
+importer does the same per chunk, and `flask hbnb rebuild-search-index`
+rebuilds everything. At startup an empty index (new database, or backend
+changed) is filled from the existing places.
+
+Query syntax: the words are ANDed and a trailing * makes a word a prefix
+(`sea*` matches seaside, seaview). Case and accents are ignored.
+"""
+import math
+import re
+import unicodedata
+from abc import ABC, abstractmethod
+from flask import current_app
+from sqlalchemy import (bindparam, case, column, delete, distinct, func, insert,
+                        literal_column, select, table, text)
+from sqlalchemy.exc import OperationalError
+from app.extensions import db
+from app.models.place import Place
+from app.models.review import Review
+from app.models.search import search_documents, search_postings
+
+FIELD_WEIGHTS = (('title', 10.0), ('description', 4.0), ('reviews', 1.0))
+MAX_QUERY_TERMS = 8
+MIN_PREFIX_LENGTH = 2
+# Distinct terms a prefix may stand for in the inverted index
+MAX_PREFIX_EXPANSION = 64
+TERM_MAX_LENGTH = 64
+# Values per IN (...) list
+BATCH = 500
+
+# Letters and digits; '_' and punctuation separate words, as in FTS5's unicode61
+_WORD = re.compile(r'[^\W_]+')
+
+
+def _batches(values, size=BATCH):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def tokenize(value):
+    """Lower-cased words of value, accents removed"""
+    value = unicodedata.normalize('NFKD', value or '')
+    value = ''.join(c for c in value if not unicodedata.combining(c))
+    return [word[:TERM_MAX_LENGTH] for word in _WORD.findall(value.lower())]
+
+
+def parse_query(q):
+    """
+    [(term, is_prefix), ...] for a search string.
+    Raises ValueError if it has no words, too many, or a too short prefix.
+    """
+    terms = []
+    for part in (q or '').split():
+        words = tokenize(part)
+        for i, word in enumerate(words):
+            prefix = part.endswith('*') and i == len(words) - 1
+            if prefix and len(word) < MIN_PREFIX_LENGTH:
+                raise ValueError(f"A prefix needs at least {MIN_PREFIX_LENGTH} characters: {part}")
+            terms.append((word, prefix))
+    if not terms:
+        raise ValueError("q must contain at least one word")
+    if len(terms) > MAX_QUERY_TERMS:
+        raise ValueError(f"q can contain at most {MAX_QUERY_TERMS} words")
+    return terms
+
+
+def load_documents(place_ids):
+    """{place_id: {'title', 'description', 'reviews'}} for the places that exist"""
+    docs = {}
+    for batch in _batches(place_ids):
+        for place_id, title, description in db.session.execute(
+                select(Place.id, Place.title, Place.description).where(Place.id.in_(batch))):
+            docs[place_id] = {'title': title or '', 'description': description or '', 'reviews': []}
+        for place_id, review_text in db.session.execute(
+                select(Review.place_id, Review.text).where(Review.place_id.in_(batch))
+                .order_by(Review.created_at)):
+            docs[place_id]['reviews'].append(review_text or '')
+    for doc in docs.values():
+        doc['reviews'] = '\n'.join(doc['reviews'])
+    return docs
+
+
+def document_length(doc):
+    return sum(weight * len(tokenize(doc[field])) for field, weight in FIELD_WEIGHTS)
+
+
+class SearchIndex(ABC):
+    """Document bookkeeping shared by the backends (search_documents table)"""
+    name = None
+
+    def create(self, connection):
+        """Create backend-specific storage (the tables come from db.create_all)"""
+
+    def reindex(self, place_ids):
+        """Rebuild the documents of these places from the database; deleted places are removed"""
+        place_ids = list(dict.fromkeys(place_ids))
+        if not place_ids:
+            return
+        db.session.flush()
+        docs = load_documents(place_ids)
+        self.remove([place_id for place_id in place_ids if place_id not in docs])
+        if not docs:
+            return
+        doc_ids = self._doc_ids(list(docs), create=True)
+        self._clear(list(doc_ids.values()))
+        db.session.execute(
+            search_documents.update()
+            .where(search_documents.c.doc_id == bindparam('did'))
+            .values(length=bindparam('new_length')),
+            [{'did': doc_ids[p], 'new_length': document_length(doc)} for p, doc in docs.items()])
+        self._write([(doc_ids[p], doc) for p, doc in docs.items()])
+
+    def remove(self, place_ids):
+        doc_ids = list(self._doc_ids(place_ids).values())
+        if not doc_ids:
+            return
+        self._clear(doc_ids)
+        for batch in _batches(doc_ids):
+            db.session.execute(delete(search_documents).where(search_documents.c.doc_id.in_(batch)))
+
+    def rebuild(self, chunk_size=5000, commit=None):
+        """Drop every document and index all places again; returns the number indexed"""
+        self._clear_all()
+        db.session.execute(delete(search_documents))
+        count, last = 0, ''
+        while True:
+            ids = db.session.execute(select(Place.id).where(Place.id > last)
+                                     .order_by(Place.id).limit(chunk_size)).scalars().all()
+            if not ids:
+                return count
+            self.reindex(ids)
+            if commit is not None:
+                commit()
+            count, last = count + len(ids), ids[-1]
+
+    @abstractmethod
+    def _clear(self, doc_ids):
+        """Remove the indexed terms of these documents"""
+
+    @abstractmethod
+    def _clear_all(self):
+        """Remove every indexed term"""
+
+    @abstractmethod
+    def _write(self, docs):
+        """Index [(doc_id, document), ...]"""
+
+    @abstractmethod
+    def is_empty(self):
+        """True if nothing is indexed in this backend's storage"""
+
+    def _doc_ids(self, place_ids, create=False):
+        """{place_id: doc_id}, creating the missing documents if create"""
+        found = {}
+        docs = search_documents.c
+        for batch in _batches(place_ids):
+            found.update(db.session.execute(
+                select(docs.place_id, docs.doc_id).where(docs.place_id.in_(batch))).all())
+        missing = [place_id for place_id in place_ids if place_id not in found]
+        if create and missing:
+            db.session.execute(insert(search_documents), [{'place_id': p, 'length': 0.0} for p in missing])
+            found.update(self._doc_ids(missing))
+        return found
+
+    @abstractmethod
+    def search(self, terms, conditions=(), limit=100, offset=0):
+        """
+        [(place_id, relevance), ...] of the places matching every term of
+        parse_query() and the SQL conditions on Place, best first.
+        """
+
+
+class FTS5Index(SearchIndex):
+    """SQLite FTS5 table keyed by doc_id (its rowid); SQLite does matching and ranking"""
+    name = 'fts5'
+
+    def create(self, connection):
+        connection.exec_driver_sql(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS places_fts USING fts5("
+            "title, description, reviews, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')")
+
+    def _clear(self, doc_ids):
+        for batch in _batches(doc_ids):
+            db.session.execute(text("DELETE FROM places_fts WHERE rowid IN :ids")
+                               .bindparams(bindparam('ids', expanding=True)), {'ids': batch})
+
+    def _clear_all(self):
+        db.session.execute(text("DELETE FROM places_fts"))
+
+    def is_empty(self):
+        return db.session.execute(text("SELECT rowid FROM places_fts LIMIT 1")).first() is None
+
+    def _write(self, docs):
+        db.session.execute(
+            text("INSERT INTO places_fts (rowid, title, description, reviews) "
+                 "VALUES (:doc_id, :title, :description, :reviews)"),
+            [dict(doc, doc_id=doc_id) for doc_id, doc in docs])
+
+    def search(self, terms, conditions=(), limit=100, offset=0):
+        # Quoted so that words like AND/OR/NEAR are not read as operators
+        match = ' '.join(f'"{term}"*' if prefix else f'"{term}"' for term, prefix in terms)
+        # bm25() is lower for better matches
+        bm25 = literal_column(
+            f"bm25(places_fts, {', '.join(str(w) for _, w in FIELD_WEIGHTS)})")
+        fts = table('places_fts', column('rowid'))
+        docs = search_documents.c
+        stmt = (select(docs.place_id, (-bm25).label('relevance'))
+                .select_from(fts.join(search_documents, docs.doc_id == fts.c.rowid)
+                             .join(Place.__table__, Place.id == docs.place_id))
+                .where(text("places_fts MATCH :match"), *conditions)
+                .order_by(bm25, docs.place_id)
+                .limit(limit).offset(offset))
+        return [tuple(row) for row in db.session.execute(stmt, {'match': match})]
+
+
+class InvertedIndex(SearchIndex):
+    """Postings in a regular table, BM25 (k1=1.2, b=0.75) computed in SQL"""
+    name = 'inverted'
+    K1 = 1.2
+    B = 0.75
+
+    def _clear(self, doc_ids):
+        for batch in _batches(doc_ids):
+            db.session.execute(delete(search_postings).where(search_postings.c.doc_id.in_(batch)))
+
+    def _clear_all(self):
+        db.session.execute(delete(search_postings))
+
+    def is_empty(self):
+        return db.session.execute(select(search_postings.c.doc_id).limit(1)).first() is None
+
+    def _write(self, docs):
+        rows = []
+        for doc_id, doc in docs:
+            frequencies = {}
+            for field, weight in FIELD_WEIGHTS:
+                for term in tokenize(doc[field]):
+                    frequencies[term] = frequencies.get(term, 0.0) + weight
+            rows.extend({'term': term, 'doc_id': doc_id, 'tf': tf} for term, tf in frequencies.items())
+        if rows:
+            db.session.execute(insert(search_postings), rows)
+
+    def _expand(self, term, prefix):
+        """Indexed terms a query term stands for (an index range scan for a prefix)"""
+        if not prefix:
+            return [term]
+        postings = search_postings.c
+        return db.session.execute(
+            select(postings.term).distinct()
+            .where(postings.term >= term, postings.term < term + '\uffff')
+            .order_by(postings.term).limit(MAX_PREFIX_EXPANSION)).scalars().all()
+
+    def search(self, terms, conditions=(), limit=100, offset=0):
+        groups = []
+        for term, prefix in terms:
+            expanded = frozenset(self._expand(term, prefix))
+            if not expanded:
+                return []
+            groups.append(expanded)
+        # A document matching 'sea' also matches 'sea*': keep the narrowest groups
+        groups = [g for g in set(groups) if not any(other < g for other in groups)]
+        all_terms = sorted(set().union(*groups))
+
+        docs, postings = search_documents.c, search_postings.c
+        count, avg_length = db.session.execute(select(func.count(), func.avg(docs.length))).one()
+        if not count:
+            return []
+        df = dict(db.session.execute(select(postings.term, func.count())
+                                     .where(postings.term.in_(all_terms))
+                                     .group_by(postings.term)).all())
+        idf = {t: math.log(1 + (count - df.get(t, 0) + 0.5) / (df.get(t, 0) + 0.5)) for t in all_terms}
+
+        weight = case({t: idf[t] * (self.K1 + 1) for t in all_terms}, value=postings.term, else_=0.0)
+        group = case({t: i for i, g in enumerate(groups) for t in g}, value=postings.term)
+        length_norm = self.K1 * (1 - self.B + self.B * docs.length / (avg_length or 1.0))
+        relevance = func.sum(weight * postings.tf / (postings.tf + length_norm)).label('relevance')
+        stmt = (select(docs.place_id, relevance)
+                .select_from(search_postings.join(search_documents, docs.doc_id == postings.doc_id)
+                             .join(Place.__table__, Place.id == docs.place_id))
+                .where(postings.term.in_(all_terms), *conditions)
+                .group_by(docs.place_id)
+                # Every query word matched (AND)
+                .having(func.count(distinct(group)) == len(groups))
+                .order_by(relevance.desc(), docs.place_id)
+                .limit(limit).offset(offset))
+        return [tuple(row) for row in db.session.execute(stmt)]
+
+
+def create_index(app):
+    """The index selected by SEARCH_BACKEND; creates its storage if needed"""
+    backend = app.config.get('SEARCH_BACKEND', 'auto')
+    if backend not in ('auto', 'fts5', 'inverted'):
+        raise ValueError(f"Unknown SEARCH_BACKEND: {backend}")
+    if backend == 'inverted':
+        return InvertedIndex()
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        if backend == 'fts5':
+            raise ValueError("SEARCH_BACKEND='fts5' requires SQLite")
+        return InvertedIndex()
+    index = FTS5Index()
+    try:
+        with engine.begin() as connection:
+            index.create(connection)
+    except OperationalError:
+        # SQLite built without FTS5
+        if backend == 'fts5':
+            raise
+        return InvertedIndex()
+    return index
+
+
+def init_app(app):
+    """Call after db.create_all(); indexes the places when the backend's storage is empty"""
+    index = app.extensions['search_index'] = create_index(app)
+    with app.app_context():
+        if index.is_empty() and db.session.execute(select(Place.id).limit(1)).first() is not None:
+            index.rebuild(commit=db.session.commit)
+            db.session.commit()
+        db.session.remove()
+
+
+def get_search_index():
+    return current_app.extensions['search_index']
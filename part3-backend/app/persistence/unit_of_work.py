@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+"""
+Unit of work: groups the writes of several repository/model calls into
+one database transaction, so a request does at most one commit.
+
+Outside a unit of work, commit() commits immediately (the original
+behaviour). Inside one, it only flushes: ids are assigned and constraint
+errors surface at the call site, and the commit happens once when the
+outermost unit of work ends.
+"""
+from contextlib import contextmanager
+from flask import g, jsonify
+from app.extensions import db
+
+_DEPTH_KEY = 'unit_of_work_depth'
+
+
+def in_transaction():
+    """True while a unit of work is open on the current session"""
+    return db.session.info.get(_DEPTH_KEY, 0) > 0
+
+
+def commit():
+    """Commit now, or only flush when a unit of work will commit later"""
+    if in_transaction():
+        db.session.flush()
+    else:
+        db.session.commit()
+
+
+def _enter():
+    info = db.session.info
+    info[_DEPTH_KEY] = info.get(_DEPTH_KEY, 0) + 1
+
+
+def _exit(success):
+    """Leave one level; the outermost level commits or rolls back."""
+    info = db.session.info
+    info[_DEPTH_KEY] = max(0, info.get(_DEPTH_KEY, 0) - 1)
+    if info[_DEPTH_KEY]:
+        return
+    if not success:
+        db.session.rollback()
+        return
+    try:
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+@contextmanager
+def transaction():
+    """
+    with transaction(): ...
+    Commits once at the end of the outermost block, rolls back if it raises.
+    """
+    _enter()
+    try:
+        yield db.session
+    except BaseException:
+        _exit(success=False)
+        raise
+    _exit(success=True)
+
+
+@contextmanager
+def suspended():
+    """
+    with suspended(): ...
+    For long jobs run inside a request (bulk import): commit() commits
+    again while the block runs, so each step is its own transaction and
+    a late failure keeps the steps already committed. Writes made before
+    the block are committed on entry; the request's unit of work resumes
+    after it.
+    """
+    info = db.session.info
+    depth = info.pop(_DEPTH_KEY, 0)
+    if depth:
+        db.session.commit()
+    try:
+        yield db.session
+    finally:
+        info[_DEPTH_KEY] = depth
+
+
+def init_app(app):
+    """
+    Wrap every request in a unit of work (UNIT_OF_WORK_PER_REQUEST):
+    commit once after a successful response, roll back on 4xx/5xx
+    or an unhandled exception.
+    """
+    if not app.config.get('UNIT_OF_WORK_PER_REQUEST', True):
+        return
+
+    @app.before_request
+    def _begin_request_transaction():
+        _enter()
+        g._unit_of_work_open = True
+
+    @app.after_request
+    def _commit_request_transaction(response):
+        if not g.pop('_unit_of_work_open', False):
+            return response
+        try:
+            _exit(success=response.status_code < 400)
+        except Exception:
+            app.logger.exception("Commit at the end of the request failed")
+            error = jsonify({'error': 'Could not save changes'})
+            error.status_code = 500
+            return error
+        return response
+
+    @app.teardown_request
+    def _rollback_request_transaction(exc):
+        # Only still open when after_request did not run (unhandled error)
+        if g.pop('_unit_of_work_open', False):
+            _exit(success=False)
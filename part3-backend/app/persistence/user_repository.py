@@ -10,4 +10,4 @@ class UserRepository(SQLAlchemyRepository):
 
     def get_user_by_email(self, email):
         # SELECT * FROM users WHERE email = 'email' LIMIT 1
-        return self.model.query.filter_by(email=email).first()
+        return self.get_by_attribute('email', email)
@@ -0,0 +1,358 @@
+#!/usr/bin/python3
+"""
+Bulk NDJSON import for amenities, places and reviews.
+
+Rows are validated in chunks. Foreign keys and uniqueness are checked
+with one IN (...) lookup per batch of values instead of one query per
+row, and each chunk is written with a single executemany INSERT.
+Invalid rows are reported with their line number and skipped; the rest
+of the load goes on.
+"""
+import json
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import and_, bindparam, insert, or_, select
+from app.extensions import db
+from app.models.amenity import Amenity
+from app.models.place import Place, place_amenity
+from app.models.review import Review
+from app.models.user import User
+from app.persistence import cache, price_histogram, ranking, unit_of_work
+from app.persistence.amenity_index import get_amenity_index
+from app.persistence.search_index import get_search_index
+from app.utils import geo
+
+DEFAULT_CHUNK_SIZE = 5000
+# Values per IN (...) lookup, well under SQLite's bound-parameter limit
+LOOKUP_BATCH = 500
+# The report lists at most this many errors (all of them are counted)
+MAX_REPORTED_ERRORS = 1000
+
+
+def _batches(values, size=LOOKUP_BATCH):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _existing(column, values):
+    """The subset of values already present in column"""
+    found = set()
+    for batch in _batches(set(values)):
+        found.update(db.session.execute(select(column).where(column.in_(batch))).scalars())
+    return found
+
+
+def _existing_reviews(pairs):
+    """
+    The (user_id, place_id) pairs that already have a review.
+    Written as OR-ed (place_id = ? AND user_id IN (...)) terms so each term is
+    a seek on the (user_id, place_id) unique index; a row-value
+    (user_id, place_id) IN (...) makes SQLite scan the whole index.
+    """
+    users_by_place = {}
+    for user_id, place_id in pairs:
+        users_by_place.setdefault(place_id, []).append(user_id)
+
+    found, terms, params = set(), [], 0
+
+    def run(terms):
+        found.update(tuple(row) for row in db.session.execute(
+            select(Review.user_id, Review.place_id).where(or_(*terms))).all())
+
+    for place_id, user_ids in users_by_place.items():
+        for batch in _batches(user_ids):
+            terms.append(and_(Review.place_id == place_id, Review.user_id.in_(batch)))
+            params += len(batch) + 1
+            if params >= LOOKUP_BATCH:
+                run(terms)
+                terms, params = [], 0
+    if terms:
+        run(terms)
+    return found
+
+
+def _number(row, field):
+    value = row.get(field)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{field} must be a number")
+    return float(value)
+
+
+def _text(row, field, max_length, required=True):
+    value = row.get(field)
+    if value is None and not required:
+        return None
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError(f"{field} is required")
+    if len(value) > max_length:
+        raise ValueError(f"{field} cannot exceed {max_length} characters")
+    return value
+
+
+class BulkImporter:
+    """Imports one entity type from an iterable of NDJSON lines."""
+
+    ENTITIES = ('amenities', 'places', 'reviews')
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        self.chunk_size = chunk_size
+
+    def run(self, entity, lines):
+        """
+        Import every line and return a report:
+        {'entity', 'inserted', 'failed', 'errors': [{'line', 'error'}]}
+        """
+        if entity not in self.ENTITIES:
+            raise ValueError(f"Unknown entity: {entity}")
+        handler = getattr(self, f'_import_{entity}')
+        report = {'entity': entity, 'inserted': 0, 'failed': 0, 'errors': []}
+        # Unique keys (ids, names, user/place pairs) accepted earlier in this import
+        self._seen = set()
+        # Ids given by the rows themselves (generated uuids cannot collide)
+        self._explicit_ids = set()
+
+        chunk = []
+        for number, line in enumerate(lines, start=1):
+            try:
+                if isinstance(line, bytes):
+                    line = line.decode('utf-8')
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                if not isinstance(row, dict):
+                    raise ValueError("Each line must be a JSON object")
+            except ValueError as e:
+                self._reject(report, number, e)
+                continue
+            chunk.append((number, row))
+            if len(chunk) >= self.chunk_size:
+                handler(chunk, report)
+                chunk = []
+        if chunk:
+            handler(chunk, report)
+
+        # Rows fail at different validation stages; report them in file order
+        report['errors'].sort(key=lambda e: e['line'])
+        # Core INSERT/UPDATE bypass the ORM: reload anything already in the session
+        db.session.expire_all()
+        return report
+
+    # -------------------------
+    # Helpers
+    # -------------------------
+    def _reject(self, report, number, error):
+        report['failed'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'line': number, 'error': str(error)})
+
+    def _claim(self, key, message):
+        """Reserve a unique key for this import, or fail if a previous row took it."""
+        if key in self._seen:
+            raise ValueError(message)
+        self._seen.add(key)
+
+    def _new_id(self, row, entity):
+        """Use the id given in the row (checked later against the table) or create one."""
+        row_id = row.get('id')
+        if row_id is None:
+            return str(uuid.uuid4())
+        if not isinstance(row_id, str) or not (0 < len(row_id) <= 36):
+            raise ValueError("id must be a string of at most 36 characters")
+        self._claim((entity, row_id), f"Duplicate id in import: {row_id}")
+        self._explicit_ids.add(row_id)
+        return row_id
+
+    def _drop_taken_ids(self, model, rows, report):
+        """Reject rows whose explicit id already exists in the table."""
+        taken = _existing(model.id, [r['id'] for _, r in rows if r['id'] in self._explicit_ids])
+        if not taken:
+            return rows
+        kept = []
+        for number, r in rows:
+            if r['id'] in taken:
+                self._reject(report, number, f"id already exists: {r['id']}")
+            else:
+                kept.append((number, r))
+        return kept
+
+    def _insert(self, model, rows, report):
+        """One executemany INSERT on the table (Core, no ORM unit of work per row)."""
+        if not rows:
+            return
+        now = datetime.now(timezone.utc)
+        db.session.execute(
+            insert(model.__table__),
+            [dict(r, created_at=now, updated_at=now) for _, r in rows])
+        report['inserted'] += len(rows)
+
+    # -------------------------
+    # Entities
+    # -------------------------
+    def _import_amenities(self, chunk, report):
+        valid = []
+        for number, row in chunk:
+            try:
+                name = _text(row, 'name', 50)
+                description = _text(row, 'description', 255, required=False)
+                self._claim(('amenity-name', name), f"Duplicate amenity name in import: {name}")
+                valid.append((number, {'id': self._new_id(row, 'amenity'), 'name': name,
+                                       'description': description}))
+            except ValueError as e:
+                self._reject(report, number, e)
+
+        taken_names = _existing(Amenity.name, [r['name'] for _, r in valid])
+        rows = []
+        for number, r in self._drop_taken_ids(Amenity, valid, report):
+            if r['name'] in taken_names:
+                self._reject(report, number, "Amenity with this name already exists")
+            else:
+                rows.append((number, r))
+        self._insert(Amenity, rows, report)
+        unit_of_work.commit()
+
+    def _import_places(self, chunk, report):
+        # Score of a place without reviews
+        rank_score = ranking.rank_score(0, 0, None, None, ranking.settings())
+        valid = []
+        for number, row in chunk:
+            try:
+                place = {
+                    'title': _text(row, 'title', 100),
+                    'description': _text(row, 'description', 500, required=False) or "",
+                    'price': _number(row, 'price'),
+                    'latitude': _number(row, 'latitude'),
+                    'longitude': _number(row, 'longitude'),
+                    'owner_id': row.get('owner_id'),
+                    'image_url': _text(row, 'image_url', 500, required=False),
+                }
+                if place['price'] < 0:
+                    raise ValueError("Price must be greater than or equal to 0")
+                if not (-90 <= place['latitude'] <= 90):
+                    raise ValueError("Latitude must be between -90 and 90")
+                if not (-180 <= place['longitude'] <= 180):
+                    raise ValueError("Longitude must be between -180 and 180")
+                if not isinstance(place['owner_id'], str):
+                    raise ValueError("Missing required field: owner_id")
+                amenities = row.get('amenities') or []
+                if not isinstance(amenities, list) or not all(isinstance(a, str) for a in amenities):
+                    raise ValueError("amenities must be a list of amenity ids")
+                place['id'] = self._new_id(row, 'place')
+                place['geohash'] = geo.encode(place['latitude'], place['longitude'])
+                place['rank_score'] = rank_score
+                valid.append((number, place, set(amenities)))
+            except ValueError as e:
+                self._reject(report, number, e)
+
+        owners = _existing(User.id, [p['owner_id'] for _, p, _ in valid])
+        amenity_ids = _existing(Amenity.id, [a for _, _, ams in valid for a in ams])
+        amenities_by_place = {p['id']: ams for _, p, ams in valid}
+        rows = []
+        for number, p in self._drop_taken_ids(Place, [(n, p) for n, p, _ in valid], report):
+            missing = amenities_by_place[p['id']] - amenity_ids
+            if p['owner_id'] not in owners:
+                self._reject(report, number, "Owner not found")
+            elif missing:
+                self._reject(report, number, f"Amenity not found: {sorted(missing)[0]}")
+            else:
+                rows.append((number, p))
+
+        self._insert(Place, rows, report)
+        price_histogram.add_prices([p['price'] for _, p in rows])
+        links = [{'place_id': p['id'], 'amenity_id': a}
+                 for _, p in rows for a in amenities_by_place[p['id']]]
+        if links:
+            db.session.execute(insert(place_amenity), links)
+        get_search_index().reindex([p['id'] for _, p in rows])
+        index = get_amenity_index()
+        for _, p in rows:
+            index.set_place(p['id'], amenities_by_place[p['id']])
+        unit_of_work.commit()
+
+    def _import_reviews(self, chunk, report):
+        valid = []
+        for number, row in chunk:
+            try:
+                rating = row.get('rating')
+                if isinstance(rating, bool) or not isinstance(rating, int) or not (1 <= rating <= 5):
+                    raise ValueError("Rating must be between 1 and 5")
+                review = {
+                    'text': _text(row, 'text', 1000),
+                    'rating': rating,
+                    'user_id': row.get('user_id'),
+                    'place_id': row.get('place_id'),
+                }
+                if not isinstance(review['user_id'], str):
+                    raise ValueError("Missing required field: user_id")
+                if not isinstance(review['place_id'], str):
+                    raise ValueError("Missing required field: place_id")
+                self._claim(('review', review['user_id'], review['place_id']),
+                            "You have already reviewed this place")
+                review['id'] = self._new_id(row, 'review')
+                valid.append((number, review))
+            except ValueError as e:
+                self._reject(report, number, e)
+
+        users = _existing(User.id, [r['user_id'] for _, r in valid])
+        owners = {}
+        for batch in _batches({r['place_id'] for _, r in valid}):
+            owners.update(db.session.execute(
+                select(Place.id, Place.owner_id).where(Place.id.in_(batch))).all())
+        reviewed = _existing_reviews({(r['user_id'], r['place_id']) for _, r in valid})
+
+        rows = []
+        for number, r in self._drop_taken_ids(Review, valid, report):
+            if r['user_id'] not in users:
+                self._reject(report, number, "User not found")
+            elif r['place_id'] not in owners:
+                self._reject(report, number, "Place not found")
+            elif owners[r['place_id']] == r['user_id']:
+                self._reject(report, number, "You cannot review your own place")
+            elif (r['user_id'], r['place_id']) in reviewed:
+                self._reject(report, number, "You have already reviewed this place")
+            else:
+                rows.append((number, r))
+
+        self._insert(Review, rows, report)
+        self._add_to_place_aggregates([r for _, r in rows])
+        # The places' documents include their review text
+        get_search_index().reindex({r['place_id'] for _, r in rows})
+        unit_of_work.commit()
+
+    def _add_to_place_aggregates(self, reviews):
+        """
+        Add the new reviews to the places' counters with one executemany
+        UPDATE, then refresh the rank scores of those places.
+        """
+        deltas = {}
+        for r in reviews:
+            d = deltas.setdefault(r['place_id'], {
+                'pid': r['place_id'], 'd_count': 0, 'd_sum': 0,
+                'd_1': 0, 'd_2': 0, 'd_3': 0, 'd_4': 0, 'd_5': 0})
+            d['d_count'] += 1
+            d['d_sum'] += r['rating']
+            d[f"d_{r['rating']}"] += 1
+        if not deltas:
+            return
+        # The new reviews are the newest of their places
+        now = datetime.now(timezone.utc)
+        for d in deltas.values():
+            d['now'] = now
+        table = Place.__table__
+        c = table.c
+        # The right-hand sides all read the row's values from before the UPDATE
+        db.session.execute(
+            table.update()
+            .where(c.id == bindparam('pid'))
+            .values(
+                review_count=c.review_count + bindparam('d_count'),
+                rating_sum=c.rating_sum + bindparam('d_sum'),
+                average_rating=(c.rating_sum + bindparam('d_sum')) * 1.0
+                / (c.review_count + bindparam('d_count')),
+                last_review_at=bindparam('now'),
+                **{f'rating_{i}': c[f'rating_{i}'] + bindparam(f'd_{i}') for i in range(1, 6)}),
+            list(deltas.values()))
+        cache.invalidate(Place, *deltas)
+        ranking.recompute(list(deltas), now)
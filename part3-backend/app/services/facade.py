@@ -7,7 +7,17 @@ from app.models.place_image import PlaceImage
 from app.models.review import Review
 from app.persistence.repository import SQLAlchemyRepository
 from app.persistence.user_repository import UserRepository
-from app.extensions import db
+from app.persistence.place_repository import PlaceRepository
+from app.persistence.review_repository import ReviewRepository
+from app.persistence import ranking, unit_of_work
+from app.persistence.routing import replica_reads
+from app.persistence.amenity_index import get_amenity_index, popcount
+from app.persistence.search_index import get_search_index, parse_query
+from app.services.bulk_import import BulkImporter, DEFAULT_CHUNK_SIZE
+from datetime import datetime, timezone
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db, hasher
+from app.utils import geo
 
 
 class HBnBFacade:
@@ -19,8 +29,8 @@ class HBnBFacade:
     def __init__(self):
         # NEW: specific repo for User
         self.user_repo    = UserRepository()
-        self.place_repo   = SQLAlchemyRepository(Place)
-        self.review_repo  = SQLAlchemyRepository(Review)
+        self.place_repo   = PlaceRepository()
+        self.review_repo  = ReviewRepository()
         self.amenity_repo = SQLAlchemyRepository(Amenity)
         '''
         # -------------------------------------------------------
@@ -37,6 +47,19 @@ class HBnBFacade:
         self.user_repo.add(admin)
         '''
     
+    # -------------------------
+    # TRANSACTIONS
+    # -------------------------
+    def transaction(self):
+        """
+        Group several facade calls into one commit:
+            with facade.transaction():
+                place = facade.create_place(...)
+                facade.add_place_image(place.id, url)
+        Rolls everything back if the block raises.
+        """
+        return unit_of_work.transaction()
+
     # -------------------------
     # USERS CRUD
     # -------------------------
@@ -56,6 +79,7 @@ class HBnBFacade:
         return user
 
     # READ (single user)
+    @replica_reads
     def get_user(self, user_id):
         """
         Retrieve a user by ID.
@@ -67,13 +91,53 @@ class HBnBFacade:
         """ Retrieve a user by email. """
         return self.user_repo.get_user_by_email(email)  # NEW: uses UserRepository method
 
+    # AUTHENTICATION
+    def authenticate(self, email, password):
+        """
+        Return the user if email and password match, else None.
+        A hash made with an older bcrypt cost is replaced on success.
+        Exactly one bcrypt check runs whether the email exists or not,
+        so a miss is neither faster nor cheaper than a wrong password.
+        """
+        user = self.get_user_by_email(email)
+        if user is None:
+            hasher.check(hasher.dummy_hash(), password)
+            return None
+        if not user.verify_password(password):
+            return None
+        if user.password_needs_rehash():
+            user.hash_password(password)
+            unit_of_work.commit()
+        return user
+
     # READ (all users)
+    @replica_reads
     def get_all_users(self):
         """
         Retrieve all users.
         """
         return self.user_repo.get_all()
 
+    # READ (one page of users)
+    @replica_reads
+    def get_users_page(self, **page_args):
+        """
+        Retrieve one keyset page of users as (users, next_cursor).
+        """
+        return self.user_repo.query_page(**page_args)
+
+    # READ (batch)
+    @replica_reads
+    def get_users_by_ids(self, user_ids):
+        """(users in the order of the ids, ids not found), in one query"""
+        return self.user_repo.get_many(user_ids)
+
+    # VERSION (validator for conditional GETs)
+    @replica_reads
+    def get_users_version(self, filters=None, ranges=None):
+        """(count, newest updated_at) of the users matching the filters"""
+        return self.user_repo.get_version(filters, ranges)
+
     # UPDATE
     def update_user(self, user_id, user_data):
         """
@@ -119,12 +183,27 @@ class HBnBFacade:
         self.amenity_repo.add(amenity)
         return amenity
 
+    @replica_reads
     def get_amenity(self, amenity_id):
         return self.amenity_repo.get(amenity_id)
 
+    @replica_reads
     def get_all_amenities(self):
         return self.amenity_repo.get_all()
 
+    @replica_reads
+    def get_amenities_by_ids(self, amenity_ids):
+        """(amenities in the order of the ids, ids not found), in one query"""
+        return self.amenity_repo.get_many(amenity_ids)
+
+    @replica_reads
+    def get_amenities_page(self, **page_args):
+        return self.amenity_repo.query_page(**page_args)
+
+    @replica_reads
+    def get_amenities_version(self, filters=None, ranges=None):
+        return self.amenity_repo.get_version(filters, ranges)
+
     def update_amenity(self, amenity_id, amenity_data):
         amenity = self.get_amenity(amenity_id)
         if not amenity:
@@ -143,7 +222,65 @@ class HBnBFacade:
 
     # DELETE amenity
     def delete_amenity(self, amenity_id):
+        get_amenity_index().remove_amenity(amenity_id)
         return self.amenity_repo.delete(amenity_id)
+
+    def _get_amenities(self, amenity_ids):
+        """The amenities with these ids, in one query; raises ValueError if one is missing"""
+        amenities, missing = self.amenity_repo.get_many(amenity_ids)
+        if missing:
+            raise ValueError(f"Amenity not found: {missing[0]}")
+        return amenities
+
+    # -------------------------
+    # AMENITY FILTERS AND FACETS
+    # -------------------------
+    def _amenity_ids(self, amenities):
+        """Ids of the amenities given by id or by name (case-insensitive)"""
+        by_key = {}
+        for amenity in self.amenity_repo.get_all():
+            by_key[amenity.id] = amenity.id
+            by_key.setdefault(amenity.name.lower(), amenity.id)
+        amenity_ids = []
+        for key in amenities:
+            amenity_id = by_key.get(key) or by_key.get(key.lower())
+            if amenity_id is None:
+                raise ValueError(f"Amenity not found: {key}")
+            amenity_ids.append(amenity_id)
+        return amenity_ids
+
+    @replica_reads
+    def place_amenity_conditions(self, amenities, match_all=True):
+        """
+        SQL conditions keeping the places that have all (or any) of the
+        amenities, for get_places_page / get_places_version. The matches
+        come from the bitmap index (app/persistence/amenity_index.py): a
+        small set becomes an id IN (...) list, a large one is checked with
+        EXISTS subqueries on place_amenity instead.
+        """
+        amenity_ids = self._amenity_ids(amenities)
+        index = get_amenity_index()
+        matched = index.match(amenity_ids, match_all)
+        if popcount(matched) > index.max_ids:
+            return self.place_repo.has_amenities(amenity_ids, match_all)
+        return [Place.id.in_(index.place_ids(matched))]
+
+    @replica_reads
+    def get_place_facets(self, amenities=(), match_all=True, filters=None, ranges=None):
+        """
+        (number of matching places, [{'id', 'name', 'count'}, ...]): for
+        every amenity, how many of the places matching the amenity filter
+        and the listing filters also have it. Most common first.
+        """
+        index = get_amenity_index()
+        matched = index.match(self._amenity_ids(amenities), match_all)
+        if filters or ranges:
+            matched &= index.bitmap_of(self.place_repo.get_ids(filters, ranges))
+        counts = index.facets(matched)
+        facets = [{'id': a.id, 'name': a.name, 'count': counts.get(a.id, 0)}
+                  for a in self.amenity_repo.get_all()]
+        facets.sort(key=lambda f: (-f['count'], f['name']))
+        return popcount(matched), facets
     
     # ==========================================
     # PLACES CRUD
@@ -175,12 +312,7 @@ class HBnBFacade:
         # Amenities check (if exists)
         amenities = []
         if 'amenities' in place_data:
-            for amenity_id in place_data['amenities']:
-                # InMemoryRepository.get() only accepts obj_id since each entity uses its own repository instance.
-                amenity = self.amenity_repo.get(amenity_id)
-                if amenity is None:
-                    raise ValueError(f"Amenity not found: {amenity_id}")
-                amenities.append(amenity)
+            amenities = self._get_amenities(place_data['amenities'])
 
         # Create place
         place = Place(
@@ -192,43 +324,169 @@ class HBnBFacade:
             owner_id=place_data['owner_id']
         )
 
+        place.refresh_geohash()
+        # No reviews yet: the prior mean
+        ranking.refresh(place)
+
         # Add amenities
         place.amenities = amenities
         # Save place with our method add
         self.place_repo.add(place)
+        get_search_index().reindex([place.id])
+        get_amenity_index().set_place(place.id, [a.id for a in amenities])
+        unit_of_work.commit()
         return place
 
+    @replica_reads
     def get_place(self, place_id):
         # Get place
         place = self.place_repo.get(place_id)
         if place is None:
             return None
-        # Get owner
-        owner = self.user_repo.get(place.owner_id)
-        place.owner = owner
-        # Get amenities
-        amenities = []
-        for amenity in place.amenities:
-            if isinstance(amenity, str):
-                amenity_obj = self.amenity_repo.get(amenity)
-                if amenity_obj:
-                    amenities.append(amenity_obj)
-            else:
-                amenities.append(amenity)
-
-        place.amenities = amenities
+        # Load the owner through the (cached) repository: place.owner then
+        # resolves from the session without another query.
+        # Reassigning place.owner / place.amenities here would mark the
+        # place as modified and invalidate its cache entry on every read.
+        self.user_repo.get(place.owner_id)
         return place
 
+    @replica_reads
     def get_all_places(self):
-        places = self.place_repo.get_all()
-        result = []
-        for place in places:
-            owner = self.user_repo.get(place.owner_id)
-            place.owner = owner
-            result.append(place)
-        return result
+        # Owners and amenities are eager-loaded by the repository,
+        # so serializing the list does not trigger one query per place.
+        return self.place_repo.get_all_for_listing()
+
+    @replica_reads
+    def get_places_by_ids(self, place_ids):
+        """(places in the order of the ids, ids not found), owners and amenities included"""
+        return self.place_repo.get_many_for_listing(place_ids)
+
+    @replica_reads
+    def get_places_page(self, **page_args):
+        return self.place_repo.get_page_for_listing(**page_args)
+
+    @replica_reads
+    def get_places_version(self, filters=None, ranges=None, conditions=(), ranked=False):
+        # Changes with the places and with the owners/amenities they embed;
+        # ranked: also with the rank scores (sort=rank)
+        return self.place_repo.get_listing_version(filters, ranges, conditions, ranked)
+
+    @replica_reads
+    def get_place_version(self, place_id):
+        """
+        Cheap validator of the place detail view (place, owner, reviews,
+        amenities, images), or None if the place does not exist.
+        """
+        return self.place_repo.get_detail_version(place_id)
 
 
+    @staticmethod
+    def _check_circle(latitude, longitude, radius_km):
+        if not (-90 <= latitude <= 90):
+            raise ValueError("Latitude must be between -90 and 90")
+        if not (-180 <= longitude <= 180):
+            raise ValueError("Longitude must be between -180 and 180")
+        if not (0 < radius_km <= 20000):
+            raise ValueError("radius_km must be between 0 and 20000")
+
+    @staticmethod
+    def _check_bbox(min_lat, min_lon, max_lat, max_lon):
+        if not (-90 <= min_lat <= max_lat <= 90):
+            raise ValueError("Invalid bbox latitudes")
+        if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+            raise ValueError("Invalid bbox longitudes")
+
+    def _price_conditions(self, min_price, max_price):
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise ValueError("min_price cannot be greater than max_price")
+        return self.place_repo.price_between(min_price, max_price)
+
+    @replica_reads
+    def search_places_nearby(self, latitude, longitude, radius_km, limit,
+                             min_price=None, max_price=None):
+        """
+        Places within radius_km of a point, closest first, as (place, distance_km).
+        Candidates come from a geohash prefix scan; the exact distance is then
+        checked with the haversine formula.
+        """
+        self._check_circle(latitude, longitude, radius_km)
+        conditions = self._price_conditions(min_price, max_price)
+
+        boxes = geo.radius_to_boxes(latitude, longitude, radius_km)
+        candidates = self.place_repo.get_in_cells(geo.covering_prefixes(boxes), boxes,
+                                                  conditions=conditions)
+        results = []
+        for place in candidates:
+            distance = geo.haversine_km(latitude, longitude, place.latitude, place.longitude)
+            if distance <= radius_km:
+                results.append((place, distance))
+        results.sort(key=lambda item: item[1])
+        return results[:limit]
+
+    @replica_reads
+    def search_places_in_bbox(self, min_lat, min_lon, max_lat, max_lon, limit,
+                              min_price=None, max_price=None):
+        """
+        Places inside a bounding box. min_lon > max_lon means the box
+        crosses the antimeridian.
+        """
+        self._check_bbox(min_lat, min_lon, max_lat, max_lon)
+        conditions = self._price_conditions(min_price, max_price)
+
+        boxes = geo.split_antimeridian(min_lat, min_lon, max_lat, max_lon)
+        return self.place_repo.get_in_cells(geo.covering_prefixes(boxes), boxes, limit=limit,
+                                            conditions=conditions)
+
+    @replica_reads
+    def search_places_text(self, q, limit, min_price=None, max_price=None, bbox=None, near=None):
+        """
+        Places matching the words of q in their title, description or
+        reviews, best match first, as (place, relevance, distance_km).
+        Optionally restricted to a price range and to a bbox
+        (min_lat, min_lon, max_lat, max_lon) or a circle
+        near=(latitude, longitude, radius_km); distance_km is None without near.
+        """
+        terms = parse_query(q)
+        conditions = self._price_conditions(min_price, max_price)
+        if bbox is not None:
+            self._check_bbox(*bbox)
+            conditions.append(self.place_repo.in_boxes(geo.split_antimeridian(*bbox)))
+        if near is None:
+            return [(place, relevance, None)
+                    for place, relevance in self.place_repo.search_text(terms, conditions, limit)]
+
+        latitude, longitude, radius_km = near
+        self._check_circle(latitude, longitude, radius_km)
+        conditions.append(self.place_repo.in_boxes(geo.radius_to_boxes(latitude, longitude, radius_km)))
+        # The boxes cover the circle: the corners are dropped here, so keep
+        # reading ranked matches until limit places are inside the circle
+        results, offset, batch = [], 0, limit * 2
+        while len(results) < limit:
+            page = self.place_repo.search_text(terms, conditions, batch, offset)
+            for place, relevance in page:
+                distance = geo.haversine_km(latitude, longitude, place.latitude, place.longitude)
+                if distance <= radius_km:
+                    results.append((place, relevance, distance))
+            if len(page) < batch:
+                break
+            offset += batch
+        return results[:limit]
+
+    @replica_reads
+    def get_price_histogram(self, buckets=10):
+        """Distribution of place prices in at most `buckets` equal-width buckets"""
+        return self.place_repo.get_price_histogram(buckets)
+
+    def rebuild_price_histogram(self):
+        """Recount the places per price step; returns the number of places"""
+        return self.place_repo.rebuild_price_histogram()
+
+    def rebuild_search_index(self):
+        """Index every place again; returns the number of places indexed"""
+        count = get_search_index().rebuild(commit=unit_of_work.commit)
+        unit_of_work.commit()
+        return count
+
     def update_place(self, place_id, place_data):
         # Get original place
         place = self.place_repo.get(place_id)
@@ -256,18 +514,18 @@ class HBnBFacade:
 
                 # Verify amenities  
                 if field == 'amenities':
-                    amenities_list = []
-                    for amenity_id in value:
-                        amenity = self.amenity_repo.get(amenity_id)
-                        if amenity is None:
-                            raise ValueError(f"Amenity not found: {amenity_id}")
-                        amenities_list.append(amenity)
+                    amenities_list = self._get_amenities(value)
                     place.amenities = amenities_list
+                    get_amenity_index().set_place(place.id, [a.id for a in amenities_list])
                 else:
                     setattr(place, field, value)
 
-        # Delegate validation and update to the model
-        place.update_details(place_data)
+        # Delegate validation and update to the model; the amenities
+        # relationship was set above from the ids
+        place.update_details({k: v for k, v in place_data.items() if k != 'amenities'})
+        if 'title' in place_data or 'description' in place_data:
+            get_search_index().reindex([place.id])
+            unit_of_work.commit()
         return place
 
     def add_amenity_to_place(self, place_id, amenity_id):
@@ -285,13 +543,20 @@ class HBnBFacade:
         # Append the amenity if it's not already in the list
         if amenity not in place.amenities:
             place.amenities.append(amenity)
-            db.session.commit()
+            # The listing embeds the amenities: move updated_at (ETags)
+            place.save()
+            get_amenity_index().add(place.id, amenity.id)
+            unit_of_work.commit()
 
         return place
 
     # DELETE place
     def delete_place(self, place_id):
-        return self.place_repo.delete(place_id)
+        deleted = self.place_repo.delete(place_id)
+        get_search_index().remove([place_id])
+        get_amenity_index().remove_place(place_id)
+        unit_of_work.commit()
+        return deleted
 
     # -------------------------
     # PLACE IMAGES
@@ -302,9 +567,10 @@ class HBnBFacade:
             raise ValueError("Place not found")
         img = PlaceImage(place_id=place_id, image_url=image_url)
         db.session.add(img)
-        db.session.commit()
+        unit_of_work.commit()
         return img
 
+    @replica_reads
     def get_place_images(self, place_id):
         return PlaceImage.query.filter_by(place_id=place_id).all()
 
@@ -313,7 +579,7 @@ class HBnBFacade:
         if img is None:
             return False
         db.session.delete(img)
-        db.session.commit()
+        unit_of_work.commit()
         return True
 
     # -------------------------
@@ -326,7 +592,8 @@ class HBnBFacade:
                 raise ValueError(f"Missing required field: {f}")
 
         # Rating requirements
-        if not (1 <= review_data['rating'] <= 5):
+        if (isinstance(review_data['rating'], bool) or not isinstance(review_data['rating'], int)
+                or not (1 <= review_data['rating'] <= 5)):
             raise ValueError("Rating must be between 1 and 5")
 
         # User check
@@ -346,37 +613,165 @@ class HBnBFacade:
             place_id=review_data['place_id']
         )
 
-        self.review_repo.add(review)
+        # Aggregates and rank score are committed together with the review
+        now = datetime.now(timezone.utc)
+        place.apply_review_rating(added=review.rating)
+        place.last_review_at = now
+        ranking.refresh(place, now)
+        try:
+            self.review_repo.add(review)
+        except IntegrityError:
+            # uq_reviews_user_place: a concurrent request created the review first
+            db.session.rollback()
+            raise ValueError("You have already reviewed this place")
+        get_search_index().reindex([review.place_id])
+        unit_of_work.commit()
         return review
 
+    def has_reviewed_place(self, user_id, place_id):
+        """True if the user already wrote a review for the place"""
+        return self.review_repo.exists_for(user_id, place_id)
+
+    @replica_reads
     def get_review(self, review_id):
         review = self.review_repo.get(review_id)
         if review is None:
             return None
         return review
 
+    @replica_reads
     def get_all_reviews(self):
         return self.review_repo.get_all()
 
+    @replica_reads
+    def get_reviews_by_ids(self, review_ids):
+        """(reviews in the order of the ids, ids not found), in one query"""
+        return self.review_repo.get_many(review_ids)
+
+    @replica_reads
+    def get_reviews_page(self, **page_args):
+        return self.review_repo.query_page(**page_args)
+
+    @replica_reads
+    def get_reviews_version(self, filters=None, ranges=None):
+        return self.review_repo.get_version(filters, ranges)
+
+    def recompute_rank_scores(self):
+        """
+        Recompute every place's rank score. The recency part decays with
+        time, so run it periodically (flask hbnb recompute-rank).
+        """
+        return self.place_repo.recompute_rank_scores()
+
+    def rebuild_review_aggregates(self):
+        """
+        Recompute every place's review aggregates from the reviews table.
+        Repairs counters after manual SQL edits or imports.
+        """
+        return self.place_repo.rebuild_review_aggregates()
+
+    @replica_reads
     def get_reviews_by_place(self, place_id):
         place = self.place_repo.get(place_id)
         if place is None:
             return None
-        return [r for r in self.review_repo.get_all() if r.place_id == place_id]
+        return self.review_repo.get_by_place(place_id)
+
+    @replica_reads
+    def get_reviews_page_by_place(self, place_id, **page_args):
+        """
+        One keyset page of a place's reviews as (reviews, next_cursor).
+        Returns None if the place does not exist.
+        """
+        place = self.place_repo.get(place_id)
+        if place is None:
+            return None
+        return self.review_repo.get_page_by_place(place_id, **page_args)
+
+    @replica_reads
+    def get_place_reviews_version(self, place_id):
+        return self.review_repo.get_place_version(place_id)
 
     def update_review(self, review_id, review_data):
         review = self.review_repo.get(review_id)
         if review is None:
             return None
 
+        # Validate before touching the place aggregates, so a rejected
+        # update leaves nothing pending in the session
+        review.validate_update(review_data)
+        if "rating" in review_data and review_data["rating"] != review.rating:
+            place = self.place_repo.get(review.place_id)
+            place.apply_review_rating(added=review_data["rating"], removed=review.rating)
+            ranking.refresh(place)
+
         # Delegate validation and update to the model
         review.update_review(review_data)
+        if 'text' in review_data:
+            get_search_index().reindex([review.place_id])
+            unit_of_work.commit()
         return review
 
     def delete_review(self, review_id):
         review = self.review_repo.get(review_id)
         if review is None:
             return False
+        # Aggregates and rank score are committed together with the deletion
+        place = self.place_repo.get(review.place_id)
+        if place is not None:
+            place.apply_review_rating(removed=review.rating)
+        place_id = review.place_id
         self.review_repo.delete(review_id)
+        if place is not None:
+            place.last_review_at = self.review_repo.get_newest_date(place_id)
+            ranking.refresh(place)
+        get_search_index().reindex([place_id])
+        unit_of_work.commit()
         # Return True to confirm the deletion was successful
         return True
+
+    # -------------------------
+    # BULK IMPORT
+    # -------------------------
+    def bulk_import(self, entity, lines, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Import NDJSON lines of 'amenities', 'places' or 'reviews'.
+        Returns a report with the inserted/failed counts and per-line errors.
+        Raises ValueError for an unknown entity.
+        Each chunk is committed on its own, even inside a request.
+        """
+        with unit_of_work.suspended():
+            return BulkImporter(chunk_size).run(entity, lines)
+
+    # -------------------------
+    # EXPORT
+    # -------------------------
+    EXPORT_ENTITIES = ('users', 'amenities', 'places', 'reviews')
+
+    def export_chunks(self, entity, chunk_size=1000):
+        """
+        Iterator over every row of an entity as lists of plain dicts.
+        Places carry their amenity ids, in the format accepted by bulk_import.
+        Raises ValueError for an unknown entity (before any row is read).
+        """
+        if entity not in self.EXPORT_ENTITIES:
+            raise ValueError(f"Unknown entity: {entity}")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer")
+        repo = {
+            'users': self.user_repo,
+            'amenities': self.amenity_repo,
+            'places': self.place_repo,
+            'reviews': self.review_repo,
+        }[entity]
+        chunks = repo.iter_chunks(chunk_size, exclude=repo.model.EXPORT_EXCLUDE)
+        if entity == 'places':
+            chunks = self._with_amenity_ids(chunks)
+        return chunks
+
+    def _with_amenity_ids(self, chunks):
+        for chunk in chunks:
+            amenity_ids = self.place_repo.get_amenity_ids([row['id'] for row in chunk])
+            for row in chunk:
+                row['amenities'] = amenity_ids[row['id']]
+            yield chunk
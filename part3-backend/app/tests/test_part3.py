@@ -5,12 +5,14 @@ Tests cover Tasks 0-10: App Factory, Auth, JWT, RBAC, SQLAlchemy, Relationships,
 """
 import pytest
 import json
+import gzip
 from app import create_app
 from app.extensions import db as _db
 from app.models.user import User
 from app.models.place import Place
 from app.models.review import Review
 from app.models.amenity import Amenity
+from app.persistence.cache import clear as clear_cache
 import config as app_config
 
 
@@ -673,3 +675,2097 @@ class TestERDiagram:
                 assert 'AMENITY' in content.upper() or 'Amenity' in content
                 return
         pytest.fail("No ERD file found.")
+
+
+# ================================================================
+# PERF 1 — Eager-loaded place listing
+# ================================================================
+
+class StatementCounter:
+    """Counts SQL statements sent to the engine inside a `with` block."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        from sqlalchemy import event
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def _bulk_places(count, prefix):
+    """Insert `count` places, each with its own owner, and return their ids."""
+    from sqlalchemy import insert
+    from app.models.amenity import Amenity as _Amenity
+    from app.models.place import place_amenity
+    amenity = _Amenity(name=f'{prefix}-amenity')
+    _db.session.add(amenity)
+    _db.session.commit()
+    users = [{'id': f'{prefix}-u-{i}', 'first_name': 'Bulk', 'last_name': str(i),
+              'email': f'{prefix}-{i}@test.com', 'password': 'x'} for i in range(count)]
+    places = [{'id': f'{prefix}-p-{i}', 'title': f'Bulk {i}', 'price': 10.0 + i,
+               'latitude': 0.0, 'longitude': 0.0, 'owner_id': f'{prefix}-u-{i}'}
+              for i in range(count)]
+    _db.session.execute(insert(User), users)
+    _db.session.execute(insert(Place), places)
+    _db.session.execute(insert(place_amenity),
+                        [{'place_id': p['id'], 'amenity_id': amenity.id} for p in places])
+    _db.session.commit()
+    return [p['id'] for p in places], amenity.id
+
+
+def _delete_bulk_places(prefix, amenity_id):
+    from app.models.place import place_amenity
+    _db.session.execute(place_amenity.delete().where(place_amenity.c.amenity_id == amenity_id))
+    _db.session.execute(Place.__table__.delete().where(Place.id.like(f'{prefix}-p-%')))
+    _db.session.execute(User.__table__.delete().where(User.id.like(f'{prefix}-u-%')))
+    _db.session.execute(Amenity.__table__.delete().where(Amenity.id == amenity_id))
+    _db.session.commit()
+    _db.session.expunge_all()
+
+
+class TestPlaceListingQueries:
+
+    def _count_listing_statements(self, app):
+        from app.services import facade
+        _db.session.expunge_all()
+        with StatementCounter(_db.engine) as counter:
+            for p in facade.get_all_places():
+                _ = p.owner.first_name if p.owner else None
+                _ = [a.name for a in p.amenities]
+        return counter.count
+
+    def test_listing_statement_count_is_constant(self, app):
+        """Listing 10 or 10,000 places issues the same number of statements."""
+        small_ids, small_amenity = _bulk_places(10, 'list10')
+        small = self._count_listing_statements(app)
+        big_ids, big_amenity = _bulk_places(10000, 'list10k')
+        try:
+            big = self._count_listing_statements(app)
+        finally:
+            _delete_bulk_places('list10k', big_amenity)
+            _delete_bulk_places('list10', small_amenity)
+        assert small == big
+        assert big <= 3
+
+    def test_listing_serializes_owner_and_amenities(self, client, app):
+        """GET /api/v1/places/ still embeds owner and amenities."""
+        ids, amenity_id = _bulk_places(3, 'listshape')
+        try:
+            response = client.get(f'/api/v1/places/?owner_id={ids[0].replace("-p-", "-u-")}')
+            places = {p['id']: p for p in json.loads(response.data)}
+        finally:
+            _delete_bulk_places('listshape', amenity_id)
+        assert places[ids[0]]['owner']['first_name'] == 'Bulk'
+        assert places[ids[0]]['amenities'][0]['name'] == 'listshape-amenity'
+
+
+# ================================================================
+# PERF 2 — Keyset pagination, sorting and filters
+# ================================================================
+
+class TestKeysetPagination:
+
+    def _walk(self, client, url):
+        """Follow X-Next-Cursor until the last page; return all items."""
+        items, pages = [], 0
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            items.extend(json.loads(response.data))
+            pages += 1
+            cursor = response.headers.get('X-Next-Cursor')
+            if cursor:
+                assert 'rel="next"' in response.headers['Link']
+                url = response.headers['Link'].split('>')[0].lstrip('<')
+            else:
+                url = None
+        return items, pages
+
+    def test_pages_cover_every_row_once(self, client, app):
+        ids, amenity_id = _bulk_places(25, 'page')
+        try:
+            items, pages = self._walk(client, '/api/v1/places/?limit=10&min_price=10&max_price=34'
+                                              '&sort=price')
+        finally:
+            _delete_bulk_places('page', amenity_id)
+        bulk = [p for p in items if p['id'].startswith('page-')]
+        assert sorted(p['id'] for p in bulk) == sorted(ids)
+        assert len(items) == len({p['id'] for p in items})
+        assert pages >= 3
+
+    def test_sort_descending_by_price(self, client, app):
+        ids, amenity_id = _bulk_places(5, 'sortdesc')
+        try:
+            response = client.get('/api/v1/places/?sort=-price&limit=3&min_price=10&max_price=14')
+            prices = [p['price'] for p in json.loads(response.data)]
+        finally:
+            _delete_bulk_places('sortdesc', amenity_id)
+        assert prices == sorted(prices, reverse=True)
+        assert len(prices) == 3
+
+    def test_equality_filter(self, client, app):
+        ids, amenity_id = _bulk_places(4, 'eqfilter')
+        try:
+            response = client.get('/api/v1/places/?owner_id=eqfilter-u-2')
+            data = json.loads(response.data)
+        finally:
+            _delete_bulk_places('eqfilter', amenity_id)
+        assert [p['id'] for p in data] == ['eqfilter-p-2']
+
+    def test_last_page_has_no_link(self, client):
+        response = client.get('/api/v1/amenities/?limit=1000')
+        assert response.status_code == 200
+        assert 'Link' not in response.headers
+
+    def test_invalid_parameters_return_400(self, client):
+        assert client.get('/api/v1/users/?limit=0').status_code == 400
+        assert client.get('/api/v1/users/?sort=password').status_code == 400
+        assert client.get('/api/v1/reviews/?cursor=not-a-cursor').status_code == 400
+        assert client.get('/api/v1/places/?min_price=cheap').status_code == 400
+
+
+# ================================================================
+# PERF 3 — Geohash radius and bounding-box search
+# ================================================================
+
+class TestGeoSearch:
+
+    def _create(self, client, token, title, lat, lon):
+        r = client.post('/api/v1/places/',
+            data=json.dumps({'title': title, 'price': 80.0, 'latitude': lat, 'longitude': lon}),
+            content_type='application/json',
+            headers={'Authorization': f'Bearer {token}'})
+        assert r.status_code == 201
+        return json.loads(r.data)['id']
+
+    def test_geohash_maintained_on_create_and_update(self, client, user_token):
+        place_id = self._create(client, user_token, 'Geo Moving', 40.4168, -3.7038)
+        place = _db.session.get(Place, place_id)
+        assert place.geohash.startswith('ezjmg')
+        client.put(f'/api/v1/places/{place_id}',
+            data=json.dumps({'latitude': 41.3874, 'longitude': 2.1686}),
+            content_type='application/json',
+            headers={'Authorization': f'Bearer {user_token}'})
+        _db.session.refresh(place)
+        assert place.geohash.startswith('sp3e')
+
+    def test_radius_search_filters_by_exact_distance(self, client, user_token):
+        near = self._create(client, user_token, 'Geo Louvre', 48.8606, 2.3376)
+        edge = self._create(client, user_token, 'Geo Versailles', 48.8049, 2.1204)
+        far = self._create(client, user_token, 'Geo Lyon', 45.7640, 4.8357)
+        r = client.get('/api/v1/places/search?lat=48.8566&lon=2.3522&radius_km=5')
+        assert r.status_code == 200
+        data = json.loads(r.data)
+        ids = [p['id'] for p in data]
+        assert near in ids
+        assert edge not in ids and far not in ids
+        assert all(p['distance_km'] <= 5 for p in data)
+
+        r = client.get('/api/v1/places/search?lat=48.8566&lon=2.3522&radius_km=25')
+        data = json.loads(r.data)
+        ids = [p['id'] for p in data]
+        assert ids.index(near) < ids.index(edge)
+        assert far not in ids
+
+    def test_bbox_search_across_antimeridian(self, client, user_token):
+        fiji = self._create(client, user_token, 'Geo Fiji', -17.7, 179.9)
+        samoa = self._create(client, user_token, 'Geo Samoa', -13.8, -171.7)
+        r = client.get('/api/v1/places/search?bbox=179,-20,-170,-10')
+        ids = [p['id'] for p in json.loads(r.data)]
+        assert fiji in ids and samoa in ids
+        r = client.get('/api/v1/places/search?bbox=179,-20,180,-10')
+        ids = [p['id'] for p in json.loads(r.data)]
+        assert fiji in ids and samoa not in ids
+
+    def test_invalid_search_returns_400(self, client):
+        assert client.get('/api/v1/places/search?lat=10').status_code == 400
+        assert client.get('/api/v1/places/search?lat=95&lon=0&radius_km=1').status_code == 400
+        assert client.get('/api/v1/places/search?bbox=1,2,3').status_code == 400
+
+
+# ================================================================
+# PERF 4 — Denormalized review aggregates on Place
+# ================================================================
+
+class TestReviewAggregates:
+
+    def _token_for(self, client, admin_token, email):
+        client.post('/api/v1/users/',
+            data=json.dumps({'first_name': 'Agg', 'last_name': 'Reviewer',
+                             'email': email, 'password': 'password123'}),
+            content_type='application/json',
+            headers={'Authorization': f'Bearer {admin_token}'})
+        r = client.post('/api/v1/auth/login',
+            data=json.dumps({'email': email, 'password': 'password123'}),
+            content_type='application/json')
+        return json.loads(r.data)['access_token']
+
+    def _review(self, client, token, place_id, rating):
+        r = client.post('/api/v1/reviews/',
+            data=json.dumps({'text': 'Nice', 'rating': rating, 'place_id': place_id}),
+            content_type='application/json',
+            headers={'Authorization': f'Bearer {token}'})
+        assert r.status_code == 201
+        return json.loads(r.data)['id']
+
+    def test_aggregates_follow_review_writes(self, client, admin_token, user_token):
+        r = client.post('/api/v1/places/',
+            data=json.dumps({'title': 'Agg Place', 'price': 90.0, 'latitude': 3.0, 'longitude': 3.0}),
+            content_type='application/json',
+            headers={'Authorization': f'Bearer {admin_token}'})
+        place_id = json.loads(r.data)['id']
+        other = self._token_for(client, admin_token, 'agg2@test.com')
+
+        first = self._review(client, user_token, place_id, 5)
+        second = self._review(client, other, place_id, 2)
+        data = json.loads(client.get(f'/api/v1/places/{place_id}').data)
+        assert data['review_count'] == 2
+        assert data['average_rating'] == 3.5
+        assert data['rating_histogram'] == {'1': 0, '2': 1, '3': 0, '4': 0, '5': 1}
+
+        client.put(f'/api/v1/reviews/{second}',
+            data=json.dumps({'rating': 4}),
+            content_type='application/json',
+            headers={'Authorization': f'Bearer {other}'})
+        client.delete(f'/api/v1/reviews/{first}',
+            headers={'Authorization': f'Bearer {user_token}'})
+        data = json.loads(client.get(f'/api/v1/places/{place_id}').data)
+        assert data['review_count'] == 1
+        assert data['average_rating'] == 4.0
+        assert data['rating_histogram']['4'] == 1
+        assert data['rating_histogram']['5'] == 0
+
+        # A rejected update must not leave the aggregates half-applied
+        r = client.put(f'/api/v1/reviews/{second}',
+            data=json.dumps({'rating': 1, 'text': ''}),
+            content_type='application/json',
+            headers={'Authorization': f'Bearer {other}'})
+        assert r.status_code == 400
+        data = json.loads(client.get(f'/api/v1/places/{place_id}').data)
+        assert data['average_rating'] == 4.0
+
+    def test_clients_cannot_write_aggregates(self, client, user_token):
+        r = client.post('/api/v1/places/',
+            data=json.dumps({'title': 'Agg Readonly', 'price': 90.0, 'latitude': 3.0, 'longitude': 3.0}),
+            content_type='application/json',
+            headers={'Authorization': f'Bearer {user_token}'})
+        place_id = json.loads(r.data)['id']
+        client.put(f'/api/v1/places/{place_id}',
+            data=json.dumps({'review_count': 99, 'average_rating': 5.0}),
+            content_type='application/json',
+            headers={'Authorization': f'Bearer {user_token}'})
+        data = json.loads(client.get(f'/api/v1/places/{place_id}').data)
+        assert data['review_count'] == 0
+
+    def test_rebuild_command_repairs_counters(self, app):
+        runner = app.test_cli_runner()
+        owner = User.query.filter_by(email='admin@test.com').first()
+        extra = Place(title='Aggregates', price=10, latitude=0, longitude=0, owner_id=owner.id)
+        _db.session.add(extra)
+        _db.session.commit()
+        extra_id = extra.id
+        _db.session.execute(Place.__table__.update().values(review_count=42, average_rating=1.0))
+        _db.session.commit()
+        updated_at = dict(_db.session.query(Place.id, Place.updated_at).all())
+        result = runner.invoke(args=['hbnb', 'rebuild-aggregates'])
+        assert 'Rebuilt review aggregates' in result.output
+        _db.session.expire_all()
+        # Derived data: no place is marked as modified
+        assert dict(_db.session.query(Place.id, Place.updated_at).all()) == updated_at
+        for place in Place.query.all():
+            assert place.review_count == len(place.reviews)
+            if place.reviews:
+                expected = sum(r.rating for r in place.reviews) / len(place.reviews)
+                assert place.average_rating == expected
+        _db.session.delete(_db.session.get(Place, extra_id))
+        _db.session.commit()
+
+    def test_sort_by_rating(self, client):
+        r = client.get('/api/v1/places/?sort=-rating')
+        assert r.status_code == 200
+        ratings = [p['average_rating'] for p in json.loads(r.data)]
+        assert ratings == sorted(ratings, reverse=True)
+
+
+# ================================================================
+# PERF 5 — Indexed reviews-by-place query
+# ================================================================
+
+class TestReviewsByPlace:
+
+    def test_review_foreign_keys_are_indexed(self):
+        indexed = {tuple(c.name for c in ix.columns) for ix in Review.__table__.indexes}
+        assert ('place_id',) in indexed
+        assert ('user_id',) in indexed
+
+    def test_reviews_by_place_uses_where_clause(self, app):
+        from app.services import facade
+        place = Place.query.filter(Place.review_count > 0).first()
+        with StatementCounter(_db.engine) as counter:
+            reviews = facade.get_reviews_by_place(place.id)
+        assert counter.count <= 2
+        assert reviews and all(r.place_id == place.id for r in reviews)
+
+    def test_place_reviews_are_paginated(self, client, app):
+        place = Place.query.filter(Place.review_count > 0).first()
+        r = client.get(f'/api/v1/places/{place.id}/reviews?limit=1')
+        assert r.status_code == 200
+        assert len(json.loads(r.data)) == 1
+        assert ('X-Next-Cursor' in r.headers) == (place.review_count > 1)
+
+    def test_place_reviews_unknown_place_404(self, client):
+        assert client.get('/api/v1/places/nope/reviews').status_code == 404
+
+
+# ================================================================
+# PERF 6 — Constraint-backed duplicate review check
+# ================================================================
+
+class TestDuplicateReview:
+
+    def _place_with_reviews(self, count, prefix):
+        """A place owned by the admin fixture with `count` reviews by other users."""
+        from sqlalchemy import insert
+        owner = User.query.filter_by(email='admin@test.com').first()
+        place = Place(title=f'{prefix} place', price=10.0, latitude=0.0, longitude=0.0,
+                      owner_id=owner.id)
+        _db.session.add(place)
+        _db.session.commit()
+        if count:
+            _db.session.execute(insert(Review), [
+                {'id': f'{prefix}-r-{i}', 'text': 'ok', 'rating': 3,
+                 'place_id': place.id, 'user_id': f'{prefix}-u-{i}'} for i in range(count)])
+            _db.session.commit()
+        return place.id
+
+    def test_model_has_unique_user_place_constraint(self):
+        from sqlalchemy import UniqueConstraint
+        uniques = {tuple(c.name for c in con.columns)
+                   for con in Review.__table__.constraints if isinstance(con, UniqueConstraint)}
+        assert ('user_id', 'place_id') in uniques
+
+    def test_review_creation_statement_count_is_bounded(self, client, user_token):
+        counts = []
+        for n in (1, 500):
+            place_id = self._place_with_reviews(n, f'dup{n}')
+            _db.session.expunge_all()
+            # Same cold start for both runs
+            clear_cache()
+            with StatementCounter(_db.engine) as counter:
+                r = client.post('/api/v1/reviews/',
+                    data=json.dumps({'text': 'Fine', 'rating': 4, 'place_id': place_id}),
+                    content_type='application/json',
+                    headers={'Authorization': f'Bearer {user_token}'})
+            assert r.status_code == 201
+            counts.append(counter.count)
+        assert counts[0] == counts[1]
+
+    def test_second_review_rejected(self, client, user_token):
+        place_id = self._place_with_reviews(0, 'dupagain')
+        payload = json.dumps({'text': 'Once', 'rating': 5, 'place_id': place_id})
+        headers = {'Authorization': f'Bearer {user_token}'}
+        assert client.post('/api/v1/reviews/', data=payload, content_type='application/json',
+                           headers=headers).status_code == 201
+        r = client.post('/api/v1/reviews/', data=payload, content_type='application/json',
+                        headers=headers)
+        assert r.status_code == 400
+        assert 'already reviewed' in json.loads(r.data)['error']
+
+    def test_constraint_violation_surfaces_as_value_error(self, app):
+        from app.services import facade
+        place_id = self._place_with_reviews(0, 'duprace')
+        user = User.query.filter_by(email='john@test.com').first()
+        data = {'text': 'Race', 'rating': 2, 'user_id': user.id, 'place_id': place_id}
+        facade.create_review(dict(data))
+        with pytest.raises(ValueError):
+            facade.create_review(dict(data))
+        place = _db.session.get(Place, place_id)
+        assert place.review_count == 1
+
+
+# ================================================================
+# PERF 7 — Unit of work: one commit per request
+# ================================================================
+
+class CommitCounter:
+    """Counts database COMMITs inside a `with` block."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_commit(self, conn):
+        self.count += 1
+
+    def __enter__(self):
+        from sqlalchemy import event
+        event.listen(self.engine, 'commit', self._on_commit)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+        event.remove(self.engine, 'commit', self._on_commit)
+
+
+class TestUnitOfWork:
+
+    def test_create_place_with_amenities_commits_once(self, client, user_token, admin_token):
+        r = client.post('/api/v1/amenities/', data=json.dumps({'name': 'UoW Sauna'}),
+                        content_type='application/json',
+                        headers={'Authorization': f'Bearer {admin_token}'})
+        amenity_id = json.loads(r.data)['id']
+        with CommitCounter(_db.engine) as commits:
+            r = client.post('/api/v1/places/',
+                data=json.dumps({'title': 'UoW Place', 'price': 60.0, 'latitude': 5.0,
+                                 'longitude': 5.0, 'amenities': [amenity_id]}),
+                content_type='application/json',
+                headers={'Authorization': f'Bearer {user_token}'})
+        assert r.status_code == 201
+        assert commits.count == 1
+
+    def test_failed_request_rolls_back_partial_changes(self, client, user_token):
+        r = client.post('/api/v1/places/',
+            data=json.dumps({'title': 'UoW Original', 'price': 60.0, 'latitude': 5.0,
+                             'longitude': 5.0}),
+            content_type='application/json',
+            headers={'Authorization': f'Bearer {user_token}'})
+        place_id = json.loads(r.data)['id']
+        # title is applied before latitude fails validation
+        r = client.put(f'/api/v1/places/{place_id}',
+            data=json.dumps({'title': 'UoW Half Applied', 'latitude': 500}),
+            content_type='application/json',
+            headers={'Authorization': f'Bearer {user_token}'})
+        assert r.status_code == 400
+        # a later commit on the same session must not persist the rejected title
+        _db.session.commit()
+        _db.session.expire_all()
+        assert _db.session.get(Place, place_id).title == 'UoW Original'
+
+    def test_facade_transaction_commits_once(self, app):
+        from app.services import facade
+        with CommitCounter(_db.engine) as commits:
+            with facade.transaction():
+                facade.create_amenity({'name': 'UoW Bulk 1'})
+                facade.create_amenity({'name': 'UoW Bulk 2'})
+        assert commits.count == 1
+        assert Amenity.query.filter_by(name='UoW Bulk 2').first() is not None
+
+    def test_facade_transaction_rolls_back_on_error(self, app):
+        from app.services import facade
+        with pytest.raises(ValueError):
+            with facade.transaction():
+                facade.create_amenity({'name': 'UoW Ghost'})
+                facade.create_amenity({'name': 'UoW Ghost'})
+        assert Amenity.query.filter_by(name='UoW Ghost').first() is None
+
+
+# ================================================================
+# PERF 8 — Bulk NDJSON import
+# ================================================================
+
+def _ndjson(rows):
+    return '\n'.join(r if isinstance(r, str) else json.dumps(r) for r in rows) + '\n'
+
+
+class TestBulkImport:
+
+    def _post(self, client, token, entity, rows, **params):
+        query = '&'.join(f'{k}={v}' for k, v in params.items())
+        return client.post(f'/api/v1/admin/bulk/{entity}?{query}', data=_ndjson(rows),
+                           content_type='application/x-ndjson',
+                           headers={'Authorization': f'Bearer {token}'})
+
+    def test_requires_admin(self, client, user_token):
+        r = self._post(client, user_token, 'amenities', [{'name': 'Bulk Nope'}])
+        assert r.status_code == 403
+
+    def test_unknown_entity(self, client, admin_token):
+        assert self._post(client, admin_token, 'users', [{}]).status_code == 400
+
+    def test_import_with_per_row_errors(self, client, admin_token):
+        owner = User.query.filter_by(email='admin@test.com').first()
+        reviewer = User.query.filter_by(email='john@test.com').first()
+        r = self._post(client, admin_token, 'amenities', [
+            {'id': 'bulk-am-1', 'name': 'Bulk Fireplace'},
+            {'name': 'Bulk Fireplace'},
+            {'name': ''},
+        ])
+        report = json.loads(r.data)
+        assert (report['inserted'], report['failed']) == (1, 2)
+        assert [e['line'] for e in report['errors']] == [2, 3]
+
+        r = self._post(client, admin_token, 'places', [
+            {'id': 'bulk-pl-1', 'title': 'Bulk Loft', 'price': 70, 'latitude': 10.5,
+             'longitude': 20.5, 'owner_id': owner.id, 'amenities': ['bulk-am-1']},
+            {'id': 'bulk-pl-2', 'title': 'Bulk Barn', 'price': 40, 'latitude': 11,
+             'longitude': 21, 'owner_id': owner.id},
+            '{not json',
+            {'title': 'Bulk Orphan', 'price': 10, 'latitude': 0, 'longitude': 0,
+             'owner_id': 'nobody'},
+            {'title': 'Bulk Bad', 'price': 10, 'latitude': 91, 'longitude': 0,
+             'owner_id': owner.id},
+            {'title': 'Bulk Missing Amenity', 'price': 10, 'latitude': 0, 'longitude': 0,
+             'owner_id': owner.id, 'amenities': ['nope']},
+        ], chunk_size=2)
+        report = json.loads(r.data)
+        assert report['inserted'] == 2
+        assert {e['line'] for e in report['errors']} == {3, 4, 5, 6}
+        place = _db.session.get(Place, 'bulk-pl-1')
+        assert [a.name for a in place.amenities] == ['Bulk Fireplace']
+        assert place.geohash == __import__('app.utils.geo', fromlist=['encode']).encode(10.5, 20.5)
+
+        r = self._post(client, admin_token, 'reviews', [
+            {'text': 'Loved it', 'rating': 5, 'user_id': reviewer.id, 'place_id': 'bulk-pl-1'},
+            {'text': 'Again', 'rating': 4, 'user_id': reviewer.id, 'place_id': 'bulk-pl-1'},
+            {'text': 'Mine', 'rating': 5, 'user_id': owner.id, 'place_id': 'bulk-pl-1'},
+            {'text': 'Ok', 'rating': 3, 'user_id': reviewer.id, 'place_id': 'bulk-pl-2'},
+            {'text': 'Bad rating', 'rating': 9, 'user_id': reviewer.id, 'place_id': 'bulk-pl-2'},
+        ])
+        report = json.loads(r.data)
+        assert report['inserted'] == 2
+        assert [e['line'] for e in report['errors']] == [2, 3, 5]
+        detail = json.loads(client.get('/api/v1/places/bulk-pl-1').data)
+        assert detail['review_count'] == 1
+        assert detail['average_rating'] == 5.0
+
+    def test_each_chunk_is_committed_over_http(self, client, admin_token):
+        from sqlalchemy import event
+        commits = []
+
+        def count(session):
+            commits.append(1)
+
+        event.listen(_db.session, 'after_commit', count)
+        try:
+            r = self._post(client, admin_token, 'amenities',
+                           [{'name': f'Bulk Chunked {i}'} for i in range(5)], chunk_size=2)
+        finally:
+            event.remove(_db.session, 'after_commit', count)
+        assert json.loads(r.data)['inserted'] == 5
+        # Three chunks, not one transaction for the whole request
+        assert len(commits) >= 3
+
+    def test_cli_import(self, app, tmp_path):
+        source = tmp_path / 'amenities.ndjson'
+        source.write_text(_ndjson([{'name': f'Bulk CLI {i}'} for i in range(25)]))
+        result = app.test_cli_runner().invoke(
+            args=['hbnb', 'import', 'amenities', str(source), '--chunk-size', '10'])
+        assert 'Imported 25 amenities, rejected 0' in result.output
+        assert Amenity.query.filter(Amenity.name.like('Bulk CLI %')).count() == 25
+
+
+# ================================================================
+# PERF 9 — Streaming NDJSON export
+# ================================================================
+
+class TestExport:
+
+    def _get(self, client, token, entity, headers=None, **params):
+        query = '&'.join(f'{k}={v}' for k, v in params.items())
+        return client.get(f'/api/v1/admin/export/{entity}?{query}',
+                          headers={'Authorization': f'Bearer {token}', **(headers or {})})
+
+    def test_requires_admin(self, client, user_token):
+        assert self._get(client, user_token, 'users').status_code == 403
+
+    def test_unknown_entity(self, client, admin_token):
+        assert self._get(client, admin_token, 'secrets').status_code == 400
+        assert self._get(client, admin_token, 'users', chunk_size=0).status_code == 400
+
+    def test_users_export_omits_passwords(self, client, admin_token):
+        r = self._get(client, admin_token, 'users', chunk_size=1)
+        assert r.status_code == 200
+        assert r.mimetype == 'application/x-ndjson'
+        rows = [json.loads(line) for line in r.data.decode().splitlines()]
+        assert len(rows) == User.query.count()
+        assert 'admin@test.com' in {row['email'] for row in rows}
+        assert all('password' not in row for row in rows)
+
+    def test_places_export_streams_in_chunks(self, client, admin_token):
+        ids, amenity_id = _bulk_places(25, 'exp')
+        try:
+            counter = StatementCounter(_db.engine)
+            with counter:
+                r = self._get(client, admin_token, 'places', chunk_size=10)
+                rows = [json.loads(line) for line in r.data.decode().splitlines()]
+            # Streamed cursor plus one amenity lookup per chunk, not per row
+            assert counter.count <= 10
+            exported = {row['id']: row for row in rows}
+            assert set(ids) <= set(exported)
+            assert exported[ids[0]]['amenities'] == [amenity_id]
+            assert isinstance(exported[ids[0]]['created_at'], str)
+        finally:
+            _delete_bulk_places('exp', amenity_id)
+
+    def test_gzip(self, client, admin_token):
+        plain = self._get(client, admin_token, 'amenities')
+        r = self._get(client, admin_token, 'amenities', headers={'Accept-Encoding': 'gzip'})
+        assert r.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(r.data) == plain.data
+
+
+# ================================================================
+# PERF 10 — Read-through entity cache
+# ================================================================
+
+class TestEntityCache:
+
+    def test_lru_eviction_and_ttl(self):
+        from app.persistence.cache import LRUCache
+        now = [0.0]
+        c = LRUCache(max_entries=2, ttl=10, clock=lambda: now[0])
+        c.set('a', 1)
+        c.set('b', 2)
+        assert c.get('a') == 1          # 'b' is now least recently used
+        c.set('c', 3)
+        assert c.get('b') is None
+        now[0] = 11
+        assert c.get('a') is None
+        stats = c.stats.as_dict()
+        assert (stats['hits'], stats['misses'], stats['evictions'], stats['expirations']) == (1, 2, 1, 1)
+
+    def test_redis_backend_with_local_stand_in(self):
+        from app.persistence.cache import RedisCache, LocalRedis
+        server = LocalRedis()
+        c = RedisCache(server, ttl=30, prefix='t:')
+        c.set('users:1', {'first_name': 'Ada'})
+        server.set('other', b'x')
+        assert c.get('users:1') == {'first_name': 'Ada'}
+        assert len(c) == 1
+        c.clear()
+        assert c.get('users:1') is None and server.get('other') == b'x'
+        # Entries are JSON, never unpickled: anything else is a miss
+        server.set('t:users:2', b'\x80\x04cos\nsystem\n')
+        assert c.get('users:2') is None
+        assert c.stats.as_dict()['errors'] == 1
+
+        class Down:
+            def __getattr__(self, name):
+                raise ConnectionError('down')
+        broken = RedisCache(Down())
+        broken.set('k', 1)
+        assert broken.get('k') is None
+        assert broken.stats.as_dict()['errors'] == 2
+
+    def test_redis_backend_round_trips_rows(self, app):
+        from datetime import datetime
+        from app.persistence import cache
+        from app.persistence.cache import LocalRedis, RedisCache
+        original = app.extensions['hbnb_cache']
+        app.extensions['hbnb_cache'] = RedisCache(LocalRedis())
+        try:
+            user_id = User.query.filter_by(email='john@test.com').first().id
+            _db.session.expunge_all()
+            cache.get(User, user_id)       # miss: stored as JSON
+            _db.session.expunge_all()
+            user = cache.get(User, user_id)
+            assert app.extensions['hbnb_cache'].stats.hits == 1
+            assert user.email == 'john@test.com'
+            assert isinstance(user.created_at, datetime)
+        finally:
+            app.extensions['hbnb_cache'] = original
+            _db.session.expunge_all()
+
+    def test_get_place_reads_through_cache(self, client, admin_token):
+        from app.persistence.cache import get_cache
+        owner = User.query.filter_by(email='admin@test.com').first()
+        place = Place(title='Cache Cabin', price=80, latitude=1, longitude=1, owner_id=owner.id)
+        _db.session.add(place)
+        _db.session.commit()
+        place_id = place.id
+
+        clear_cache()
+        counts = []
+        for _ in range(2):
+            _db.session.expunge_all()
+            with StatementCounter(_db.engine) as counter:
+                assert client.get(f'/api/v1/places/{place_id}').status_code == 200
+            counts.append(counter.count)
+        # Second request: place and owner come from the cache
+        assert counts[1] == counts[0] - 2
+
+        r = client.put(f'/api/v1/places/{place_id}', data=json.dumps({'price': 90}),
+                       content_type='application/json',
+                       headers={'Authorization': f'Bearer {admin_token}'})
+        assert r.status_code == 200
+        # The write dropped the entry: a fresh session sees the new price
+        before = get_cache().stats.as_dict()['hits']
+        _db.session.expunge_all()
+        assert json.loads(client.get(f'/api/v1/places/{place_id}').data)['price'] == 90
+        _db.session.expunge_all()
+        from app.services import facade
+        assert facade.get_place(place_id).price == 90
+        assert get_cache().stats.as_dict()['hits'] > before
+
+    def test_rolled_back_values_are_not_cached(self):
+        from app.services import facade
+        user = User.query.filter_by(email='john@test.com').first()
+        user_id = user.id
+        user.first_name = 'Uncommitted'
+        _db.session.flush()
+        _db.session.expunge_all()
+        assert facade.get_user(user_id).first_name == 'Uncommitted'
+        _db.session.rollback()
+        _db.session.expunge_all()
+        assert facade.get_user(user_id).first_name == 'John'
+
+    def test_email_lookup_survives_email_change(self):
+        from app.services import facade
+        facade.get_user_by_email('john@test.com')   # cache email -> id
+        user = facade.get_user_by_email('john@test.com')
+        user.email = 'john.changed@test.com'
+        _db.session.commit()
+        _db.session.expunge_all()
+        assert facade.get_user_by_email('john@test.com') is None
+        user = facade.get_user_by_email('john.changed@test.com')
+        user.email = 'john@test.com'
+        _db.session.commit()
+
+    def test_stats_endpoint(self, client, admin_token, user_token):
+        r = client.get('/api/v1/admin/cache', headers={'Authorization': f'Bearer {user_token}'})
+        assert r.status_code == 403
+        r = client.get('/api/v1/admin/cache', headers={'Authorization': f'Bearer {admin_token}'})
+        stats = json.loads(r.data)
+        assert stats['backend'] == 'lru'
+        assert {'hits', 'misses', 'evictions', 'hit_ratio', 'entries'} <= set(stats)
+
+
+# ================================================================
+# PERF 11 — Conditional GET (ETag / Last-Modified / 304)
+# ================================================================
+
+class TestConditionalGet:
+
+    def _place(self, title):
+        owner = User.query.filter_by(email='admin@test.com').first()
+        place = Place(title=title, price=50, latitude=2, longitude=2, owner_id=owner.id)
+        _db.session.add(place)
+        _db.session.commit()
+        return place.id
+
+    def test_place_detail_304_skips_heavy_queries(self, client, user_token):
+        place_id = self._place('Etag Villa')
+        r = client.get(f'/api/v1/places/{place_id}')
+        etag = r.headers['ETag']
+        assert r.headers['Last-Modified']
+
+        _db.session.expunge_all()
+        with StatementCounter(_db.engine) as counter:
+            r = client.get(f'/api/v1/places/{place_id}', headers={'If-None-Match': etag})
+        assert r.status_code == 304
+        assert r.data == b''
+        assert counter.count == 1   # only the version query
+
+        # A new review changes the validator
+        r = client.post('/api/v1/reviews/',
+                        data=json.dumps({'text': 'Nice', 'rating': 5, 'place_id': place_id}),
+                        content_type='application/json',
+                        headers={'Authorization': f'Bearer {user_token}'})
+        assert r.status_code == 201
+        r = client.get(f'/api/v1/places/{place_id}', headers={'If-None-Match': etag})
+        assert r.status_code == 200
+        assert r.headers['ETag'] != etag
+        assert len(json.loads(r.data)['reviews']) == 1
+
+    def test_place_detail_changes_with_amenities_and_owner(self, client, admin_token):
+        place_id = self._place('Etag Chalet')
+        etag = client.get(f'/api/v1/places/{place_id}').headers['ETag']
+        amenity = Amenity(name='Etag Sauna')
+        _db.session.add(amenity)
+        _db.session.commit()
+        r = client.post(f'/api/v1/places/{place_id}/amenities/{amenity.id}',
+                        headers={'Authorization': f'Bearer {admin_token}'})
+        assert r.status_code == 200
+        r = client.get(f'/api/v1/places/{place_id}', headers={'If-None-Match': etag})
+        assert r.status_code == 200
+        etag = r.headers['ETag']
+
+        owner = User.query.filter_by(email='admin@test.com').first()
+        owner.last_name = 'Renamed'
+        _db.session.commit()
+        assert client.get(f'/api/v1/places/{place_id}',
+                          headers={'If-None-Match': etag}).status_code == 200
+        owner.last_name = 'User'
+        _db.session.commit()
+
+    def test_if_modified_since(self, client):
+        user = User.query.filter_by(email='john@test.com').first()
+        r = client.get(f'/api/v1/users/{user.id}')
+        last_modified = r.headers['Last-Modified']
+        r = client.get(f'/api/v1/users/{user.id}', headers={'If-Modified-Since': last_modified})
+        assert r.status_code == 304
+        r = client.get(f'/api/v1/users/{user.id}',
+                       headers={'If-Modified-Since': 'Mon, 01 Jan 2001 00:00:00 GMT'})
+        assert r.status_code == 200
+
+    def test_collections(self, client, admin_token):
+        r = client.get('/api/v1/amenities/?limit=5')
+        etag = r.headers['ETag']
+        assert client.get('/api/v1/amenities/?limit=5',
+                          headers={'If-None-Match': etag}).status_code == 304
+        # Another page has another validator
+        assert client.get('/api/v1/amenities/?limit=6',
+                          headers={'If-None-Match': etag}).status_code == 200
+
+        r = client.post('/api/v1/amenities/', data=json.dumps({'name': 'Etag Hammock'}),
+                        content_type='application/json',
+                        headers={'Authorization': f'Bearer {admin_token}'})
+        assert r.status_code == 201
+        assert client.get('/api/v1/amenities/?limit=5',
+                          headers={'If-None-Match': etag}).status_code == 200
+
+        for url in ('/api/v1/places/', '/api/v1/users/', '/api/v1/reviews/'):
+            etag = client.get(url).headers['ETag']
+            assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+
+# ================================================================
+# PERF 12 — bcrypt cost and hashing pool
+# ================================================================
+
+class TestPasswordHashCost:
+
+    def test_configured_cost_is_used(self, app):
+        from app.utils.passwords import hash_rounds
+        user = User.query.filter_by(email='john@test.com').first()
+        assert app.config['BCRYPT_LOG_ROUNDS'] == 4
+        assert hash_rounds(user.password) == 4
+
+    def test_rehash_on_login_when_cost_changes(self, client):
+        import bcrypt
+        from app.utils.passwords import hash_rounds
+        user = User(first_name='Re', last_name='Hash', email='rehash@test.com', password='x')
+        user.password = bcrypt.hashpw(b'oldcost123', bcrypt.gensalt(5)).decode()
+        _db.session.add(user)
+        _db.session.commit()
+
+        r = client.post('/api/v1/auth/login', data=json.dumps(
+            {'email': 'rehash@test.com', 'password': 'oldcost123'}), content_type='application/json')
+        assert r.status_code == 200
+        _db.session.expire_all()
+        assert hash_rounds(User.query.filter_by(email='rehash@test.com').first().password) == 4
+        # Still the same password
+        r = client.post('/api/v1/auth/login', data=json.dumps(
+            {'email': 'rehash@test.com', 'password': 'oldcost123'}), content_type='application/json')
+        assert r.status_code == 200
+
+    def test_process_pool(self, app):
+        from app.extensions import hasher
+        app.config['PASSWORD_HASH_WORKERS'] = 2
+        try:
+            hashed = hasher.hash('pooled-secret')
+            assert hasher.check(hashed, 'pooled-secret')
+            assert not hasher.check(hashed, 'wrong')
+            assert hasher._pool is not None
+            # Never forked from the threaded server
+            assert hasher._pool._mp_context.get_start_method() != 'fork'
+        finally:
+            app.config['PASSWORD_HASH_WORKERS'] = 0
+            hasher.shutdown()
+
+    def test_invalid_hash_or_long_password_fails_closed(self):
+        from app.extensions import hasher
+        assert hasher.check('not-a-hash', 'whatever') is False
+        assert hasher.check(hasher.hash('short'), 'x' * 100) is False
+
+
+# ================================================================
+# PERF 13 — Constant-cost login and throttling
+# ================================================================
+
+class TestLoginHardening:
+
+    def _login(self, client, email, password='whatever', ip='10.0.0.1'):
+        return client.post('/api/v1/auth/login', data=json.dumps({'email': email, 'password': password}),
+                           content_type='application/json', environ_base={'REMOTE_ADDR': ip})
+
+    def test_unknown_email_costs_one_hash_check(self, client, monkeypatch):
+        from app.extensions import hasher
+        # Computed by create_app, not by the first unknown email
+        assert 4 in hasher._dummies
+        calls = []
+        original = hasher.check
+        monkeypatch.setattr(hasher, 'check', lambda *a: calls.append(a) or original(*a))
+        assert self._login(client, 'nobody@test.com').status_code == 401
+        assert self._login(client, 'john@test.com', 'wrong').status_code == 401
+        assert len(calls) == 2
+        assert calls[0][0] == hasher.dummy_hash()
+
+    def test_token_buckets(self, app, client):
+        from app.utils.rate_limit import LoginLimiter, MemoryBucketStore
+        now = [0.0]
+        limiter = LoginLimiter(MemoryBucketStore(clock=lambda: now[0]),
+                               ip_burst=3, ip_per_minute=60, email_burst=2, email_per_minute=6)
+        original = app.extensions['login_limiter']
+        app.extensions['login_limiter'] = limiter
+        try:
+            assert self._login(client, 'a@test.com', ip='10.0.0.2').status_code == 401
+            assert self._login(client, 'a@test.com', ip='10.0.0.3').status_code == 401
+            # Email bucket empty, whatever the IP
+            r = self._login(client, 'A@test.com ', ip='10.0.0.4')
+            assert r.status_code == 429
+            assert r.headers['Retry-After'] == '10'
+            # IP bucket: 3 attempts, then refused
+            for email in ('b@test.com', 'c@test.com'):
+                assert self._login(client, email, ip='10.0.0.2').status_code == 401
+            assert self._login(client, 'd@test.com', ip='10.0.0.2').status_code == 429
+            # One token a second comes back
+            now[0] += 1
+            assert self._login(client, 'd@test.com', ip='10.0.0.2').status_code == 401
+        finally:
+            app.extensions['login_limiter'] = original
+
+    def test_redis_store_with_local_stand_in(self):
+        from app.utils.rate_limit import create_limiter
+        limiter = create_limiter({'LOGIN_RATE_LIMIT_BACKEND': 'redis',
+                                  'LOGIN_RATE_LIMIT_REDIS_URL': 'local://',
+                                  'LOGIN_IP_BURST': 2, 'LOGIN_EMAIL_BURST': 10})
+        assert limiter.hit('10.0.0.7', 'a@test.com') == 0
+        assert limiter.hit('10.0.0.7', 'b@test.com') == 0
+        assert limiter.hit('10.0.0.7', 'c@test.com') > 0
+        assert limiter.hit('10.0.0.8', 'c@test.com') == 0
+
+    def test_unreachable_redis_store_throttles_per_process(self, app, client):
+        from app.utils.rate_limit import LoginLimiter, RedisBucketStore
+
+        class Down:
+            def register_script(self, script):
+                def run(keys=(), args=()):
+                    raise ConnectionError('down')
+                return run
+
+        store = RedisBucketStore(Down())
+        original = app.extensions['login_limiter']
+        app.extensions['login_limiter'] = LoginLimiter(store, ip_burst=2, ip_per_minute=1)
+        try:
+            assert self._login(client, 'a@test.com', ip='10.0.0.9').status_code == 401
+            assert self._login(client, 'b@test.com', ip='10.0.0.9').status_code == 401
+            assert self._login(client, 'c@test.com', ip='10.0.0.9').status_code == 429
+        finally:
+            app.extensions['login_limiter'] = original
+        assert store.errors > 0
+
+    def test_memory_store_is_bounded(self):
+        from app.utils.rate_limit import MemoryBucketStore
+        store = MemoryBucketStore(max_keys=10)
+        for i in range(100):
+            store.take(f'ip:{i}', 5, 1)
+        assert len(store) == 10
+
+
+# ================================================================
+# PERF 14 — Engine options and SQLite tuning profile
+# ================================================================
+
+class TestEngineConfig:
+
+    def test_config_uri_is_not_overridden(self, app):
+        assert _db.engine.url.database in (None, '', ':memory:')
+
+    def test_file_database_gets_pool_and_pragmas(self, tmp_path):
+        path = tmp_path / 'tuned.db'
+
+        class FileConfig(app_config.ProductionConfig):
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+            DB_POOL_SIZE = 3
+
+        app = create_app(FileConfig)
+        with app.app_context():
+            assert _db.engine.url.database == str(path)
+            assert _db.engine.pool.size() == 3
+            with _db.engine.connect() as conn:
+                pragma = lambda name: conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+                assert pragma('journal_mode') == 'wal'
+                assert pragma('synchronous') == 1      # NORMAL
+                assert pragma('busy_timeout') == 5000
+                assert pragma('cache_size') == -65536
+            _db.engine.dispose()
+
+    def test_engine_options(self):
+        from app.persistence.engine import engine_options
+        config = {'DB_POOL_SIZE': 7, 'DB_MAX_OVERFLOW': 2, 'DB_POOL_RECYCLE': 60,
+                  'SQLALCHEMY_DATABASE_URI': 'mysql://u:p@db/hbnb'}
+        options = engine_options(config)
+        assert (options['pool_size'], options['max_overflow'], options['pool_recycle']) == (7, 2, 60)
+        assert options['pool_pre_ping'] is True
+        # In-memory SQLite shares one connection: no pool sizing
+        config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        assert 'pool_size' not in engine_options(config)
+
+
+# ================================================================
+# PERF 15 — Read replicas with read-your-writes stickiness
+# ================================================================
+
+class TestReadReplicas:
+
+    @pytest.fixture
+    def replica_app(self, tmp_path):
+        class ReplicaConfig(app_config.TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'primary.db'}"
+            DB_REPLICA_URIS = [f"sqlite:///{tmp_path / 'replica.db'}"]
+            CACHE_BACKEND = 'null'
+
+        app = create_app(ReplicaConfig)
+        with app.app_context():
+            owner = User(first_name='Rep', last_name='Lica', email='replica@test.com', password='x')
+            owner.hash_password('replica123')
+            _db.session.add(owner)
+            _db.session.flush()
+            place = Place(title='Original', price=10, latitude=0, longitude=0, owner_id=owner.id)
+            _db.session.add(place)
+            _db.session.commit()
+            self._sync(app)
+            yield app, place.id
+            _db.session.remove()
+            for engine in [*_db.engines.values(), *app.extensions['replica_engines'].values()]:
+                engine.dispose()
+
+    def _sync(self, app):
+        from app.persistence.routing import sync_sqlite_replica
+        sync_sqlite_replica(_db.engines[None], app.extensions['replica_engines']['replica_0'])
+
+    def _title(self, client, place_id, **kwargs):
+        return json.loads(client.get(f'/api/v1/places/{place_id}', **kwargs).data)['title']
+
+    def test_reads_follow_replica_and_writers_stick_to_primary(self, replica_app):
+        app, place_id = replica_app
+        client = app.test_client()
+        anonymous = {'environ_base': {'REMOTE_ADDR': '10.9.9.9'}}
+        # A write the replica has not received yet
+        _db.session.get(Place, place_id).title = 'Changed on primary'
+        _db.session.commit()
+        assert self._title(client, place_id, **anonymous) == 'Original'
+
+        token = json.loads(client.post('/api/v1/auth/login', content_type='application/json',
+                                       data=json.dumps({'email': 'replica@test.com', 'password': 'replica123'})
+                                       ).data)['access_token']
+        auth = {'Authorization': f'Bearer {token}'}
+        r = client.put(f'/api/v1/places/{place_id}', data=json.dumps({'price': 20}),
+                       content_type='application/json', headers=auth)
+        assert r.status_code == 200
+        # The writer reads its own write, others still read the replica
+        detail = json.loads(client.get(f'/api/v1/places/{place_id}', headers=auth).data)
+        assert (detail['title'], detail['price']) == ('Changed on primary', 20)
+        assert self._title(client, place_id, **anonymous) == 'Original'
+
+        self._sync(app)
+        assert self._title(client, place_id, **anonymous) == 'Changed on primary'
+
+    def test_stickiness_expires(self):
+        from app.persistence.routing import StickyTracker
+        now = [0.0]
+        tracker = StickyTracker(clock=lambda: now[0])
+        tracker.mark('user:1', 5)
+        assert tracker.is_sticky('user:1') and not tracker.is_sticky('user:2')
+        now[0] = 6
+        assert not tracker.is_sticky('user:1')
+
+    def test_shared_stickiness_across_workers(self):
+        from app.persistence.cache import LocalRedis
+        from app.persistence.routing import RedisStickyTracker, create_sticky_tracker
+        server = LocalRedis()
+        # Two worker processes sharing one server
+        first, second = RedisStickyTracker(server), RedisStickyTracker(server)
+        first.mark('user:1', 5)
+        assert second.is_sticky('user:1') and not second.is_sticky('user:2')
+        tracker = create_sticky_tracker({'REPLICA_STICKY_BACKEND': 'redis',
+                                         'REPLICA_STICKY_REDIS_URL': 'local://'})
+        assert isinstance(tracker, RedisStickyTracker)
+        with pytest.raises(ValueError):
+            create_sticky_tracker({'REPLICA_STICKY_BACKEND': 'carrier-pigeon'})
+
+    def test_unreachable_sticky_store_reads_primary(self):
+        from app.persistence.routing import RedisStickyTracker
+
+        class Down:
+            def get(self, name):
+                raise ConnectionError
+
+            def set(self, name, value, ex=None):
+                raise ConnectionError
+
+        tracker = RedisStickyTracker(Down())
+        tracker.mark('user:1', 5)
+        assert tracker.is_sticky('user:1')
+
+
+# ================================================================
+# PERF 16 — Serializer registry, sparse fieldsets, JSON backend
+# ================================================================
+
+class TestSerializers:
+
+    def test_sparse_fieldset_on_listing(self, client, app):
+        ids, amenity_id = _bulk_places(2, 'fields')
+        try:
+            response = client.get(f'/api/v1/places/?owner_id={ids[0].replace("-p-", "-u-")}'
+                                  '&fields=id,title')
+        finally:
+            _delete_bulk_places('fields', amenity_id)
+        assert response.status_code == 200
+        assert json.loads(response.data) == [{'id': ids[0], 'title': 'Bulk 0'}]
+
+    def test_unknown_field_is_rejected(self, client):
+        assert client.get('/api/v1/places/?fields=id,secret').status_code == 400
+        # Only the public user fields can be selected
+        response = client.get('/api/v1/users/?fields=id,password')
+        assert response.status_code == 400
+        assert 'password' in json.loads(response.data)['error']
+
+    def test_place_detail_fields(self, client, app):
+        ids, amenity_id = _bulk_places(1, 'detailfields')
+        try:
+            brief = json.loads(client.get(f'/api/v1/places/{ids[0]}?fields=id,owner').data)
+            with_reviews = json.loads(client.get(f'/api/v1/places/{ids[0]}?fields=reviews').data)
+            full = json.loads(client.get(f'/api/v1/places/{ids[0]}').data)
+        finally:
+            _delete_bulk_places('detailfields', amenity_id)
+        assert set(brief) == {'id', 'owner'}
+        assert set(brief['owner']) == {'id', 'first_name', 'last_name', 'email'}
+        assert with_reviews == {'reviews': []}
+        assert {'reviews', 'rating_histogram', 'images', 'amenities'} <= set(full)
+
+    def test_summary_of_new_place(self):
+        from app.api.v1.serializers import PLACE_SUMMARY
+        place = Place(title='Fresh', price=10.0, latitude=1.0, longitude=2.0, owner_id='x')
+        data = PLACE_SUMMARY.dump(place)
+        assert data['owner'] is None and data['amenities'] == []
+        assert (data['review_count'], data['average_rating']) == (0, 0.0)
+
+    def test_stdlib_fallback_matches_orjson(self, monkeypatch):
+        from datetime import datetime
+        from app.api.v1 import serializers
+        data = {'id': 'a', 'price': 12.5, 'when': datetime(2024, 1, 2, 3, 4, 5, 6),
+                'nested': [{'n': None, 'ok': True}], 'text': 'Café ☕'}
+        encoded = serializers.dumps(data)
+        monkeypatch.setattr(serializers, 'orjson', None)
+        assert json.loads(serializers.dumps(data)) == json.loads(encoded)
+        assert json.loads(encoded)['when'] == '2024-01-02T03:04:05.000006'
+
+
+# ================================================================
+# PERF 17 — Response compression and compressed-bytes cache
+# ================================================================
+
+class TestCompression:
+
+    def test_large_listing_is_gzipped(self, client, app):
+        ids, amenity_id = _bulk_places(30, 'gz')
+        try:
+            plain = client.get('/api/v1/places/?limit=30')
+            packed = client.get('/api/v1/places/?limit=30', headers={'Accept-Encoding': 'gzip'})
+        finally:
+            _delete_bulk_places('gz', amenity_id)
+        assert 'Content-Encoding' not in plain.headers
+        assert packed.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in packed.headers['Vary']
+        assert len(packed.data) < len(plain.data)
+        assert gzip.decompress(packed.data) == plain.data
+
+    def test_small_body_is_not_compressed(self, client, admin_token):
+        amenity = json.loads(client.post(
+            '/api/v1/amenities/', data=json.dumps({'name': 'Tiny'}), content_type='application/json',
+            headers={'Authorization': f'Bearer {admin_token}'}).data)
+        r = client.get(f"/api/v1/amenities/{amenity['id']}", headers={'Accept-Encoding': 'gzip'})
+        assert len(r.data) < app_config.Config.COMPRESS_MIN_SIZE
+        assert 'Content-Encoding' not in r.headers
+
+    def test_compressed_bytes_reused_until_etag_changes(self, client, app, admin_token):
+        from app.utils.compression import get_compression_cache
+        ids, amenity_id = _bulk_places(30, 'gzcache')
+        cache = get_compression_cache()
+        url = f'/api/v1/places/{ids[0]}?fields=id,title,description'
+        auth = {'Authorization': f'Bearer {admin_token}'}
+        try:
+            client.put(f'/api/v1/places/{ids[0]}', data=json.dumps({'description': 'x' * 2000}),
+                       content_type='application/json', headers=auth)
+            first = client.get(url, headers={'Accept-Encoding': 'gzip'})
+            hits = cache.stats.hits
+            second = client.get(url, headers={'Accept-Encoding': 'gzip'})
+            assert cache.stats.hits == hits + 1
+            assert second.data == first.data
+            client.put(f'/api/v1/places/{ids[0]}', data=json.dumps({'description': 'y' * 2000}),
+                       content_type='application/json', headers=auth)
+            third = client.get(url, headers={'Accept-Encoding': 'gzip'})
+        finally:
+            _delete_bulk_places('gzcache', amenity_id)
+        assert third.headers['ETag'] != first.headers['ETag']
+        assert json.loads(gzip.decompress(third.data))['description'] == 'y' * 2000
+
+    def test_brotli_preferred_when_installed(self, client, app):
+        brotli = pytest.importorskip('brotli')
+        ids, amenity_id = _bulk_places(30, 'br')
+        try:
+            plain = client.get('/api/v1/places/?limit=30')
+            packed = client.get('/api/v1/places/?limit=30', headers={'Accept-Encoding': 'gzip, br'})
+        finally:
+            _delete_bulk_places('br', amenity_id)
+        assert packed.headers['Content-Encoding'] == 'br'
+        assert brotli.decompress(packed.data) == plain.data
+
+
+# ================================================================
+# PERF 18 — Full-text search (FTS5 / inverted index)
+# ================================================================
+
+class TestFullTextSearch:
+
+    @pytest.fixture(params=['fts5', 'inverted'])
+    def backend(self, request, app):
+        from app.persistence.search_index import InvertedIndex
+        from app.services import facade
+        original = app.extensions['search_index']
+        if request.param == 'inverted':
+            app.extensions['search_index'] = InvertedIndex()
+            facade.rebuild_search_index()
+        yield app.extensions['search_index']
+        app.extensions['search_index'] = original
+        facade.rebuild_search_index()
+
+    @pytest.fixture
+    def listings(self, app, admin_token, user_token):
+        """Places with made-up words so other tests' data cannot match"""
+        from app.services import facade
+        owner = User.query.filter_by(email='admin@test.com').first()
+        guest = User.query.filter_by(email='john@test.com').first()
+
+        def place(title, description, price, lat=0.0, lon=0.0):
+            return facade.create_place({'title': title, 'description': description, 'price': price,
+                                        'latitude': lat, 'longitude': lon, 'owner_id': owner.id})
+        created = {
+            'harbour': place('Zorbly harbour view', 'Bright flat', 120, 43.3, 5.4),
+            'loft': place('Quiet loft', 'Near the zorbly market', 80, 43.31, 5.41),
+            'cabin': place('Mountain cabin', 'Wood stove', 60, 45.9, 6.9),
+        }
+        # BM25 gives no weight to a word found in most documents
+        for i in range(5):
+            created[f'filler{i}'] = place(f'Filler studio {i}', 'Nothing to see', 50)
+        review = facade.create_review({'text': 'Steps from the zorbly harbour, Café crème heaven',
+                                       'rating': 5, 'user_id': guest.id,
+                                       'place_id': created['cabin'].id})
+        ids = {name: p.id for name, p in created.items()}
+        yield ids
+        facade.delete_review(review.id)
+        for place_id in ids.values():
+            facade.delete_place(place_id)
+
+    @pytest.mark.parametrize('backend_name', ['fts5', 'inverted'])
+    def test_empty_index_is_filled_at_startup(self, tmp_path, backend_name):
+        from sqlalchemy import delete
+        from app.models.search import search_documents
+        from app.persistence.search_index import get_search_index, parse_query
+
+        class FileConfig(app_config.TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'search.db'}"
+            SEARCH_BACKEND = backend_name
+
+        first = create_app(FileConfig)
+        with first.app_context():
+            owner = User(first_name='Ada', last_name='Owner', email='ada@test.com', password='secret123')
+            _db.session.add(owner)
+            _db.session.flush()
+            place = Place(title='Zorbly attic', description='', price=10.0,
+                          latitude=0.0, longitude=0.0, owner_id=owner.id)
+            _db.session.add(place)
+            _db.session.commit()
+            place_id = place.id
+            # Places written before the index existed
+            assert get_search_index().is_empty()
+            _db.session.execute(delete(search_documents))
+            _db.session.commit()
+            _db.engine.dispose()
+
+        second = create_app(FileConfig)
+        with second.app_context():
+            assert not get_search_index().is_empty()
+            assert [p for p, _ in get_search_index().search(parse_query('zorbly'))] == [place_id]
+            _db.engine.dispose()
+
+    def _search(self, client, query):
+        r = client.get(f'/api/v1/places/search?{query}')
+        return r.status_code, json.loads(r.data)
+
+    def test_ranking_and_prefix(self, client, backend, listings):
+        status, body = self._search(client, 'q=zorbly')
+        assert status == 200
+        # Title beats description beats review text
+        assert [p['id'] for p in body] == [listings['harbour'], listings['loft'], listings['cabin']]
+        assert body[0]['relevance'] > body[1]['relevance'] > body[2]['relevance'] > 0
+        _, body = self._search(client, 'q=zorb*')
+        assert len(body) == 3
+        # Words are ANDed; case and accents are ignored
+        _, body = self._search(client, 'q=ZORBLY%20cafe')
+        assert [p['id'] for p in body] == [listings['cabin']]
+
+    def test_combined_with_price_and_geo(self, client, backend, listings):
+        _, body = self._search(client, 'q=zorbly&max_price=100')
+        assert {p['id'] for p in body} == {listings['loft'], listings['cabin']}
+        _, body = self._search(client, 'q=zorbly&bbox=5,43,6,44')
+        assert [p['id'] for p in body] == [listings['harbour'], listings['loft']]
+        _, body = self._search(client, 'q=zorbly&lat=43.3&lon=5.4&radius_km=5&min_price=100')
+        assert [p['id'] for p in body] == [listings['harbour']]
+        assert body[0]['distance_km'] == 0.0
+
+    def test_index_follows_writes(self, client, backend, listings):
+        from app.services import facade
+        facade.update_place(listings['harbour'], {'title': 'Plain harbour view'})
+        _, body = self._search(client, 'q=zorbly')
+        assert listings['harbour'] not in [p['id'] for p in body]
+        _, body = self._search(client, 'q=plain')
+        assert [p['id'] for p in body] == [listings['harbour']]
+
+    def test_invalid_queries(self, client):
+        assert client.get('/api/v1/places/search?q=*').status_code == 400
+        assert client.get('/api/v1/places/search?q=a*').status_code == 400
+        assert client.get('/api/v1/places/search?q=x&min_price=9&max_price=1').status_code == 400
+
+    def test_bulk_import_is_indexed(self, client, admin_token):
+        owner = User.query.filter_by(email='admin@test.com').first()
+        r = client.post('/api/v1/admin/bulk/places', data=_ndjson([
+            {'id': 'fts-bulk-1', 'title': 'Glimmerquartz chalet', 'price': 90,
+             'latitude': 1, 'longitude': 1, 'owner_id': owner.id}]),
+            content_type='application/x-ndjson', headers={'Authorization': f'Bearer {admin_token}'})
+        assert json.loads(r.data)['inserted'] == 1
+        _, body = self._search(client, 'q=glimmerquartz')
+        assert [p['id'] for p in body] == ['fts-bulk-1']
+
+
+# ================================================================
+# PERF 19 — Amenity filters and facets (bitmap index)
+# ================================================================
+
+class TestAmenityFacets:
+
+    @pytest.fixture
+    def catalogue(self, app, admin_token):
+        from app.services import facade
+        owner = User.query.filter_by(email='admin@test.com').first()
+        amenities = {name: facade.create_amenity({'name': f'Facet {name}'}).id
+                     for name in ('wifi', 'pool', 'sauna')}
+
+        def place(title, price, *names):
+            return facade.create_place({'title': title, 'price': price, 'latitude': 0.0, 'longitude': 0.0,
+                                        'owner_id': owner.id,
+                                        'amenities': [amenities[n] for n in names]}).id
+        places = {
+            'both': place('Facet both', 100, 'wifi', 'pool'),
+            'wifi': place('Facet wifi', 50, 'wifi'),
+            'pool': place('Facet pool', 200, 'pool'),
+        }
+        yield amenities, places
+        for place_id in places.values():
+            facade.delete_place(place_id)
+        for amenity_id in amenities.values():
+            facade.delete_amenity(amenity_id)
+
+    def _ids(self, client, query):
+        r = client.get(f'/api/v1/places/?{query}')
+        assert r.status_code == 200, r.data
+        return {p['id'] for p in json.loads(r.data)}
+
+    def test_filter_all_and_any(self, client, catalogue):
+        amenities, places = catalogue
+        assert self._ids(client, 'amenities=facet%20wifi,Facet%20Pool') == {places['both']}
+        assert self._ids(client, 'amenities=facet%20wifi,facet%20pool&amenities_match=any') == set(places.values())
+        # Ids work too, and combine with the other filters
+        assert self._ids(client, f"amenities={amenities['wifi']}&max_price=60") == {places['wifi']}
+        assert self._ids(client, f"amenities={amenities['sauna']}") == set()
+
+    def test_invalid_filter(self, client, catalogue):
+        assert client.get('/api/v1/places/?amenities=no-such-amenity').status_code == 400
+        assert client.get('/api/v1/places/?amenities=facet%20wifi&amenities_match=most').status_code == 400
+
+    def test_large_match_filters_in_sql(self, app, client, catalogue):
+        _, places = catalogue
+        index = app.extensions['amenity_index']
+        max_ids, index.max_ids = index.max_ids, 0
+        try:
+            assert self._ids(client, 'amenities=facet%20wifi,facet%20pool') == {places['both']}
+            assert self._ids(client, 'amenities=facet%20wifi,facet%20pool&amenities_match=any') == set(places.values())
+        finally:
+            index.max_ids = max_ids
+
+    def test_facet_counts(self, client, catalogue):
+        r = client.get('/api/v1/places/facets?amenities=facet%20pool')
+        assert r.status_code == 200
+        body = json.loads(r.data)
+        counts = {a['name']: a['count'] for a in body['amenities']}
+        assert body['total'] == 2
+        assert (counts['Facet pool'], counts['Facet wifi'], counts['Facet sauna']) == (2, 1, 0)
+        body = json.loads(client.get('/api/v1/places/facets?amenities=facet%20pool&min_price=150').data)
+        assert body['total'] == 1
+        assert {a['name']: a['count'] for a in body['amenities']}['Facet wifi'] == 0
+
+    def test_index_follows_writes(self, client, catalogue):
+        from app.services import facade
+        amenities, places = catalogue
+        facade.add_amenity_to_place(places['pool'], amenities['sauna'])
+        facade.update_place(places['wifi'], {'amenities': [amenities['sauna']]})
+        assert self._ids(client, 'amenities=facet%20sauna') == {places['pool'], places['wifi']}
+        assert self._ids(client, 'amenities=facet%20wifi') == {places['both']}
+
+    def test_rolled_back_changes_are_not_indexed(self, client, catalogue):
+        from app.services import facade
+        amenities, places = catalogue
+        with pytest.raises(RuntimeError):
+            with facade.transaction():
+                facade.add_amenity_to_place(places['wifi'], amenities['pool'])
+                raise RuntimeError("abort")
+        assert self._ids(client, 'amenities=facet%20pool') == {places['both'], places['pool']}
+
+    def test_rebuild_keeps_commits_applied_meanwhile(self, app, catalogue, monkeypatch):
+        from app.persistence.amenity_index import AmenityBitmapIndex
+        amenities, places = catalogue
+        index = AmenityBitmapIndex()
+        index.rebuild()
+        before = index.match([amenities['wifi']])
+        reads = []
+        execute = _db.session.execute
+
+        def read(*args, **kwargs):
+            result = execute(*args, **kwargs)
+            reads.append(1)
+            if len(reads) == 2:
+                # A commit lands after the rebuild read place_amenity
+                index.apply([('add', (places['pool'], amenities['sauna']))])
+            return result
+
+        monkeypatch.setattr(_db.session, 'execute', read)
+        index.rebuild()
+        monkeypatch.undo()
+        assert index.place_ids(index.match([amenities['sauna']])) == [places['pool']]
+        # Ordinals survive the rebuild: the earlier bitmap still names the same places
+        assert set(index.place_ids(before)) == {places['both'], places['wifi']}
+
+    def test_stale_index_rebuilds_once_in_background(self, app, monkeypatch):
+        import threading
+        import time as _time
+        from app.persistence.amenity_index import AmenityBitmapIndex
+        index = AmenityBitmapIndex(max_age=1)
+        index.built_at -= 10
+        rebuilds = []
+        started = threading.Event()
+
+        def slow_rebuild():
+            started.set()
+            _time.sleep(0.1)
+            rebuilds.append(1)
+            index.built_at = _time.monotonic()
+            return 0
+
+        def request():
+            with app.app_context():
+                index.match([])
+
+        monkeypatch.setattr(index, '_rebuild', slow_rebuild)
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert started.wait(1)
+        with index._rebuild_lock:  # released when the background rebuild ends
+            pass
+        assert rebuilds == [1]
+
+    def test_bulk_import_is_indexed(self, client, admin_token, catalogue):
+        from app.services import facade
+        amenities, _ = catalogue
+        owner = User.query.filter_by(email='admin@test.com').first()
+        r = client.post('/api/v1/admin/bulk/places', data=_ndjson([
+            {'id': 'facet-bulk-1', 'title': 'Facet bulk', 'price': 90, 'latitude': 1, 'longitude': 1,
+             'owner_id': owner.id, 'amenities': [amenities['sauna']]}]),
+            content_type='application/x-ndjson', headers={'Authorization': f'Bearer {admin_token}'})
+        assert json.loads(r.data)['inserted'] == 1
+        try:
+            assert self._ids(client, 'amenities=facet%20sauna') == {'facet-bulk-1'}
+        finally:
+            facade.delete_place('facet-bulk-1')
+
+
+# ================================================================
+# PERF 20 — Price filters and price histogram
+# ================================================================
+
+class TestPriceHistogram:
+
+    def _buckets(self):
+        from app.models.place import price_buckets
+        rows = _db.session.execute(price_buckets.select().where(price_buckets.c.places != 0))
+        return dict(rows.all())
+
+    def test_price_is_indexed(self):
+        indexed = {tuple(c.name for c in ix.columns) for ix in Place.__table__.indexes}
+        assert ('price',) in indexed
+
+    def test_summary_follows_writes(self, app, client, admin_token):
+        from app.persistence import price_histogram
+        from app.services import facade
+        owner = User.query.filter_by(email='admin@test.com').first()
+        place = facade.create_place({'title': 'Histogram loft', 'price': 1234.5, 'latitude': 0.0,
+                                     'longitude': 0.0, 'owner_id': owner.id})
+        # The commit expired the place: the old price is not in its history
+        facade.update_place(place.id, {'price': 2345.0})
+        client.post('/api/v1/admin/bulk/places', data=_ndjson([
+            {'id': 'histogram-bulk-1', 'title': 'Histogram bulk', 'price': 777, 'latitude': 1,
+             'longitude': 1, 'owner_id': owner.id}]),
+            content_type='application/x-ndjson', headers={'Authorization': f'Bearer {admin_token}'})
+        facade.delete_place('histogram-bulk-1')
+
+        maintained = self._buckets()
+        assert maintained.get(2345) == 1 and 1234 not in maintained and 777 not in maintained
+        price_histogram.rebuild()
+        _db.session.commit()
+        assert self._buckets() == maintained
+        facade.delete_place(place.id)
+
+    def test_rolled_back_write_is_not_counted(self, app, admin_token):
+        from app.services import facade
+        owner = User.query.filter_by(email='admin@test.com').first()
+        before = self._buckets()
+        with pytest.raises(RuntimeError):
+            with facade.transaction():
+                facade.create_place({'title': 'Never saved', 'price': 4321.0, 'latitude': 0.0,
+                                     'longitude': 0.0, 'owner_id': owner.id})
+                raise RuntimeError("abort")
+        assert self._buckets() == before
+
+    def test_histogram_endpoint(self, client, admin_token):
+        r = client.get('/api/v1/places/price-histogram?buckets=5')
+        assert r.status_code == 200
+        body = json.loads(r.data)
+        prices = [p.price for p in Place.query.all()]
+        assert body['total'] == len(prices) == sum(b['count'] for b in body['buckets'])
+        assert (body['min_price'], body['max_price']) == (min(prices), max(prices))
+        assert 1 <= len(body['buckets']) <= 5
+        for bucket in body['buckets']:
+            assert bucket['count'] == sum(1 for p in prices if bucket['min'] <= p < bucket['max'])
+        assert client.get('/api/v1/places/price-histogram?buckets=5',
+                          headers={'If-None-Match': r.headers['ETag']}).status_code == 304
+
+    def test_invalid_buckets(self, client):
+        for value in ('0', '101', 'many'):
+            assert client.get(f'/api/v1/places/price-histogram?buckets={value}').status_code == 400
+
+
+# ================================================================
+# PERF 21 — Reviewer summaries embedded in place reviews
+# ================================================================
+
+class TestReviewerSummaries:
+    REVIEWS = 30
+
+    @pytest.fixture
+    def reviewed_place(self, app, admin_token):
+        """A place with `REVIEWS` reviews, each by its own user"""
+        from datetime import datetime, timedelta, timezone
+        from sqlalchemy import delete, insert
+        owner = User.query.filter_by(email='admin@test.com').first()
+        place = Place(title='Reviewer summaries', price=10.0, latitude=0.0, longitude=0.0,
+                      owner_id=owner.id)
+        _db.session.add(place)
+        _db.session.commit()
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        _db.session.execute(insert(User), [
+            {'id': f'rs-u-{i}', 'first_name': f'Guest{i}', 'last_name': 'Reviewer',
+             'email': f'rs{i}@test.com', 'password': 'x'} for i in range(self.REVIEWS)])
+        _db.session.execute(insert(Review), [
+            {'id': f'rs-r-{i}', 'text': f'Stay {i}', 'rating': 4, 'place_id': place.id,
+             'user_id': f'rs-u-{i}', 'created_at': start + timedelta(days=i),
+             'updated_at': start + timedelta(days=i)} for i in range(self.REVIEWS)])
+        _db.session.commit()
+        yield place.id
+        _db.session.execute(delete(Review).where(Review.place_id == place.id))
+        _db.session.execute(delete(User).where(User.id.like('rs-u-%')))
+        _db.session.delete(place)
+        _db.session.commit()
+        clear_cache()
+
+    def test_reviews_embed_reviewer(self, client, reviewed_place):
+        r = client.get(f'/api/v1/places/{reviewed_place}/reviews?limit=5&sort=-created_at')
+        reviews = json.loads(r.data)
+        assert reviews[0]['user'] == {'id': f'rs-u-{self.REVIEWS - 1}',
+                                      'first_name': f'Guest{self.REVIEWS - 1}', 'last_name': 'Reviewer'}
+        assert all(rv['user']['id'] == rv['user_id'] for rv in reviews)
+
+    def test_one_query_for_reviews_and_reviewers(self, app, client, reviewed_place):
+        counts = []
+        for limit in (2, self.REVIEWS):
+            _db.session.expunge_all()
+            clear_cache()
+            with StatementCounter(_db.engine) as counter:
+                r = client.get(f'/api/v1/places/{reviewed_place}/reviews?limit={limit}')
+            assert len(json.loads(r.data)) == limit
+            counts.append(counter.count)
+        assert counts[0] == counts[1]
+
+    def test_detail_embeds_newest_page(self, app, client, reviewed_place):
+        app.config['PLACE_DETAIL_REVIEWS'] = 20
+        r = client.get(f'/api/v1/places/{reviewed_place}')
+        body = json.loads(r.data)
+        assert [rv['id'] for rv in body['reviews']] == [f'rs-r-{i}' for i in range(29, 9, -1)]
+        assert body['reviews'][0]['user']['first_name'] == 'Guest29'
+        cursor = r.headers['X-Reviews-Next-Cursor']
+        rest = json.loads(client.get(
+            f'/api/v1/places/{reviewed_place}/reviews?sort=-created_at&cursor={cursor}').data)
+        assert [rv['id'] for rv in rest] == [f'rs-r-{i}' for i in range(9, -1, -1)]
+
+    def test_reviewer_rename_changes_etags(self, client, reviewed_place):
+        from app.services import facade
+        urls = (f'/api/v1/places/{reviewed_place}', f'/api/v1/places/{reviewed_place}/reviews')
+        etags = [client.get(url).headers['ETag'] for url in urls]
+        facade.update_user('rs-u-25', {'first_name': 'Renamed'})
+        for url, etag in zip(urls, etags):
+            r = client.get(url, headers={'If-None-Match': etag})
+            assert r.status_code == 200
+            assert 'Renamed' in r.get_data(as_text=True)
+
+
+# ================================================================
+# PERF 22 — Multi-get (get_many) and ?ids= batch lookups
+# ================================================================
+
+class TestBatchLookups:
+
+    @pytest.fixture
+    def batch(self, app):
+        place_ids, amenity_id = _bulk_places(5, 'mg')
+        yield place_ids, amenity_id
+        _delete_bulk_places('mg', amenity_id)
+        clear_cache()
+
+    def test_get_many_order_and_missing(self, app, batch):
+        from app.services import facade
+        _db.session.expunge_all()
+        with StatementCounter(_db.engine) as counter:
+            users, missing = facade.user_repo.get_many(['mg-u-3', 'nope', 'mg-u-0', 'mg-u-3'])
+        assert counter.count == 1
+        assert [u.id for u in users] == ['mg-u-3', 'mg-u-0']
+        assert missing == ['nope']
+        assert facade.user_repo.get_many([]) == ([], [])
+
+    def test_amenity_validation_is_one_query(self, app, batch):
+        from app.services import facade
+        _, amenity_id = batch
+        others = [facade.create_amenity({'name': f'mg-extra-{i}'}).id for i in range(4)]
+        _db.session.expunge_all()
+        clear_cache()
+        with StatementCounter(_db.engine) as counter:
+            amenities = facade._get_amenities(others + [amenity_id])
+        assert counter.count == 1
+        assert [a.id for a in amenities] == others + [amenity_id]
+        with pytest.raises(ValueError, match='Amenity not found: missing-id'):
+            facade._get_amenities([others[0], 'missing-id'])
+        for amenity_id in others:
+            facade.delete_amenity(amenity_id)
+
+    def test_places_by_ids(self, client, batch):
+        place_ids, amenity_id = batch
+        r = client.get(f'/api/v1/places/?ids={place_ids[2]},unknown,{place_ids[1]}')
+        assert r.status_code == 200
+        body = json.loads(r.data)
+        assert [p['id'] for p in body] == [place_ids[2], place_ids[1]]
+        assert body[0]['owner']['id'] == 'mg-u-2'
+        assert body[0]['amenities'][0]['id'] == amenity_id
+        assert r.headers['X-Missing-Ids'] == 'unknown'
+        assert 'X-Next-Cursor' not in r.headers
+
+    def test_other_collections_by_ids(self, client, batch):
+        _, amenity_id = batch
+        users = json.loads(client.get('/api/v1/users/?ids=mg-u-4,mg-u-0&fields=id').data)
+        assert users == [{'id': 'mg-u-4'}, {'id': 'mg-u-0'}]
+        amenities = json.loads(client.get(f'/api/v1/amenities/?ids={amenity_id}').data)
+        assert [a['id'] for a in amenities] == [amenity_id]
+        r = client.get('/api/v1/reviews/?ids=no-such-review')
+        assert json.loads(r.data) == []
+        assert r.headers['X-Missing-Ids'] == 'no-such-review'
+
+    def test_batch_size_is_capped(self, app, client):
+        app.config['BATCH_IDS_MAX'] = 3
+        try:
+            assert client.get('/api/v1/users/?ids=a,b,c').status_code == 200
+            r = client.get('/api/v1/users/?ids=a,b,c,d')
+            assert r.status_code == 400
+            assert 'at most 3' in json.loads(r.data)['error']
+        finally:
+            app.config['BATCH_IDS_MAX'] = 100
+        assert client.get('/api/v1/users/?ids=,').status_code == 400
+
+    def test_batch_etag_follows_embedded_owner(self, client, batch):
+        from app.services import facade
+        place_ids, _ = batch
+        url = f'/api/v1/places/?ids={place_ids[0]},{place_ids[1]}'
+        etag = client.get(url).headers['ETag']
+        assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+        facade.update_user('mg-u-1', {'first_name': 'Renamed'})
+        r = client.get(url, headers={'If-None-Match': etag})
+        assert r.status_code == 200
+        assert json.loads(r.data)[1]['owner']['first_name'] == 'Renamed'
+
+
+# ================================================================
+# PERF 23 — Rank score (Bayesian average + review recency)
+# ================================================================
+
+class TestRankScore:
+    PARAMS = {'RANK_PRIOR_MEAN': 3.5, 'RANK_PRIOR_WEIGHT': 5,
+              'RANK_RECENCY_WEIGHT': 0.5, 'RANK_RECENCY_HALF_LIFE_DAYS': 90}
+
+    @pytest.fixture
+    def ranked(self, app, admin_token, user_token):
+        from app.services import facade
+        owner = User.query.filter_by(email='admin@test.com').first()
+        guest = User.query.filter_by(email='john@test.com').first()
+        place = facade.create_place({'title': 'Ranked', 'price': 10.0, 'latitude': 0.0,
+                                     'longitude': 0.0, 'owner_id': owner.id})
+        yield place.id, guest.id
+        for review in Review.query.filter_by(place_id=place.id).all():
+            facade.delete_review(review.id)
+        facade.delete_place(place.id)
+        clear_cache()
+
+    def test_score_formula(self):
+        from datetime import datetime, timedelta, timezone
+        from app.persistence.ranking import rank_score
+        now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        assert rank_score(0, 0, None, now, self.PARAMS) == 3.5
+        # One 5-star review does not beat fifty 4.8-star ones (same date)
+        one = rank_score(5, 1, now, now, self.PARAMS)
+        many = rank_score(240, 50, now, now, self.PARAMS)
+        assert many > one
+        # The recency bonus halves every half-life (stored datetimes are naive UTC)
+        fresh = rank_score(20, 4, now, now, self.PARAMS) - 37.5 / 9
+        old = rank_score(20, 4, (now - timedelta(days=90)).replace(tzinfo=None), now, self.PARAMS) - 37.5 / 9
+        assert fresh == pytest.approx(0.5)
+        assert old == pytest.approx(0.25)
+
+    def test_review_writes_update_score(self, app, ranked):
+        from app.services import facade
+        place_id, guest_id = ranked
+        place = _db.session.get(Place, place_id)
+        assert place.rank_score == 3.5
+        review = facade.create_review({'text': 'Great', 'rating': 5, 'user_id': guest_id,
+                                       'place_id': place_id})
+        place = _db.session.get(Place, place_id)
+        assert place.last_review_at is not None
+        assert place.rank_score == pytest.approx((17.5 + 5) / 6 + 0.5, abs=1e-4)
+        facade.update_review(review.id, {'rating': 1})
+        assert _db.session.get(Place, place_id).rank_score == pytest.approx((17.5 + 1) / 6 + 0.5, abs=1e-4)
+        facade.delete_review(review.id)
+        place = _db.session.get(Place, place_id)
+        assert place.last_review_at is None
+        assert place.rank_score == 3.5
+
+    def test_sort_by_rank(self, client, ranked):
+        from app.services import facade
+        place_id, guest_id = ranked
+        facade.create_review({'text': 'Top', 'rating': 5, 'user_id': guest_id, 'place_id': place_id})
+        r = client.get('/api/v1/places/?sort=-rank&limit=1000&fields=id')
+        assert r.status_code == 200
+        ids = [p['id'] for p in json.loads(r.data)]
+        assert place_id in ids
+        scores = [_db.session.get(Place, i).rank_score for i in ids]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_sort_by_rank_uses_index(self, app):
+        from sqlalchemy import text
+        plan = ' '.join(str(row) for row in _db.session.execute(text(
+            'EXPLAIN QUERY PLAN SELECT id FROM places ORDER BY rank_score DESC, id DESC LIMIT 10')))
+        assert 'ix_places_rank_score' in plan
+
+    def test_recompute_command(self, app, client, ranked):
+        from datetime import datetime, timedelta, timezone
+        from app.services import facade
+        place_id, guest_id = ranked
+        facade.create_review({'text': 'Old news', 'rating': 4, 'user_id': guest_id,
+                              'place_id': place_id})
+        # A review from a year ago: the recency bonus has nearly faded
+        _db.session.execute(Place.__table__.update().where(Place.id == place_id).values(
+            last_review_at=datetime.now(timezone.utc) - timedelta(days=365)))
+        _db.session.commit()
+        url = '/api/v1/places/?sort=-rank'
+        etag = client.get(url).headers['ETag']
+        result = app.test_cli_runner().invoke(args=['hbnb', 'recompute-rank'])
+        assert 'Updated the rank score of' in result.output
+        _db.session.expire_all()
+        place = _db.session.get(Place, place_id)
+        assert place.rank_score == pytest.approx((17.5 + 4) / 6 + 0.5 * 0.5 ** (365 / 90), abs=1e-4)
+        assert client.get(url, headers={'If-None-Match': etag}).status_code == 200
+
+    def test_recompute_keeps_updated_at(self, app, client, ranked):
+        from datetime import datetime, timedelta, timezone
+        from app.persistence import ranking
+        place_id, _ = ranked
+        _db.session.execute(Place.__table__.update().where(Place.id == place_id).values(rank_score=0.0))
+        _db.session.commit()
+        before = _db.session.get(Place, place_id).updated_at
+        detail = client.get(f'/api/v1/places/{place_id}')
+        assert ranking.recompute([place_id], datetime.now(timezone.utc) + timedelta(seconds=2)) == 1
+        _db.session.commit()
+        _db.session.expire_all()
+        place = _db.session.get(Place, place_id)
+        assert place.rank_score == pytest.approx(3.5)
+        assert place.updated_at == before
+        # Detail validators are untouched
+        r = client.get(f'/api/v1/places/{place_id}', headers={'If-None-Match': detail.headers['ETag']})
+        assert r.status_code == 304
+
+    def test_bulk_imported_reviews_are_ranked(self, client, admin_token, ranked):
+        place_id, guest_id = ranked
+        r = client.post('/api/v1/admin/bulk/reviews',
+                        data=_ndjson([{'text': 'Bulk', 'rating': 2, 'user_id': guest_id,
+                                       'place_id': place_id}]),
+                        content_type='application/x-ndjson',
+                        headers={'Authorization': f'Bearer {admin_token}'})
+        assert json.loads(r.data)['inserted'] == 1
+        _db.session.expire_all()
+        place = _db.session.get(Place, place_id)
+        assert place.last_review_at is not None
+        assert place.rank_score == pytest.approx((17.5 + 2) / 6 + 0.5, abs=1e-4)
+
+
+# ================================================================
+# PERF 24 — Per-request profiling (Server-Timing)
+# ================================================================
+
+class TestProfiling:
+
+    @pytest.fixture
+    def profiled_app(self, tmp_path):
+        class ProfilingConfig(app_config.TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'profile.db'}"
+            PROFILING_ENABLED = True
+
+        app = create_app(ProfilingConfig)
+        with app.app_context():
+            admin = User(first_name='Pro', last_name='File', email='profile@test.com',
+                         password='x', is_admin=True)
+            admin.hash_password('profile123')
+            _db.session.add(admin)
+            _db.session.flush()
+            place = Place(title='Profiled', price=10, latitude=0, longitude=0, owner_id=admin.id)
+            _db.session.add(place)
+            _db.session.commit()
+            yield app, place.id
+            _db.session.remove()
+            for engine in _db.engines.values():
+                engine.dispose()
+
+    @staticmethod
+    def _timings(response):
+        """{'sql': (dur, desc), ...} from the Server-Timing header"""
+        timings = {}
+        for metric in response.headers['Server-Timing'].split(', '):
+            name, *params = metric.split(';')
+            values = dict(p.split('=', 1) for p in params)
+            timings[name] = (float(values['dur']), values.get('desc', '').strip('"'))
+        return timings
+
+    def test_disabled_by_default(self, client):
+        assert 'Server-Timing' not in client.get('/api/v1/places/').headers
+
+    def test_server_timing_counts_statements(self, profiled_app):
+        app, place_id = profiled_app
+        client = app.test_client()
+        with StatementCounter(_db.engines[None]) as counter:
+            r = client.get(f'/api/v1/places/{place_id}')
+        timings = self._timings(r)
+        assert timings['sql'][1] == f'{counter.count} statements'
+        assert 'serialize' in timings
+        assert timings['total'][0] >= timings['sql'][0]
+        assert 'bcrypt' not in timings
+
+    def test_login_reports_bcrypt(self, profiled_app):
+        app, _ = profiled_app
+        r = app.test_client().post('/api/v1/auth/login', content_type='application/json',
+                                   data=json.dumps({'email': 'profile@test.com', 'password': 'profile123'}))
+        assert r.status_code == 200
+        assert self._timings(r)['bcrypt'][0] > 0
+
+    def test_totals_per_endpoint(self, profiled_app):
+        app, place_id = profiled_app
+        client = app.test_client()
+        token = json.loads(client.post('/api/v1/auth/login', content_type='application/json',
+                                       data=json.dumps({'email': 'profile@test.com',
+                                                        'password': 'profile123'})).data)['access_token']
+        auth = {'Authorization': f'Bearer {token}'}
+        client.delete('/api/v1/admin/profile', headers=auth)
+        for _ in range(3):
+            client.get(f'/api/v1/places/{place_id}')
+        body = json.loads(client.get('/api/v1/admin/profile', headers=auth).data)
+        assert body['enabled'] is True
+        stats = body['endpoints']['GET /api/v1/places/<place_id>']
+        assert stats['requests'] == 3
+        assert stats['avg_sql_count'] == stats['sql_count'] / 3
+
+    def test_nested_spans_count_once(self, app):
+        import time as _time
+        from app.utils import profiling
+        profile = profiling.RequestProfile()
+        token = profiling._current.set(profile)
+        try:
+            with profiling.span('serialize'):
+                with profiling.span('serialize'):
+                    _time.sleep(0.01)
+        finally:
+            profiling._current.reset(token)
+        assert 0.01 <= profile.seconds['serialize'] < 0.02
+        assert isinstance(profiling.span('serialize'), type(profiling._NO_SPAN))
+
+
+# ================================================================
+# PERF 25 — Prometheus metrics
+# ================================================================
+
+def _metric(text, series):
+    """Value of one series in a /metrics body, 0 if absent"""
+    for line in text.splitlines():
+        if line.startswith(series + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return 0.0
+
+
+class TestMetrics:
+
+    def _scrape(self, client):
+        r = client.get('/metrics')
+        assert r.status_code == 200
+        assert r.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+        return r.get_data(as_text=True)
+
+    def test_request_latency_by_route(self, client):
+        series = ('hbnb_http_request_duration_seconds_count'
+                  '{namespace="places",route="/api/v1/places/",method="GET",status="200"}')
+        before = _metric(self._scrape(client), series)
+        client.get('/api/v1/places/')
+        text = self._scrape(client)
+        assert _metric(text, series) == before + 1
+        assert _metric(text, series.replace('_count{', '_bucket{').replace('}', ',le="+Inf"}')) == before + 1
+        assert '# TYPE hbnb_http_request_duration_seconds histogram' in text
+
+    def test_unmatched_urls_share_one_route(self, client):
+        client.get('/nowhere/abc123')
+        text = self._scrape(client)
+        assert 'abc123' not in text
+        assert _metric(text, 'hbnb_http_request_duration_seconds_count'
+                             '{namespace="other",route="<unmatched>",method="GET",status="404"}') >= 1
+
+    def test_in_flight_counts_the_scrape(self, client):
+        text = self._scrape(client)
+        assert _metric(text, 'hbnb_http_requests_in_flight{namespace="other"}') == 1
+        assert _metric(text, 'hbnb_http_requests_in_flight{namespace="places"}') == 0
+
+    def test_logins_and_bcrypt(self, client):
+        text = self._scrape(client)
+        failures = _metric(text, 'hbnb_logins_total{outcome="failure"}')
+        checks = _metric(text, 'hbnb_bcrypt_duration_seconds_count{operation="check"}')
+        client.post('/api/v1/auth/login', content_type='application/json',
+                    data=json.dumps({'email': 'admin@test.com', 'password': 'wrong'}))
+        text = self._scrape(client)
+        assert _metric(text, 'hbnb_logins_total{outcome="failure"}') == failures + 1
+        assert _metric(text, 'hbnb_bcrypt_duration_seconds_count{operation="check"}') == checks + 1
+
+    def test_cache_hit_ratio(self, client, app):
+        with app.app_context():
+            from app.persistence.cache import get_cache
+            stats = get_cache().stats.as_dict()
+            backend = get_cache().name
+        text = self._scrape(client)
+        assert _metric(text, f'hbnb_cache_hits_total{{backend="{backend}"}}') == stats['hits']
+        assert 0 <= _metric(text, f'hbnb_cache_hit_ratio{{backend="{backend}"}}') <= 1
+
+    def test_pool_gauges(self, tmp_path):
+        class PooledConfig(app_config.TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'pool.db'}"
+            DB_POOL_SIZE = 3
+
+        app = create_app(PooledConfig)
+        try:
+            text = app.test_client().get('/metrics').get_data(as_text=True)
+            assert _metric(text, 'hbnb_db_pool_size{engine="primary"}') == 3
+            assert _metric(text, 'hbnb_db_pool_overflow{engine="primary"}') == 0
+            assert 'hbnb_db_pool_checked_out{engine="primary"}' in text
+        finally:
+            with app.app_context():
+                _db.session.remove()
+                for engine in _db.engines.values():
+                    engine.dispose()
+
+    def test_disabled(self):
+        class NoMetricsConfig(app_config.TestingConfig):
+            METRICS_ENABLED = False
+
+        app = create_app(NoMetricsConfig)
+        assert app.test_client().get('/metrics').status_code == 404
+
+    def test_token(self):
+        class TokenConfig(app_config.TestingConfig):
+            METRICS_TOKEN = 's3cret'
+
+        client = create_app(TokenConfig).test_client()
+        r = client.get('/metrics')
+        assert r.status_code == 401
+        assert r.headers['WWW-Authenticate'].startswith('Bearer')
+        assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+        r = client.get('/metrics', headers={'Authorization': 'Bearer s3cret'})
+        assert r.status_code == 200
+        assert 'hbnb_http_requests_in_flight' in r.get_data(as_text=True)
+
+    def test_off_by_default_in_production(self):
+        import os
+        if 'METRICS_ENABLED' in os.environ:
+            pytest.skip('METRICS_ENABLED is set in the environment')
+        assert app_config.ProductionConfig.METRICS_ENABLED is False
+        assert app_config.DevelopmentConfig.METRICS_ENABLED is True
+
+    def test_per_thread_counters_are_merged(self):
+        import threading
+        from app.utils.metrics import LOGINS, MetricsRegistry
+        registry = MetricsRegistry()
+
+        def work():
+            for _ in range(1000):
+                registry.inc(LOGINS, ('success',))
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert registry.collect()[('hbnb_logins_total', ('success',))] == 8000
+        # Finished threads were folded into the retired totals
+        assert registry._shards == []
+        registry.inc(LOGINS, ('success',))
+        assert registry.collect()[('hbnb_logins_total', ('success',))] == 8001
+        assert len(registry._shards) == 1
+
+    def test_multiprocess_directory(self, tmp_path):
+        import os
+        import subprocess
+        import sys
+        from app.utils.metrics import IN_FLIGHT, LOGINS, MetricsRegistry
+        # Another worker: counts 3 logins with 2 requests in flight, then exits
+        script = ("from app.utils.metrics import IN_FLIGHT, LOGINS, MetricsRegistry\n"
+                  f"r = MetricsRegistry({str(tmp_path)!r})\n"
+                  "r.inc(LOGINS, ('success',), 3)\n"
+                  "r.inc(IN_FLIGHT, ('places',), 2)\n")
+        backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        subprocess.run([sys.executable, '-c', script], check=True, cwd=backend_dir)
+        registry = MetricsRegistry(str(tmp_path))
+        registry.inc(LOGINS, ('success',))
+        registry.inc(IN_FLIGHT, ('places',))
+        samples = registry.collect()
+        assert samples[('hbnb_logins_total', ('success',))] == 4
+        # Gauges of exited workers are dropped
+        assert samples[('hbnb_http_requests_in_flight', ('places',))] == 1
+        assert len(list(tmp_path.glob('metrics-*.json'))) == 2
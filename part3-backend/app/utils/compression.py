@@ -0,0 +1,139 @@
+#!/usr/bin/python3
+"""
+Response compression, negotiated from Accept-Encoding.
+
+JSON, NDJSON and text responses are compressed with brotli ('br', when
+the brotli package is installed) or gzip, whichever the client prefers:
+
+    - bodies under COMPRESS_MIN_SIZE bytes are sent as they are (headers
+      and CPU would cost more than the bytes saved),
+    - streamed responses (the NDJSON export) are compressed block by block
+      and flushed, so the client still receives rows as they are read,
+    - a GET answered with an ETag is compressed once: the bytes are kept
+      in an LRU keyed by URL, ETag and encoding, and every later request
+      for the same version reuses them.
+
+Must run after every after_request hook that may replace the response
+(the unit of work turns a failed commit into a 500): Flask runs the hooks
+in reverse order of registration, so init_app is called before those
+are registered. Only CORS, metrics and profiling register earlier; their
+hooks run after compression and just add headers or record the request.
+"""
+import zlib
+from flask import current_app, request
+from app.persistence.cache import LRUCache, NullCache
+
+try:
+    import brotli
+except ImportError:  # optional, gzip only without it
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'application/javascript',
+                          'text/html', 'text/plain', 'text/css', 'text/csv')
+
+
+class GzipCompressor:
+    def __init__(self, level=6):
+        # wbits=31 -> gzip container
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._z.compress(data)
+
+    def flush(self):
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._z.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, quality=5):
+        self._c = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._c.process(data)
+
+    def flush(self):
+        return self._c.flush()
+
+    def finish(self):
+        return self._c.finish()
+
+
+def available_encodings():
+    """Supported encodings, preferred first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate(accept_encodings):
+    """Encoding to use for a request's Accept-Encoding, or None for identity"""
+    return accept_encodings.best_match(available_encodings())
+
+
+def make_compressor(encoding, config):
+    if encoding == 'br':
+        return BrotliCompressor(config.get('COMPRESS_BROTLI_QUALITY', 5))
+    return GzipCompressor(config.get('COMPRESS_GZIP_LEVEL', 6))
+
+
+def compress(data, encoding, config):
+    compressor = make_compressor(encoding, config)
+    return compressor.compress(data) + compressor.finish()
+
+
+def compress_stream(blocks, compressor):
+    """Compress an iterable of blocks, flushing after each one"""
+    for block in blocks:
+        if isinstance(block, str):
+            block = block.encode('utf-8')
+        data = compressor.compress(block) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def compress_response(response):
+    """after_request hook"""
+    config = current_app.config
+    if (not config.get('COMPRESS_ENABLED', True)
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or 'Content-Encoding' in response.headers
+            or not 200 <= response.status_code < 300 or response.status_code in (204, 206)
+            or request.method == 'HEAD'):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_stream(response.response, make_compressor(encoding, config))
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < config.get('COMPRESS_MIN_SIZE', 1024):
+            return response
+        etag = response.headers.get('ETag')
+        cache = get_compression_cache()
+        key = (request.full_path, etag, encoding)
+        data = cache.get(key) if etag and request.method == 'GET' else None
+        if data is None:
+            data = compress(body, encoding, config)
+            if etag and request.method == 'GET':
+                cache.set(key, data)
+        response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_app(app):
+    """Call before registering the after_request hooks that may replace the response"""
+    entries = app.config.get('COMPRESS_CACHE_ENTRIES', 256)
+    app.extensions['compression_cache'] = (
+        LRUCache(entries, app.config.get('COMPRESS_CACHE_TTL', 300)) if entries else NullCache())
+    app.after_request(compress_response)
+
+
+def get_compression_cache():
+    return current_app.extensions['compression_cache']
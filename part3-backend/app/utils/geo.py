@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+"""
+Geohash helpers for place search.
+A geohash interleaves longitude/latitude bits into a base32 string: places
+that share a prefix are in the same grid cell, so "all places in this cell"
+becomes an indexed range scan on the geohash column.
+"""
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+# Precision stored on Place.geohash (~4.8m x 4.8m cells)
+GEOHASH_PRECISION = 9
+# Upper bound on the number of cells (range scans) used to cover a search area
+MAX_COVERING_CELLS = 16
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Return the geohash of a point."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """Return (lat_degrees, lon_degrees) covered by one cell at a precision."""
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = math.floor(precision * 5 / 2)
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def _cells_for_box(min_lat, min_lon, max_lat, max_lon, precision):
+    """All cells of a precision intersecting a (non-wrapping) box."""
+    lat_step, lon_step = cell_size(precision)
+    cells = set()
+    lat = min_lat
+    while True:
+        lon = min_lon
+        while True:
+            cells.add(encode(min(lat, max_lat), min(lon, max_lon), precision))
+            if lon >= max_lon:
+                break
+            lon += lon_step
+        if lat >= max_lat:
+            break
+        lat += lat_step
+    return cells
+
+
+def split_antimeridian(min_lat, min_lon, max_lat, max_lon):
+    """Split a box crossing the 180th meridian into boxes that do not."""
+    if min_lon <= max_lon:
+        return [(min_lat, min_lon, max_lat, max_lon)]
+    return [(min_lat, min_lon, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon)]
+
+
+def covering_prefixes(boxes, max_cells=MAX_COVERING_CELLS):
+    """
+    Return the geohash prefixes whose cells cover all the boxes, using the
+    finest precision that needs at most max_cells cells.
+    """
+    best = None
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        lat_step, lon_step = cell_size(precision)
+        # Cheap estimate first, so huge areas never enumerate fine cells
+        estimate = sum((math.floor((b[2] - b[0]) / lat_step) + 2) *
+                       (math.floor((b[3] - b[1]) / lon_step) + 2) for b in boxes)
+        if estimate > max_cells * 4:
+            break
+        cells = set()
+        for box in boxes:
+            cells |= _cells_for_box(*box, precision)
+        if len(cells) > max_cells:
+            break
+        best = cells
+    return sorted(best) if best is not None else ['']
+
+
+def radius_to_boxes(latitude, longitude, radius_km):
+    """Bounding boxes (split at the antimeridian) containing a circle."""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    min_lat, max_lat = max(-90.0, latitude - dlat), min(90.0, latitude + dlat)
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if max_lat >= 90.0 or min_lat <= -90.0 or cos_lat < 1e-6:
+        return [(min_lat, -180.0, max_lat, 180.0)]
+    dlon = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+    if dlon >= 180.0:
+        return [(min_lat, -180.0, max_lat, 180.0)]
+    min_lon, max_lon = longitude - dlon, longitude + dlon
+    if min_lon < -180.0:
+        min_lon += 360.0
+    if max_lon > 180.0:
+        max_lon -= 360.0
+    return split_antimeridian(min_lat, min_lon, max_lat, max_lon)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
@@ -0,0 +1,395 @@
+#!/usr/bin/python3
+"""
+Prometheus metrics, served at GET /metrics in the text exposition format.
+
+    hbnb_http_request_duration_seconds{namespace,route,method,status}  histogram
+    hbnb_http_requests_in_flight{namespace}                             gauge
+    hbnb_db_pool_size / _checked_out / _overflow{engine}                gauges
+    hbnb_cache_hits_total / _misses_total{backend}                      counters
+    hbnb_cache_hit_ratio{backend}                                       gauge
+    hbnb_bcrypt_duration_seconds{operation}                             histogram
+    hbnb_logins_total{outcome}                                          counter
+
+Routes are URL rules ("/api/v1/places/<place_id>"), never raw paths, so
+the number of series stays bounded; unmatched URLs share "<unmatched>".
+
+Recording takes no lock: each thread adds to its own shard, a dict only
+that thread writes, and a scrape adds the shards up. The shard of a
+finished thread is folded into a shared total when the next thread
+starts recording or at the next scrape, so a thread-per-request server
+keeps one shard per live thread. Pool and cache values are read at
+scrape time.
+
+Each worker process (gunicorn -w N) counts its own requests. With
+METRICS_MULTIPROC_DIR set, every worker writes its totals to
+<dir>/metrics-<pid>.json at most every METRICS_FLUSH_INTERVAL seconds
+(and when it exits), and a scrape, whichever worker answers it, adds up
+every file. Counters and histograms of exited workers are kept, their
+gauges dropped. Empty the directory before starting the server.
+
+The endpoint is off by default in ProductionConfig. With METRICS_TOKEN
+set, a scrape must send "Authorization: Bearer <token>" (401 otherwise).
+"""
+import atexit
+import glob
+import hmac
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from flask import Response, current_app, has_app_context, request
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BCRYPT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class Metric:
+    """Name, type and label names of a metric"""
+
+    def __init__(self, name, kind, doc, labels, buckets=None):
+        self.name = name
+        self.kind = kind
+        self.doc = doc
+        self.labels = labels
+        self.buckets = buckets
+
+
+# Exposition order
+METRICS = {m.name: m for m in (
+    Metric('hbnb_http_request_duration_seconds', 'histogram', 'Time to answer a request',
+           ('namespace', 'route', 'method', 'status'), LATENCY_BUCKETS),
+    Metric('hbnb_http_requests_in_flight', 'gauge', 'Requests being answered', ('namespace',)),
+    Metric('hbnb_db_pool_size', 'gauge', 'Connections kept in the pool', ('engine',)),
+    Metric('hbnb_db_pool_checked_out', 'gauge', 'Pool connections in use', ('engine',)),
+    Metric('hbnb_db_pool_overflow', 'gauge', 'Connections open beyond the pool size', ('engine',)),
+    Metric('hbnb_cache_hits_total', 'counter', 'Entity cache hits', ('backend',)),
+    Metric('hbnb_cache_misses_total', 'counter', 'Entity cache misses', ('backend',)),
+    Metric('hbnb_cache_hit_ratio', 'gauge', 'Entity cache hits / lookups', ('backend',)),
+    Metric('hbnb_bcrypt_duration_seconds', 'histogram', 'Time to hash or check a password',
+           ('operation',), BCRYPT_BUCKETS),
+    Metric('hbnb_logins_total', 'counter', 'Login attempts by outcome', ('outcome',)),
+)}
+REQUEST_DURATION = METRICS['hbnb_http_request_duration_seconds']
+IN_FLIGHT = METRICS['hbnb_http_requests_in_flight']
+BCRYPT_DURATION = METRICS['hbnb_bcrypt_duration_seconds']
+LOGINS = METRICS['hbnb_logins_total']
+
+
+def _add(samples, key, value):
+    current = samples.get(key)
+    if current is None:
+        samples[key] = list(value) if isinstance(value, list) else value
+    elif isinstance(value, list):
+        if len(value) == len(current):  # bucket bounds changed between releases
+            samples[key] = [a + b for a, b in zip(current, value)]
+    else:
+        samples[key] = current + value
+
+
+class MetricsRegistry:
+    """
+    Samples of one process: {(metric name, label values): value}, where a
+    histogram value is [count per bucket..., count above the last, sum].
+    """
+
+    def __init__(self, multiproc_dir=None, flush_interval=5):
+        self.multiproc_dir = multiproc_dir
+        self.flush_interval = flush_interval
+        self.collectors = []  # callables returning samples read at scrape time
+        self._local = threading.local()
+        self._shards = []  # (thread, shard) of the threads that recorded
+        self._retired = {}  # shards of finished threads, added up
+        self._lock = threading.Lock()  # shard list only
+        self._flush_lock = threading.Lock()
+        self._flushed_at = 0.0
+        self._collected = {}  # last collector samples written to the shared directory
+        if multiproc_dir:
+            os.makedirs(multiproc_dir, exist_ok=True)
+            atexit.register(self.flush, force=True, collect=False)
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._prune()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _prune(self):
+        # Call with _lock held. A finished thread never writes its shard again
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                for key, value in shard.items():
+                    _add(self._retired, key, value)
+        self._shards = live
+
+    def inc(self, metric, labels, amount=1):
+        shard = self._shard()
+        key = (metric.name, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def observe(self, metric, labels, value):
+        shard = self._shard()
+        key = (metric.name, labels)
+        counts = shard.get(key)
+        if counts is None:
+            counts = shard[key] = [0] * (len(metric.buckets) + 2)
+        counts[bisect_left(metric.buckets, value)] += 1
+        counts[-1] += value
+
+    def snapshot(self, collect=True):
+        """This process's samples: the shards added up, then the collectors"""
+        samples = {}
+        with self._lock:
+            self._prune()
+            shards = [shard for _, shard in self._shards]
+            for key, value in self._retired.items():
+                _add(samples, key, value)
+        for shard in shards:
+            # dict.copy() runs under the GIL: never sees a half-inserted key
+            for key, value in shard.copy().items():
+                _add(samples, key, value)
+        collected = {}
+        if collect:
+            for collector in self.collectors:
+                collected.update(collector())
+        else:
+            collected = self._collected
+        samples.update(collected)
+        return samples, collected
+
+    def flush(self, force=False, collect=True):
+        """Write this process's samples to the shared directory, at most every flush_interval"""
+        if not self.multiproc_dir:
+            return
+        if not force and time.monotonic() - self._flushed_at < self.flush_interval:
+            return
+        if not self._flush_lock.acquire(blocking=force):
+            return  # another thread is writing them
+        try:
+            self._flushed_at = time.monotonic()
+            samples, self._collected = self.snapshot(collect)
+            pid = os.getpid()  # not cached: workers may be forked after create_app
+            path = os.path.join(self.multiproc_dir, f'metrics-{pid}.json')
+            with open(path + '.tmp', 'w') as f:
+                json.dump({'pid': pid, 'samples': [[name, list(labels), value]
+                                                   for (name, labels), value in samples.items()]}, f)
+            os.replace(path + '.tmp', path)
+        finally:
+            self._flush_lock.release()
+
+    def collect(self):
+        """Samples of every process (with a shared directory) or of this one"""
+        if not self.multiproc_dir:
+            samples = self.snapshot()[0]
+        else:
+            self.flush(force=True)
+            samples = {}
+            for path in glob.glob(os.path.join(self.multiproc_dir, 'metrics-*.json')):
+                try:
+                    with open(path) as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                alive = _alive(data['pid'])
+                for name, labels, value in data['samples']:
+                    metric = METRICS.get(name)
+                    if metric is None or (metric.kind == 'gauge' and not alive):
+                        continue
+                    _add(samples, (name, tuple(labels)), value)
+        for (name, labels), hits in list(samples.items()):
+            if name == 'hbnb_cache_hits_total':
+                lookups = hits + samples.get(('hbnb_cache_misses_total', labels), 0)
+                samples[('hbnb_cache_hit_ratio', labels)] = hits / lookups if lookups else 0.0
+        return samples
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# ------------------- Exposition -------------------
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _series(name, names, values):
+    if not names:
+        return name
+    return name + '{' + ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+def render(samples):
+    """Samples as the Prometheus text exposition format"""
+    by_name = {}
+    for (name, labels), value in samples.items():
+        by_name.setdefault(name, []).append((labels, value))
+    lines = []
+    for metric in METRICS.values():
+        lines.append(f'# HELP {metric.name} {metric.doc}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        for labels, value in sorted(by_name.get(metric.name, ()), key=lambda row: row[0]):
+            if metric.kind != 'histogram':
+                lines.append(f'{_series(metric.name, metric.labels, labels)} {_number(value)}')
+                continue
+            cumulative = 0
+            names = metric.labels + ('le',)
+            for bound, count in zip(metric.buckets + (float('inf'),), value[:-1]):
+                cumulative += count
+                lines.append(f'{_series(metric.name + "_bucket", names, labels + (_number(bound),))} '
+                             f'{_number(cumulative)}')
+            lines.append(f'{_series(metric.name + "_sum", metric.labels, labels)} {_number(value[-1])}')
+            lines.append(f'{_series(metric.name + "_count", metric.labels, labels)} {_number(cumulative)}')
+    return '\n'.join(lines) + '\n'
+
+
+# ------------------- Recording helpers -------------------
+def get_metrics():
+    """The current app's registry; None outside an app or when disabled"""
+    return current_app.extensions.get('metrics') if has_app_context() else None
+
+
+def inc(metric, *labels):
+    registry = get_metrics()
+    if registry is not None:
+        registry.inc(metric, labels)
+
+
+class _Timer:
+    def __init__(self, registry, metric, labels):
+        self.registry = registry
+        self.metric = metric
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.metric, self.labels, time.perf_counter() - self.started)
+
+
+class _NoTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NO_TIMER = _NoTimer()
+
+
+def timed(metric, *labels):
+    """Context manager observing its duration in a histogram"""
+    registry = get_metrics()
+    if registry is None:
+        return _NO_TIMER
+    return _Timer(registry, metric, labels)
+
+
+# ------------------- Collected at scrape time -------------------
+def _pool_samples():
+    from app.extensions import db  # app.extensions imports this module (passwords.py)
+    engines = {'primary': db.engine, **current_app.extensions.get('replica_engines', {})}
+    samples = {}
+    for name, engine in engines.items():
+        pool = engine.pool
+        if not hasattr(pool, 'checkedout'):
+            continue  # in-memory SQLite: one shared connection, no pool
+        samples[('hbnb_db_pool_size', (name,))] = pool.size()
+        samples[('hbnb_db_pool_checked_out', (name,))] = pool.checkedout()
+        # QueuePool counts from -pool_size until the pool is full
+        samples[('hbnb_db_pool_overflow', (name,))] = max(pool.overflow(), 0)
+    return samples
+
+
+def _cache_samples():
+    from app.persistence.cache import get_cache
+    cache = get_cache()
+    stats = cache.stats.as_dict()
+    return {('hbnb_cache_hits_total', (cache.name,)): stats['hits'],
+            ('hbnb_cache_misses_total', (cache.name,)): stats['misses']}
+
+
+# ------------------- Request lifecycle -------------------
+def _route():
+    """(namespace, route) of the current request"""
+    if request.url_rule is None:
+        return 'other', '<unmatched>'
+    rule = request.url_rule.rule
+    parts = rule.split('/')
+    # /api/v1/<namespace>/...
+    namespace = parts[3] if len(parts) > 3 and parts[1:3] == ['api', 'v1'] and parts[3] else 'other'
+    return namespace, rule
+
+
+def _start_request():
+    namespace, route = _route()
+    # [started, namespace, route, status]; 500 unless a response is built
+    request.environ['hbnb.metrics'] = [time.perf_counter(), namespace, route, 500]
+    current_app.extensions['metrics'].inc(IN_FLIGHT, (namespace,))
+
+
+def _record_status(response):
+    state = request.environ.get('hbnb.metrics')
+    if state is not None:
+        state[3] = response.status_code
+    return response
+
+
+def _end_request(exc):
+    state = request.environ.pop('hbnb.metrics', None)
+    if state is None:
+        return
+    started, namespace, route, status = state
+    registry = current_app.extensions['metrics']
+    registry.inc(IN_FLIGHT, (namespace,), -1)
+    registry.observe(REQUEST_DURATION, (namespace, route, request.method, str(status)),
+                     time.perf_counter() - started)
+    registry.flush()
+
+
+def _scrape():
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', '').encode('utf-8'),
+                                         f'Bearer {token}'.encode('utf-8')):
+        return Response('Unauthorized\n', status=401, content_type='text/plain; charset=utf-8',
+                        headers={'WWW-Authenticate': 'Bearer realm="metrics"'})
+    return Response(render(get_metrics().collect()), content_type=CONTENT_TYPE)
+
+
+def init_app(app):
+    """
+    Register the hooks and GET /metrics (config METRICS_ENABLED, METRICS_TOKEN).
+    Call first: the latency then covers the other request hooks.
+    """
+    if not app.config.get('METRICS_ENABLED', True):
+        app.extensions['metrics'] = None
+        return
+    registry = MetricsRegistry(app.config.get('METRICS_MULTIPROC_DIR'),
+                               app.config.get('METRICS_FLUSH_INTERVAL', 5))
+    registry.collectors += [_pool_samples, _cache_samples]
+    app.extensions['metrics'] = registry
+    app.before_request(_start_request)
+    app.after_request(_record_status)
+    app.teardown_request(_end_request)
+    app.add_url_rule('/metrics', 'metrics', _scrape)
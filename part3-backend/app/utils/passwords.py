@@ -0,0 +1,127 @@
+#!/usr/bin/python3
+"""
+bcrypt password hashing with a configurable cost, optionally run on a
+bounded process pool.
+
+Config (read from the current app on every call):
+    BCRYPT_LOG_ROUNDS      — bcrypt cost (work factor), 2^rounds iterations
+    PASSWORD_HASH_WORKERS  — processes in the pool; 0 (default) hashes on the
+                             request thread, bcrypt releases the GIL meanwhile
+    PASSWORD_HASH_QUEUE    — hashes allowed in flight at once; further
+                             requests wait for a free slot
+"""
+import atexit
+import multiprocessing
+import secrets
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import bcrypt
+from flask import current_app, has_app_context
+from app.utils.metrics import BCRYPT_DURATION, timed
+from app.utils.profiling import span
+
+DEFAULT_ROUNDS = 12
+
+
+# ------------------- Run in the worker processes -------------------
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check(hashed, password):
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    except ValueError:
+        # Not a bcrypt hash, or a password bcrypt cannot take
+        return False
+
+
+def _pool_context():
+    # Never fork: the pool starts inside a threaded server, and a forked
+    # child would inherit locks held by the other threads
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def hash_rounds(hashed):
+    """Cost a bcrypt hash was made with ('$2b$12$...' -> 12), None if unknown"""
+    try:
+        return int(hashed.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """Hash and verify passwords with the current app's bcrypt settings"""
+
+    def __init__(self):
+        self._pool = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self._dummies = {}  # rounds -> hash of a random password
+        atexit.register(self.shutdown)
+
+    def _config(self, key, default):
+        return current_app.config.get(key, default) if has_app_context() else default
+
+    @property
+    def rounds(self):
+        return self._config('BCRYPT_LOG_ROUNDS', DEFAULT_ROUNDS)
+
+    def _run(self, fn, *args):
+        workers = self._config('PASSWORD_HASH_WORKERS', 0)
+        if not workers:
+            return fn(*args)
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=workers,
+                                                 mp_context=_pool_context())
+                self._slots = threading.BoundedSemaphore(
+                    self._config('PASSWORD_HASH_QUEUE', workers * 4))
+            pool, slots = self._pool, self._slots
+        with slots:
+            try:
+                return pool.submit(fn, *args).result()
+            except BrokenProcessPool:
+                # A worker died: start a new pool next time, hash inline now
+                self.shutdown()
+                return fn(*args)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def hash(self, password):
+        """bcrypt hash (str) of password with the configured cost"""
+        with span('bcrypt'), timed(BCRYPT_DURATION, 'hash'):
+            return self._run(_hash, password, self.rounds)
+
+    def check(self, hashed, password):
+        """True if password matches the stored hash"""
+        with span('bcrypt'), timed(BCRYPT_DURATION, 'check'):
+            return self._run(_check, hashed, password)
+
+    def needs_rehash(self, hashed):
+        """True if the hash was made with another cost than the configured one"""
+        return hash_rounds(hashed) != self.rounds
+
+    def init_app(self, app):
+        """
+        Compute the dummy hash for the app's cost at startup: built on the
+        first unknown email instead, that lookup would cost one more hash.
+        """
+        rounds = app.config.get('BCRYPT_LOG_ROUNDS', DEFAULT_ROUNDS)
+        with self._lock:
+            if rounds not in self._dummies:
+                self._dummies[rounds] = _hash(secrets.token_urlsafe(16), rounds)
+
+    def dummy_hash(self):
+        """
+        Hash of a random password with the configured cost (see init_app).
+        Checking a password against it costs exactly what a real check
+        costs, and never matches.
+        """
+        return self._dummies[self.rounds]
@@ -0,0 +1,196 @@
+#!/usr/bin/python3
+"""
+Opt-in per-request profiling (config PROFILING_ENABLED).
+
+For every request the profile records:
+    sql        — number of statements and time spent in them (engine events)
+    serialize  — building and encoding the response body (lazy loads it
+                 triggers are counted here and under sql)
+    bcrypt     — hashing and checking passwords
+    total      — before_request to after_request
+
+and returns it in a Server-Timing header, e.g.
+
+    Server-Timing: sql;desc="3 statements";dur=1.8, serialize;dur=0.6, total;dur=4.1
+
+which the browser dev tools show next to the request. The numbers are
+also added up per endpoint ("GET /api/v1/places/<place_id>") and served
+by GET /api/v1/admin/profile.
+
+When disabled, nothing is registered: no engine listener and no request
+hook. The span() calls left in the serializers and the password
+hasher then cost one ContextVar lookup.
+"""
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from flask import current_app, request
+from sqlalchemy import event
+
+_current = ContextVar('hbnb_profile', default=None)
+_NO_SPAN = nullcontext()
+# Server-Timing metrics, in header order
+SPANS = ('serialize', 'bcrypt')
+
+
+class RequestProfile:
+    """Timings of the request being handled"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.seconds = dict.fromkeys(SPANS, 0.0)
+        self._open = set()
+
+    def total_seconds(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total):
+        parts = [f'sql;desc="{self.sql_count} statements";dur={self.sql_seconds * 1000:.1f}']
+        parts += [f'{name};dur={self.seconds[name] * 1000:.1f}' for name in SPANS if self.seconds[name]]
+        parts.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(parts)
+
+
+class _Span:
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+        self.outer = False
+
+    def __enter__(self):
+        # Nested spans of the same name (a serializer dumping nested
+        # objects) are counted once, by the outermost
+        if self.name not in self.profile._open:
+            self.profile._open.add(self.name)
+            self.outer = True
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.outer:
+            self.profile.seconds[self.name] += time.perf_counter() - self.started
+            self.profile._open.discard(self.name)
+
+
+def span(name):
+    """Context manager timing a part of the current request under name (one of SPANS)"""
+    profile = _current.get()
+    if profile is None:
+        return _NO_SPAN
+    return _Span(profile, name)
+
+
+class EndpointStats:
+    """Thread-safe totals per endpoint"""
+    FIELDS = ('requests', 'sql_count', 'sql_ms', 'serialize_ms', 'bcrypt_ms', 'total_ms')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+    def record(self, endpoint, profile, total):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = dict.fromkeys(self.FIELDS, 0)
+                stats['max_total_ms'] = 0.0
+            stats['requests'] += 1
+            stats['sql_count'] += profile.sql_count
+            stats['sql_ms'] += profile.sql_seconds * 1000
+            stats['serialize_ms'] += profile.seconds['serialize'] * 1000
+            stats['bcrypt_ms'] += profile.seconds['bcrypt'] * 1000
+            stats['total_ms'] += total * 1000
+            stats['max_total_ms'] = max(stats['max_total_ms'], total * 1000)
+
+    def as_dict(self):
+        """{endpoint: totals and per-request averages}, most total time first"""
+        with self._lock:
+            endpoints = {name: dict(stats) for name, stats in self._endpoints.items()}
+        result = {}
+        for name, stats in sorted(endpoints.items(), key=lambda item: -item[1]['total_ms']):
+            count = stats['requests']
+            result[name] = {
+                **{k: round(v, 3) if isinstance(v, float) else v for k, v in stats.items()},
+                'avg_sql_count': round(stats['sql_count'] / count, 2),
+                'avg_total_ms': round(stats['total_ms'] / count, 3),
+            }
+        return result
+
+
+# ------------------- SQL statements -------------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault('profile_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    started = conn.info.get('profile_started')
+    if profile is None or not started:
+        return
+    profile.sql_count += 1
+    profile.sql_seconds += time.perf_counter() - started.pop()
+
+
+def _instrument(engine):
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+# ------------------- Request lifecycle -------------------
+def _start_profile():
+    request.environ['hbnb.profile_token'] = _current.set(RequestProfile())
+
+
+def _finish_profile(response):
+    profile = _current.get()
+    if profile is None:
+        return response
+    total = profile.total_seconds()
+    response.headers['Server-Timing'] = profile.server_timing(total)
+    rule = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+    get_profile_stats().record(f'{request.method} {rule}', profile, total)
+    return response
+
+
+def _end_profile(exc):
+    token = request.environ.pop('hbnb.profile_token', None)
+    if token is not None:
+        _current.reset(token)
+
+
+def init_app(app):
+    """
+    Call before the other request hooks (compression.init_app included):
+    Flask runs after_request hooks in reverse order, so the total then
+    covers the others, the end-of-request commit among them.
+    """
+    app.extensions['profile_stats'] = EndpointStats()
+    if not app.config.get('PROFILING_ENABLED', False):
+        return
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
+    app.teardown_request(_end_profile)
+
+
+def instrument_engines(app):
+    """Count the SQL statements; call once the engines exist (primary and replicas)"""
+    if not app.config.get('PROFILING_ENABLED', False):
+        return
+    from app.extensions import db  # app.extensions imports this module (passwords.py)
+    with app.app_context():
+        engines = list(db.engines.values())
+    engines += list(app.extensions.get('replica_engines', {}).values())
+    for engine in engines:
+        _instrument(engine)
+
+
+def get_profile_stats():
+    return current_app.extensions['profile_stats']
@@ -0,0 +1,185 @@
+#!/usr/bin/python3
+"""
+Token-bucket throttling of login attempts, per client IP and per email.
+
+A bucket holds up to `burst` tokens and refills at `per_minute` tokens a
+minute; each attempt takes one token and is refused when the bucket is
+empty. Throttled attempts are rejected before any password hashing, so
+the CPU spent on logins is bounded whatever the request rate.
+
+Bucket state lives in a store (config LOGIN_RATE_LIMIT_BACKEND):
+    'memory' — in-process, bounded to LOGIN_RATE_LIMIT_MAX_KEYS buckets (default)
+    'redis'  — shared by every worker, on the Redis server at
+               LOGIN_RATE_LIMIT_REDIS_URL (atomic Lua script); while the
+               server cannot be reached each process throttles on its own
+               ('local://' uses the in-process LocalRedis stand-in)
+    'null'   — throttling disabled
+"""
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+try:
+    import redis
+except ImportError:  # optional, only needed for LOGIN_RATE_LIMIT_BACKEND = 'redis'
+    redis = None
+
+
+def _refill(tokens, updated_at, now, burst, rate):
+    return min(burst, tokens + (now - updated_at) * rate)
+
+
+class MemoryBucketStore:
+    """
+    Buckets in a dict, least recently used dropped beyond max_keys
+    (a dropped bucket comes back full, which is what an idle one would be).
+    """
+
+    def __init__(self, max_keys=100000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, key, burst, rate):
+        """Take one token; returns (allowed, tokens left)"""
+        now = self._clock()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (burst, now))
+            tokens = _refill(tokens, updated_at, now, burst, rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, tokens
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class RedisBucketStore:
+    """Buckets shared between processes, refilled and taken atomically on the server"""
+    SCRIPT = """
+local burst = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+    def __init__(self, client, prefix='hbnb:login:', clock=time.time, fallback=None):
+        self.client = client
+        self.prefix = prefix
+        self._clock = clock
+        self._script = client.register_script(self.SCRIPT)
+        # Used while the server cannot be reached
+        self.fallback = fallback or MemoryBucketStore()
+        self.errors = 0
+        self._down = False
+
+    def take(self, key, burst, rate):
+        try:
+            allowed, tokens = self._script(keys=[self.prefix + key],
+                                           args=[burst, rate, self._clock()])
+        except Exception:
+            self.errors += 1
+            if not self._down:
+                self._down = True
+                current_app.logger.exception(
+                    "Login rate limit store unreachable; throttling per process")
+            return self.fallback.take(key, burst, rate)
+        self._down = False
+        return bool(allowed), float(tokens)
+
+
+def _local_bucket_script(client, keys, args):
+    """RedisBucketStore.SCRIPT for the LocalRedis stand-in"""
+    burst, rate, now = (float(arg) for arg in args)
+    raw = client.get(keys[0])
+    tokens, updated_at = json.loads(raw) if raw else (burst, now)
+    tokens = _refill(tokens, updated_at, max(now, updated_at), burst, rate)
+    allowed = tokens >= 1
+    if allowed:
+        tokens -= 1
+    client.set(keys[0], json.dumps([tokens, now]).encode('utf-8'), ex=math.ceil(burst / rate) + 1)
+    return [int(allowed), str(tokens)]
+
+
+class LoginLimiter:
+    """One bucket per client IP and one per email address"""
+
+    def __init__(self, store, ip_burst=20, ip_per_minute=10, email_burst=5, email_per_minute=2):
+        self.store = store
+        self.ip_limit = (ip_burst, ip_per_minute / 60)
+        self.email_limit = (email_burst, email_per_minute / 60)
+
+    def _take(self, key, limit):
+        burst, rate = limit
+        allowed, tokens = self.store.take(key, burst, rate)
+        # Seconds until the bucket holds one token again
+        return 0 if allowed else (1 - tokens) / rate
+
+    def hit(self, ip, email):
+        """
+        Record one attempt. Returns 0 if it may proceed, otherwise the
+        number of seconds the client should wait (Retry-After).
+        """
+        if self.store is None:
+            return 0
+        retry_after = self._take(f'ip:{ip}', self.ip_limit)
+        if retry_after:
+            # Refused by IP: leave the email bucket untouched
+            return retry_after
+        return self._take(f'email:{(email or "").strip().lower()}', self.email_limit)
+
+
+def create_limiter(config):
+    """Build the limiter selected by LOGIN_RATE_LIMIT_BACKEND"""
+    backend = config.get('LOGIN_RATE_LIMIT_BACKEND', 'memory')
+    if backend == 'null':
+        store = None
+    elif backend == 'memory':
+        store = MemoryBucketStore(config.get('LOGIN_RATE_LIMIT_MAX_KEYS', 100000))
+    elif backend == 'redis':
+        url = config.get('LOGIN_RATE_LIMIT_REDIS_URL') or 'redis://localhost:6379/0'
+        if url.startswith('local://'):
+            from app.persistence.cache import LocalRedis
+            client = LocalRedis(clock=time.time)
+            client.scripts[RedisBucketStore.SCRIPT] = _local_bucket_script
+        elif redis is None:
+            raise RuntimeError("LOGIN_RATE_LIMIT_BACKEND='redis' requires the redis package")
+        else:
+            client = redis.Redis.from_url(url)
+        store = RedisBucketStore(client, fallback=MemoryBucketStore(
+            config.get('LOGIN_RATE_LIMIT_MAX_KEYS', 100000)))
+    else:
+        raise ValueError(f"Unknown LOGIN_RATE_LIMIT_BACKEND: {backend}")
+    return LoginLimiter(
+        store,
+        ip_burst=config.get('LOGIN_IP_BURST', 20),
+        ip_per_minute=config.get('LOGIN_IP_PER_MINUTE', 10),
+        email_burst=config.get('LOGIN_EMAIL_BURST', 5),
+        email_per_minute=config.get('LOGIN_EMAIL_PER_MINUTE', 2))
+
+
+def init_app(app):
+    app.extensions['login_limiter'] = create_limiter(app.config)
+
+
+def get_limiter():
+    return current_app.extensions['login_limiter']
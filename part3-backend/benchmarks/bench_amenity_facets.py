@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+"""
+Amenity filtering and facet counts over many places: the bitmap index
+(app/persistence/amenity_index.py) against the equivalent SQL on
+place_amenity (EXISTS per amenity, one GROUP BY for the facets).
+
+Run from part3-backend/:
+    python benchmarks/bench_amenity_facets.py --places 100000 --amenities 40
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import func, insert, select  # noqa: E402
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.amenity import Amenity  # noqa: E402
+from app.models.place import Place, place_amenity  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.persistence.amenity_index import popcount  # noqa: E402
+from app.persistence.place_repository import PlaceRepository  # noqa: E402
+import config as app_config  # noqa: E402
+
+INSERT_BATCH = 10000
+
+
+class BenchConfig(app_config.TestingConfig):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+
+def seed(places, amenities):
+    rng = random.Random(42)
+    db.session.execute(insert(User), [{'id': 'owner', 'first_name': 'Bench', 'last_name': 'Owner',
+                                       'email': 'owner@bench.io', 'password': 'x'}])
+    db.session.execute(insert(Amenity), [{'id': f'a-{i}', 'name': f'Amenity {i}'} for i in range(amenities)])
+    # Amenity i is on roughly 1 / (i + 2) of the places: a few common, many rare
+    for start in range(0, places, INSERT_BATCH):
+        ids = [f'p-{i:08d}' for i in range(start, min(start + INSERT_BATCH, places))]
+        db.session.execute(insert(Place), [
+            {'id': place_id, 'title': place_id, 'price': 100.0, 'latitude': 0.0, 'longitude': 0.0,
+             'owner_id': 'owner'} for place_id in ids])
+        db.session.execute(insert(place_amenity), [
+            {'place_id': place_id, 'amenity_id': f'a-{a}'}
+            for place_id in ids for a in range(amenities) if rng.random() < 1 / (a + 2)])
+    db.session.commit()
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - t0)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--places', type=int, default=100000)
+    parser.add_argument('--amenities', type=int, default=40)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        seed(args.places, args.amenities)
+        index = app.extensions['amenity_index']
+        seconds, _ = best_of(1, index.rebuild)
+        print(f"{args.places:,} places, {args.amenities} amenities; index built in {seconds * 1000:.0f} ms")
+
+        wanted = ['a-0', 'a-3']
+        links = place_amenity.c
+
+        def sql_filter():
+            return db.session.execute(select(func.count(Place.id)).where(
+                *PlaceRepository.has_amenities(wanted))).scalar()
+
+        def bitmap_filter():
+            return popcount(index.match(wanted))
+
+        def sql_facets():
+            matching = select(Place.id).where(*PlaceRepository.has_amenities(wanted))
+            return dict(db.session.execute(
+                select(links.amenity_id, func.count()).where(links.place_id.in_(matching))
+                .group_by(links.amenity_id)).all())
+
+        def bitmap_facets():
+            return index.facets(index.match(wanted))
+
+        print(f"best of {args.repeat}")
+        for label, func_ in (('filter a-0 AND a-3, SQL', sql_filter),
+                             ('filter a-0 AND a-3, bitmap', bitmap_filter),
+                             ('facets, SQL GROUP BY', sql_facets),
+                             ('facets, bitmap', bitmap_facets)):
+            seconds, result = best_of(args.repeat, func_)
+            size = result if isinstance(result, int) else len(result)
+            print(f"{label:<28} {seconds * 1000:>9.2f} ms   ({size})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/python3
+"""
+Bulk review import throughput (target: 1M reviews in under a minute on SQLite).
+
+Run from part3-backend/:
+    python benchmarks/bench_bulk_import.py --reviews 1000000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import insert  # noqa: E402
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models.place import Place  # noqa: E402
+from app.services import facade  # noqa: E402
+import config as app_config  # noqa: E402
+
+USERS = 2000
+
+
+class BenchConfig(app_config.TestingConfig):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+
+def write_ndjson(path, reviews):
+    """reviews spread so that every (user, place) pair is unique"""
+    places = reviews // USERS + 1
+    with open(path, 'w') as f:
+        for i in range(reviews):
+            f.write(json.dumps({'text': 'Great stay, would come back', 'rating': 1 + i % 5,
+                                'user_id': f'u-{i % USERS}', 'place_id': f'p-{i // USERS}'}))
+            f.write('\n')
+    return places
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reviews', type=int, default=200000)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'reviews.ndjson')
+    places = write_ndjson(path, args.reviews)
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.session.execute(insert(User), [
+            {'id': f'u-{i}', 'first_name': 'Bench', 'last_name': str(i),
+             'email': f'u{i}@bench.io', 'password': 'x'} for i in range(USERS + 1)])
+        db.session.execute(insert(Place), [
+            {'id': f'p-{p}', 'title': f'Place {p}', 'price': 100.0, 'latitude': 0.0,
+             'longitude': 0.0, 'owner_id': f'u-{USERS}'} for p in range(places)])
+        db.session.commit()
+
+        t0 = time.perf_counter()
+        with open(path, 'rb') as source:
+            report = facade.bulk_import('reviews', source, args.chunk_size)
+        elapsed = time.perf_counter() - t0
+        print(f"imported {report['inserted']} reviews ({report['failed']} rejected) "
+              f"in {elapsed:.1f}s -> {report['inserted'] / elapsed:,.0f} rows/s")
+
+
+if __name__ == '__main__':
+    main()
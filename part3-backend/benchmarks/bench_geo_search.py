@@ -0,0 +1,74 @@
+#!/usr/bin/python3
+"""
+Radius search latency over a large places table.
+
+Run from part3-backend/:
+    python benchmarks/bench_geo_search.py --places 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import insert  # noqa: E402
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models.place import Place  # noqa: E402
+from app.services import facade  # noqa: E402
+from app.utils import geo  # noqa: E402
+import config as app_config  # noqa: E402
+
+
+class BenchConfig(app_config.TestingConfig):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+
+def seed(count, batch=50000):
+    owner = User(first_name='Bench', last_name='Owner', email='bench@owner.io', password='x')
+    db.session.add(owner)
+    db.session.commit()
+    rng = random.Random(42)
+    for start in range(0, count, batch):
+        rows = []
+        for i in range(start, min(count, start + batch)):
+            lat, lon = rng.uniform(-60, 70), rng.uniform(-180, 180)
+            rows.append({'id': f'bench-{i}', 'title': f'Place {i}', 'price': 100.0,
+                         'latitude': lat, 'longitude': lon, 'owner_id': owner.id,
+                         'geohash': geo.encode(lat, lon)})
+        db.session.execute(insert(Place), rows)
+        db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--places', type=int, default=200000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--radius-km', type=float, default=5.0)
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        t0 = time.perf_counter()
+        seed(args.places)
+        print(f"seeded {args.places} places in {time.perf_counter() - t0:.1f}s")
+
+        rng = random.Random(7)
+        timings, found = [], 0
+        for _ in range(args.queries):
+            lat, lon = rng.uniform(-60, 70), rng.uniform(-180, 180)
+            db.session.expunge_all()
+            t0 = time.perf_counter()
+            found += len(facade.search_places_nearby(lat, lon, args.radius_km, 100))
+            timings.append((time.perf_counter() - t0) * 1000)
+        timings.sort()
+        print(f"radius {args.radius_km} km: p50={timings[len(timings) // 2]:.2f}ms "
+              f"p95={timings[int(len(timings) * 0.95)]:.2f}ms avg hits={found / args.queries:.1f}")
+
+
+if __name__ == '__main__':
+    main()
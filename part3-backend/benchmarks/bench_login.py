@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+"""
+Login throughput: POST /api/v1/auth/login from concurrent clients, with
+passwords hashed on the request threads and on the process pool.
+
+Run from part3-backend/:
+    python benchmarks/bench_login.py --rounds 12 --threads 16 --logins 400
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app  # noqa: E402
+from app.extensions import db, hasher  # noqa: E402
+from app.models.user import User  # noqa: E402
+import config as app_config  # noqa: E402
+
+USERS = 50
+
+
+class BenchConfig(app_config.TestingConfig):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+
+def run(app, threads, logins):
+    client = app.test_client()
+
+    def login(i):
+        r = client.post('/api/v1/auth/login', content_type='application/json',
+                        data=json.dumps({'email': f'u{i % USERS}@bench.io', 'password': 'secret123'}))
+        assert r.status_code == 200, r.data
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(login, range(logins)))
+    return logins / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=12)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--logins', type=int, default=400)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    BenchConfig.BCRYPT_LOG_ROUNDS = args.rounds
+    app = create_app(BenchConfig)
+    with app.app_context():
+        password = hasher.hash('secret123')
+        db.session.add_all(User(first_name='Bench', last_name=str(i), email=f'u{i}@bench.io',
+                                password=password) for i in range(USERS))
+        db.session.commit()
+
+    for workers in (0, args.workers):
+        app.config['PASSWORD_HASH_WORKERS'] = workers
+        label = 'request threads' if not workers else f'pool of {workers} processes'
+        print(f"cost {args.rounds}, {args.threads} clients, {label}: "
+              f"{run(app, args.threads, args.logins):,.1f} logins/s")
+        hasher.shutdown()
+
+
+if __name__ == '__main__':
+    main()
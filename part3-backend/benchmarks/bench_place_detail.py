@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+"""
+GET /api/v1/places/<id> latency as the total number of reviews grows.
+Every place has the same number of reviews, so a flat latency means the
+detail page does not depend on the size of the reviews table.
+
+Run from part3-backend/:
+    python benchmarks/bench_place_detail.py --steps 10000 100000 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import insert  # noqa: E402
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models.place import Place  # noqa: E402
+from app.models.review import Review  # noqa: E402
+import config as app_config  # noqa: E402
+
+REVIEWS_PER_PLACE = 20
+USERS = 1000
+
+
+class BenchConfig(app_config.TestingConfig):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+
+def seed_users():
+    db.session.execute(insert(User), [
+        {'id': f'u-{i}', 'first_name': 'Bench', 'last_name': str(i),
+         'email': f'u{i}@bench.io', 'password': 'x'} for i in range(USERS)])
+    db.session.commit()
+
+
+def seed_reviews(start, stop, batch=50000):
+    """Insert reviews start..stop, REVIEWS_PER_PLACE per place."""
+    for chunk in range(start, stop, batch):
+        end = min(stop, chunk + batch)
+        first_place, last_place = chunk // REVIEWS_PER_PLACE, (end - 1) // REVIEWS_PER_PLACE
+        db.session.execute(insert(Place), [
+            {'id': f'p-{p}', 'title': f'Place {p}', 'price': 100.0, 'latitude': 0.0,
+             'longitude': 0.0, 'owner_id': 'u-0'}
+            for p in range(first_place, last_place + 1) if p * REVIEWS_PER_PLACE >= chunk])
+        db.session.execute(insert(Review), [
+            {'id': f'r-{i}', 'text': 'Lovely stay', 'rating': 1 + i % 5,
+             'place_id': f'p-{i // REVIEWS_PER_PLACE}', 'user_id': f'u-{i % USERS}'}
+            for i in range(chunk, end)])
+        db.session.commit()
+
+
+def measure(client, places, requests):
+    rng = random.Random(1)
+    timings = []
+    for _ in range(requests):
+        place_id = f'p-{rng.randrange(places)}'
+        t0 = time.perf_counter()
+        response = client.get(f'/api/v1/places/{place_id}')
+        timings.append((time.perf_counter() - t0) * 1000)
+        assert response.status_code == 200
+        db.session.expunge_all()
+    timings.sort()
+    return timings[len(timings) // 2], timings[int(len(timings) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--steps', type=int, nargs='+', default=[10000, 100000, 500000])
+    parser.add_argument('--requests', type=int, default=300)
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    client = app.test_client()
+    with app.app_context():
+        seed_users()
+        seeded = 0
+        for total in args.steps:
+            seed_reviews(seeded, total)
+            seeded = total
+            p50, p95 = measure(client, total // REVIEWS_PER_PLACE, args.requests)
+            print(f"{total:>9} reviews: place detail p50={p50:.2f}ms p95={p95:.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
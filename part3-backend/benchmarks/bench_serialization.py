@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+"""
+Serialization throughput for a listing of 10,000 places (with owner and
+amenities already loaded): the hand-built dicts the endpoints used before
+the serializer registry, the registry with the stdlib encoder, the
+registry with orjson, and a sparse fieldset (?fields=id,title,price).
+
+Run from part3-backend/:
+    python benchmarks/bench_serialization.py --places 10000 --repeat 5
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import insert  # noqa: E402
+from app import create_app  # noqa: E402
+from app.api.v1 import serializers  # noqa: E402
+from app.api.v1.serializers import PLACE_SUMMARY  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.amenity import Amenity  # noqa: E402
+from app.models.place import Place, place_amenity  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services import facade  # noqa: E402
+import config as app_config  # noqa: E402
+
+AMENITIES_PER_PLACE = 3
+
+
+class BenchConfig(app_config.TestingConfig):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+
+def seed(places):
+    db.session.execute(insert(User), [{'id': 'owner', 'first_name': 'Bench', 'last_name': 'Owner',
+                                       'email': 'owner@bench.io', 'password': 'x'}])
+    db.session.execute(insert(Amenity), [{'id': f'a-{i}', 'name': f'Amenity {i}'}
+                                         for i in range(AMENITIES_PER_PLACE)])
+    db.session.execute(insert(Place), [
+        {'id': f'p-{i}', 'title': f'Place {i}', 'price': 100.0 + i % 50, 'latitude': 0.0,
+         'longitude': 0.0, 'owner_id': 'owner'} for i in range(places)])
+    db.session.execute(insert(place_amenity), [
+        {'place_id': f'p-{i}', 'amenity_id': f'a-{a}'}
+        for i in range(places) for a in range(AMENITIES_PER_PLACE)])
+    db.session.commit()
+
+
+def hand_built(p):
+    """The per-endpoint dict the listing built before the registry"""
+    return {
+        'id': p.id,
+        'title': p.title,
+        'latitude': p.latitude,
+        'longitude': p.longitude,
+        'price': p.price,
+        'owner': {
+            'id': p.owner.id,
+            'first_name': p.owner.first_name,
+            'last_name': p.owner.last_name
+        } if getattr(p, 'owner', None) else None,
+        'amenities': [{'id': a.id, 'name': a.name} for a in getattr(p, 'amenities', [])],
+        'image_url': p.image_url,
+        'review_count': p.review_count or 0,
+        'average_rating': p.average_rating or 0.0
+    }
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - t0)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--places', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        seed(args.places)
+        places = facade.get_all_places()
+        orjson = serializers.orjson
+        sparse = ('id', 'title', 'price')
+
+        def with_stdlib(func):
+            def run():
+                serializers.orjson = None
+                try:
+                    func()
+                finally:
+                    serializers.orjson = orjson
+            return run
+
+        cases = [
+            ('hand-built dicts + json', lambda: json.dumps([hand_built(p) for p in places])),
+            ('registry + json', with_stdlib(lambda: serializers.dumps(PLACE_SUMMARY.dump_many(places)))),
+        ]
+        if orjson is not None:
+            cases.append(('registry + orjson', lambda: serializers.dumps(PLACE_SUMMARY.dump_many(places))))
+        cases.append(('?fields=id,title,price', lambda: serializers.dumps(PLACE_SUMMARY.dump_many(places, sparse))))
+
+        print(f"{len(places):,} places, {AMENITIES_PER_PLACE} amenities each, best of {args.repeat}")
+        for label, func in cases:
+            seconds = best_of(args.repeat, func)
+            print(f"{label:<26} {seconds * 1000:>8.1f} ms   {len(places) / seconds:>10,.0f} places/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/python3
+"""
+Multi-worker load on one SQLite file, gunicorn style: several processes,
+each with its own app and several threads, reading place details while a
+fraction of requests write. Compares SQLite's defaults (rollback journal,
+synchronous=FULL) with the SQLITE_PRAGMAS tuning profile.
+
+Run from part3-backend/:
+    python benchmarks/bench_sqlite_concurrency.py --workers 4 --threads 8 --seconds 10
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import insert  # noqa: E402
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models.place import Place  # noqa: E402
+from app.services import facade  # noqa: E402
+import config as app_config  # noqa: E402
+
+PLACES = 2000
+
+
+def make_config(path, tuned):
+    class BenchConfig(app_config.TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        SQLITE_PRAGMAS = app_config.Config.SQLITE_PRAGMAS if tuned else {}
+        # Every read should reach the database
+        CACHE_BACKEND = 'null'
+    return BenchConfig
+
+
+def seed(path, tuned):
+    # WAL is persistent in the file: seed with the profile being measured
+    app = create_app(make_config(path, tuned))
+    with app.app_context():
+        db.session.execute(insert(User), [{'id': 'owner', 'first_name': 'Bench', 'last_name': 'Owner',
+                                           'email': 'owner@bench.io', 'password': 'x'}])
+        db.session.execute(insert(Place), [
+            {'id': f'p-{i}', 'title': f'Place {i}', 'price': 100.0, 'latitude': 0.0,
+             'longitude': 0.0, 'owner_id': 'owner'} for i in range(PLACES)])
+        db.session.commit()
+        db.engine.dispose()
+
+
+def worker(path, tuned, threads, seconds, write_ratio, results):
+    app = create_app(make_config(path, tuned))
+    client = app.test_client()
+    deadline = time.monotonic() + seconds
+
+    def loop(_):
+        done = errors = 0
+        rng = random.Random()
+        while time.monotonic() < deadline:
+            place_id = f'p-{rng.randrange(PLACES)}'
+            try:
+                if rng.random() < write_ratio:
+                    with app.app_context():
+                        facade.update_place(place_id, {'price': rng.randint(10, 500)})
+                elif client.get(f'/api/v1/places/{place_id}').status_code != 200:
+                    errors += 1
+                    continue
+                done += 1
+            except Exception:
+                # "database is locked" and friends
+                errors += 1
+        return done, errors
+
+    with ThreadPoolExecutor(threads) as pool:
+        counts = list(pool.map(loop, range(threads)))
+    results.put((sum(c[0] for c in counts), sum(c[1] for c in counts)))
+
+
+def run(tuned, args):
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    seed(path, tuned)
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=worker, args=(
+        path, tuned, args.threads, args.seconds, args.write_ratio, results))
+        for _ in range(args.workers)]
+    for p in procs:
+        p.start()
+    totals = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    done = sum(t[0] for t in totals)
+    errors = sum(t[1] for t in totals)
+    label = 'tuned (WAL, synchronous=NORMAL)' if tuned else 'SQLite defaults'
+    print(f"{label:<32} {done / args.seconds:>9,.0f} req/s   {errors} errors")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--write-ratio', type=float, default=0.05)
+    args = parser.parse_args()
+    print(f"{args.workers} workers x {args.threads} threads, "
+          f"{args.write_ratio:.0%} writes, {args.seconds:g}s each")
+    for tuned in (False, True):
+        run(tuned, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/python3
+"""
+Full-text search latency over a large catalogue: places whose titles and
+descriptions are drawn from a Zipf-like vocabulary (a few very common
+words, a long tail of rare ones), indexed with the selected backend, then
+queried with a common word, a rare word, two words, a prefix and a word
+plus a price filter. Compare with the LIKE scan the API would otherwise
+need.
+
+Run from part3-backend/:
+    python benchmarks/bench_text_search.py --places 1000000 --backend fts5
+    python benchmarks/bench_text_search.py --places 100000 --backend inverted
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import func, insert, select  # noqa: E402
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.place import Place  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.persistence.search_index import FTS5Index, InvertedIndex, parse_query  # noqa: E402
+from app.persistence.place_repository import PlaceRepository  # noqa: E402
+import config as app_config  # noqa: E402
+
+VOCABULARY = 20000
+VOCAB = [f'w{i}' for i in range(VOCABULARY)]
+INSERT_BATCH = 10000
+
+
+class BenchConfig(app_config.TestingConfig):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+
+def words(rng, cum_weights, count):
+    return ' '.join(rng.choices(VOCAB, cum_weights=cum_weights, k=count))
+
+
+def seed(places):
+    rng = random.Random(42)
+    weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(VOCABULARY)))
+    db.session.execute(insert(User), [{'id': 'owner', 'first_name': 'Bench', 'last_name': 'Owner',
+                                       'email': 'owner@bench.io', 'password': 'x'}])
+    for start in range(0, places, INSERT_BATCH):
+        db.session.execute(insert(Place), [
+            {'id': f'p-{i:08d}', 'title': words(rng, weights, 4), 'description': words(rng, weights, 30),
+             'price': float(rng.randint(20, 500)), 'latitude': 0.0, 'longitude': 0.0, 'owner_id': 'owner'}
+            for i in range(start, min(start + INSERT_BATCH, places))])
+    db.session.commit()
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - t0)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--places', type=int, default=1000000)
+    parser.add_argument('--backend', choices=('fts5', 'inverted'), default='fts5')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        index = FTS5Index() if args.backend == 'fts5' else InvertedIndex()
+        app.extensions['search_index'] = index
+
+        t0 = time.perf_counter()
+        seed(args.places)
+        print(f"seeded {args.places:,} places in {time.perf_counter() - t0:.1f} s")
+        t0 = time.perf_counter()
+        index.rebuild(commit=db.session.commit)
+        print(f"{args.backend} index built in {time.perf_counter() - t0:.1f} s")
+
+        queries = [
+            ('common word', 'w1', ()),
+            ('rare word', 'w15000', ()),
+            ('two words', 'w3 w40', ()),
+            ('prefix', 'w123*', ()),
+            ('word + price <= 100', 'w2', PlaceRepository.price_between(None, 100)),
+        ]
+        print(f"top 100, best of {args.repeat}")
+        for label, q, conditions in queries:
+            terms = parse_query(q)
+            seconds, hits = best_of(args.repeat, lambda: index.search(terms, conditions, limit=100))
+            print(f"{label:<22} {q:<10} {seconds * 1000:>9.1f} ms   {len(hits):>4} hits")
+
+        # What a search without the index costs
+        like = (select(func.count()).select_from(Place)
+                .where(Place.title.like('%w15000%') | Place.description.like('%w15000%')))
+        seconds, _ = best_of(1, lambda: db.session.execute(like).scalar())
+        print(f"{'LIKE scan (rare word)':<33} {seconds * 1000:>9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
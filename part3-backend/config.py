@@ -12,12 +12,103 @@ class Config:
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'dev_secret_key_not_for_production')
+    # Collection endpoints return at most this many rows per page
+    PAGE_SIZE_DEFAULT = 100
+    PAGE_SIZE_MAX = 1000
+    # Most ids accepted by one ?ids=a,b,c batch lookup
+    BATCH_IDS_MAX = 100
+    # Newest reviews embedded in a place detail; the rest are paged at
+    # /places/<id>/reviews
+    PLACE_DETAIL_REVIEWS = 20
+    # Commit once at the end of each request instead of after every write
+    UNIT_OF_WORK_PER_REQUEST = True
+    # Connection pool (app/persistence/engine.py); not used by in-memory SQLite
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))
+    # Recycle connections before the server (e.g. MySQL wait_timeout) drops them
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = True
+    # Read replicas (comma-separated URLs); GET requests read from them, except
+    # for a user who wrote in the last REPLICA_STICKY_SECONDS
+    DB_REPLICA_URIS = [u.strip() for u in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if u.strip()]
+    REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 5))
+    # Where that is recorded: 'memory' (per worker process) or 'redis'
+    # (shared by every worker, needed for read-your-writes with several)
+    REPLICA_STICKY_BACKEND = os.getenv('REPLICA_STICKY_BACKEND', 'memory')
+    REPLICA_STICKY_REDIS_URL = os.getenv('REPLICA_STICKY_REDIS_URL')
+    # Run on every new SQLite connection
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 268435456,   # 256 MB
+        'cache_size': -65536,     # 64 MB (negative = KiB)
+        'busy_timeout': 5000,     # ms
+    }
+    # Read-through cache for single-row lookups (app/persistence/cache.py):
+    # 'lru' (in-process), 'redis' (shared, CACHE_REDIS_URL) or 'null'
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'lru')
+    CACHE_TTL = int(os.getenv('CACHE_TTL', 30))
+    CACHE_MAX_ENTRIES = 10000
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL')
+    # bcrypt cost; hashes made with another cost are upgraded at the next login
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+    # Processes hashing passwords (0 = on the request thread, which bcrypt
+    # does without holding the GIL) and how many hashes may wait for them
+    # at once. Each server worker process starts its own pool
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 0))
+    PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', 64))
+    # Login throttling (token buckets): 'memory', 'redis' (shared) or 'null'
+    LOGIN_RATE_LIMIT_BACKEND = os.getenv('LOGIN_RATE_LIMIT_BACKEND', 'memory')
+    LOGIN_RATE_LIMIT_REDIS_URL = os.getenv('LOGIN_RATE_LIMIT_REDIS_URL')
+    LOGIN_IP_BURST = 20
+    LOGIN_IP_PER_MINUTE = 10
+    LOGIN_EMAIL_BURST = 5
+    LOGIN_EMAIL_PER_MINUTE = 2
+    # Response compression (app/utils/compression.py): gzip, or brotli when
+    # the package is installed; compressed bodies of ETag'd GETs are reused
+    COMPRESS_ENABLED = True
+    COMPRESS_MIN_SIZE = 1024
+    COMPRESS_GZIP_LEVEL = 6
+    COMPRESS_BROTLI_QUALITY = 5
+    COMPRESS_CACHE_ENTRIES = 256
+    COMPRESS_CACHE_TTL = 300
+    # Per-request profiling (app/utils/profiling.py): Server-Timing header
+    # with SQL/serialization/bcrypt time and per-endpoint totals at
+    # /api/v1/admin/profile. Off by default: nothing is hooked then
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', '').lower() in ('1', 'true', 'yes')
+    # Prometheus metrics at /metrics (app/utils/metrics.py). With several
+    # worker processes, point METRICS_MULTIPROC_DIR at a directory they all
+    # share: each writes its totals there every METRICS_FLUSH_INTERVAL
+    # seconds and a scrape adds them up. With METRICS_TOKEN set, a scrape
+    # must send "Authorization: Bearer <token>"
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN') or None
+    METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR') or None
+    METRICS_FLUSH_INTERVAL = 5
+    # Full-text place search (app/persistence/search_index.py): 'fts5'
+    # (SQLite FTS5), 'inverted' (portable postings table) or 'auto'
+    SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'auto')
+    # Amenity bitmap index (app/persistence/amenity_index.py): each worker
+    # rebuilds its copy after this many seconds (0 = never) to pick up
+    # other workers' writes; larger matches are filtered in SQL
+    AMENITY_INDEX_MAX_AGE = int(os.getenv('AMENITY_INDEX_MAX_AGE', 300))
+    AMENITY_FILTER_MAX_IDS = 5000
+    # sort=rank (app/persistence/ranking.py): Bayesian average of the
+    # ratings, starting from RANK_PRIOR_WEIGHT reviews of RANK_PRIOR_MEAN
+    # stars, plus up to RANK_RECENCY_WEIGHT for a recent review, halving
+    # every RANK_RECENCY_HALF_LIFE_DAYS
+    RANK_PRIOR_MEAN = 3.5
+    RANK_PRIOR_WEIGHT = 5
+    RANK_RECENCY_WEIGHT = 0.5
+    RANK_RECENCY_HALF_LIFE_DAYS = 90
 
 
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///instance/development.db'
+    # Relative SQLite paths are resolved in the instance/ folder
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///development.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
 
@@ -26,14 +117,21 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Cheapest bcrypt cost, hashed inline: keeps the suite fast
+    BCRYPT_LOG_ROUNDS = 4
+    PASSWORD_HASH_WORKERS = 0
+    # The suite logs in far more often than a real client would
+    LOGIN_RATE_LIMIT_BACKEND = 'null'
 
 
 class ProductionConfig(Config):
     """Production configuration"""
     DEBUG = False
-    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///production.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY')
+    # /metrics must be asked for (METRICS_ENABLED=1) and protected
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() in ('1', 'true', 'yes')
 
 config = {
     'development': DevelopmentConfig,
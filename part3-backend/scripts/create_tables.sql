@@ -31,11 +31,40 @@ CREATE TABLE IF NOT EXISTS places (
     latitude    FLOAT NOT NULL,
     longitude   FLOAT NOT NULL,
     owner_id    CHAR(36) NOT NULL,
+    geohash     VARCHAR(12),
+    -- Review aggregates, maintained on every review write
+    review_count   INT NOT NULL DEFAULT 0,
+    rating_sum     INT NOT NULL DEFAULT 0,
+    rating_1       INT NOT NULL DEFAULT 0,
+    rating_2       INT NOT NULL DEFAULT 0,
+    rating_3       INT NOT NULL DEFAULT 0,
+    rating_4       INT NOT NULL DEFAULT 0,
+    rating_5       INT NOT NULL DEFAULT 0,
+    average_rating FLOAT NOT NULL DEFAULT 0,
+    last_review_at DATETIME,
+    -- Bayesian average + review recency; flask --app run hbnb recompute-rank
+    rank_score     FLOAT NOT NULL DEFAULT 0,
     created_at  DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at  DATETIME DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (owner_id) REFERENCES users(id)
 );
 
+-- Geohash prefix scans for radius / bounding-box search
+CREATE INDEX IF NOT EXISTS ix_places_geohash ON places (geohash);
+-- sort=rating
+CREATE INDEX IF NOT EXISTS ix_places_average_rating ON places (average_rating);
+-- sort=rank
+CREATE INDEX IF NOT EXISTS ix_places_rank_score ON places (rank_score);
+-- min_price / max_price filters, sort=price
+CREATE INDEX IF NOT EXISTS ix_places_price ON places (price);
+
+-- Places per price step (bucket = floor(price)), maintained on every place write
+--    Filled by the application: flask --app run hbnb rebuild-price-histogram
+CREATE TABLE IF NOT EXISTS price_buckets (
+    bucket INT PRIMARY KEY,
+    places INT NOT NULL DEFAULT 0
+);
+
 -- 4. Reviews table (depends on users and places)
 CREATE TABLE IF NOT EXISTS reviews (
     id         CHAR(36) PRIMARY KEY,
@@ -50,6 +79,10 @@ CREATE TABLE IF NOT EXISTS reviews (
     UNIQUE (user_id, place_id)
 );
 
+-- Reviews are fetched per place (detail page) and per user
+CREATE INDEX IF NOT EXISTS ix_reviews_place_id ON reviews (place_id);
+CREATE INDEX IF NOT EXISTS ix_reviews_user_id ON reviews (user_id);
+
 -- 5. Place_Amenity table (depends on places and amenities)
 CREATE TABLE IF NOT EXISTS place_amenity (
     place_id   CHAR(36) NOT NULL,
@@ -58,3 +91,26 @@ CREATE TABLE IF NOT EXISTS place_amenity (
     FOREIGN KEY (place_id)   REFERENCES places(id),
     FOREIGN KEY (amenity_id) REFERENCES amenities(id)
 );
+
+-- 6. Full-text search (app/persistence/search_index.py)
+--    Filled by the application: flask --app run hbnb rebuild-search-index
+CREATE TABLE IF NOT EXISTS search_documents (
+    doc_id   INTEGER PRIMARY KEY AUTOINCREMENT,
+    place_id CHAR(36) NOT NULL UNIQUE,
+    length   FLOAT NOT NULL DEFAULT 0
+);
+
+-- SQLite FTS5 index, one row per search_documents.doc_id (rowid)
+CREATE VIRTUAL TABLE IF NOT EXISTS places_fts USING fts5(
+    title, description, reviews,
+    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+
+-- Portable inverted index, used instead of places_fts without FTS5
+CREATE TABLE IF NOT EXISTS search_postings (
+    term   VARCHAR(64) NOT NULL,
+    doc_id INTEGER NOT NULL,
+    tf     FLOAT NOT NULL,
+    PRIMARY KEY (term, doc_id)
+);
+CREATE INDEX IF NOT EXISTS ix_search_postings_doc_id ON search_postings (doc_id);
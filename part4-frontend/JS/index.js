@@ -2,39 +2,63 @@
    index.js — Logic for index.html
 ============================================= */
 
-async function fetchPlaces(token) {
+const PAGE_SIZE = 48;
+const HISTOGRAM_BUCKETS = 20;
+
+function placesUrl(maxPrice, cursor) {
+    // Best ranked first, filtered by the API: only the cards shown are downloaded
+    const params = new URLSearchParams({ limit: PAGE_SIZE, sort: '-rank' });
+    if (maxPrice !== 'all') params.set('max_price', maxPrice);
+    if (cursor) params.set('cursor', cursor);
+    return `${API_URL}/places/?${params}`;
+}
+
+function authHeaders() {
     const headers = { 'Content-Type': 'application/json' };
+    const token = getCookie('token');
     if (token) headers['Authorization'] = `Bearer ${token}`;
+    return headers;
+}
 
+async function fetchPlaces(maxPrice = 'all', cursor = null) {
     try {
-        const response = await fetch(`${API_URL}/places/`, { headers });
-        if (response.ok) {
-            const places = await response.json();
-            window.allPlaces = places;
-            displayPlaces(places);
-        } else {
+        const response = await fetch(placesUrl(maxPrice, cursor), { headers: authHeaders() });
+        if (!response.ok) {
             console.error('Failed to fetch places:', response.status);
+            return;
         }
+        const places = await response.json();
+        // A newer filter was typed while this page was loading
+        if (maxPrice !== window.currentMaxPrice) return;
+        displayPlaces(places, Boolean(cursor));
+        setNextPage(response.headers.get('X-Next-Cursor'));
     } catch (error) {
         console.error('Connection error:', error);
     }
 }
 
-function displayPlaces(places) {
+function setNextPage(cursor) {
+    const button = document.getElementById('load-more');
+    if (!button) return;
+    button.dataset.cursor = cursor || '';
+    button.style.display = cursor ? 'block' : 'none';
+}
+
+function displayPlaces(places, append = false) {
     const placesList = document.getElementById('places-list');
     if (!placesList) return;
 
-    placesList.innerHTML = '';
-    places.sort((a, b) => a.price - b.price);
+    if (!append) placesList.innerHTML = '';
+    const offset = placesList.children.length;
 
-    if (places.length === 0) {
+    if (places.length === 0 && offset === 0) {
         placesList.innerHTML = '<p class="text-muted">No places found.</p>';
         return;
     }
 
     places.forEach((place, index) => {
         const card = document.createElement('div');
-        card.classList.add('col-md-3', `card-gradient-${index % 4}`);
+        card.classList.add('col-md-3', `card-gradient-${(offset + index) % 4}`);
         card.dataset.price = place.price;
 
         const imgPosition = place.image_url && place.image_url.includes('Hogwarts') ? '50% 30%' : 'center';
@@ -58,30 +82,66 @@ function displayPlaces(places) {
     });
 }
 
-function filterPlaces(maxPrice) {
-    const scrollY = window.scrollY;
-    const cards = document.querySelectorAll('#places-list .col-md-3');
+async function fetchPriceHistogram() {
+    try {
+        const response = await fetch(`${API_URL}/places/price-histogram?buckets=${HISTOGRAM_BUCKETS}`,
+                                     { headers: authHeaders() });
+        if (!response.ok) return;
+        window.priceHistogram = await response.json();
+        displayPriceHistogram(window.currentMaxPrice);
+    } catch (error) {
+        console.error('Connection error:', error);
+    }
+}
+
+function displayPriceHistogram(maxPrice) {
+    const container = document.getElementById('price-histogram');
+    const histogram = window.priceHistogram;
+    if (!container || !histogram || histogram.buckets.length === 0) return;
+
     const limit = maxPrice === 'all' ? Infinity : parseFloat(maxPrice);
-    cards.forEach(card => {
-        const price = parseFloat(card.dataset.price);
-        card.style.display = (price <= limit) ? 'block' : 'none';
+    const tallest = Math.max(...histogram.buckets.map(b => b.count), 1);
+    container.innerHTML = '';
+    histogram.buckets.forEach(bucket => {
+        const bar = document.createElement('span');
+        bar.className = bucket.min <= limit ? 'histogram-bar' : 'histogram-bar excluded';
+        bar.style.height = `${Math.max(2, Math.round(28 * bucket.count / tallest))}px`;
+        bar.title = `$${bucket.min} – $${bucket.max}: ${bucket.count} places`;
+        container.appendChild(bar);
     });
-    window.scrollTo({ top: scrollY, behavior: 'instant' });
+}
+
+function filterPlaces(maxPrice) {
+    if (maxPrice !== 'all' && isNaN(parseFloat(maxPrice))) return;
+    window.currentMaxPrice = maxPrice;
+    displayPriceHistogram(maxPrice);
+    fetchPlaces(maxPrice);
 }
 
 document.addEventListener('DOMContentLoaded', () => {
     const placesList = document.getElementById('places-list');
     if (placesList) {
         checkAuthentication();
-        const token = getCookie('token');
-        fetchPlaces(token);
+        window.currentMaxPrice = 'all';
+        fetchPlaces();
+        fetchPriceHistogram();
+
+        const loadMore = document.getElementById('load-more');
+        if (loadMore) {
+            loadMore.addEventListener('click', () => {
+                fetchPlaces(window.currentMaxPrice, loadMore.dataset.cursor);
+            });
+        }
 
         const priceFilter = document.getElementById('price-filter');
         if (priceFilter) {
+            let timer = null;
             priceFilter.addEventListener('input', (event) => {
                 event.preventDefault();
                 const val = event.target.value.trim();
-                filterPlaces(val === '' ? 'all' : val);
+                // One request once the user stops typing, not one per keystroke
+                clearTimeout(timer);
+                timer = setTimeout(() => filterPlaces(val === '' ? 'all' : val), 250);
             });
             priceFilter.addEventListener('keydown', (event) => {
                 if (event.key === 'Enter') event.preventDefault();
@@ -10,7 +10,7 @@ async function fetchPlaceDetails(token, placeId) {
         const response = await fetch(`${API_URL}/places/${placeId}`, { headers });
         if (response.ok) {
             const place = await response.json();
-            displayPlaceDetails(place);
+            displayPlaceDetails(place, response.headers.get('X-Reviews-Next-Cursor'));
         } else {
             console.error('Failed to fetch place details:', response.status);
         }
@@ -19,7 +19,7 @@ async function fetchPlaceDetails(token, placeId) {
     }
 }
 
-async function displayPlaceDetails(place) {
+async function displayPlaceDetails(place, reviewsCursor = null) {
     const placeInfo = document.querySelector('#place-details .place-info');
     const reviewsSection = document.getElementById('reviews');
     const token = getCookie('token');
@@ -103,54 +103,18 @@ async function displayPlaceDetails(place) {
     }
 
     if (reviewsSection) {
-        reviewsSection.querySelectorAll('.review-card, .review-summary').forEach(el => el.remove());
+        reviewsSection.querySelectorAll('.review-card, .review-summary, #more-reviews').forEach(el => el.remove());
 
         if (place.reviews && place.reviews.length > 0) {
-            // Average rating + count
-            const avg = (place.reviews.reduce((sum, r) => sum + r.rating, 0) / place.reviews.length).toFixed(1);
+            // Average rating + count, maintained by the API over every review
             const summary = document.createElement('div');
             summary.className = 'review-summary';
-            summary.innerHTML = `<span class="review-avg-stars">★</span> <strong>${avg}</strong> · ${place.reviews.length} review${place.reviews.length > 1 ? 's' : ''}`;
+            summary.innerHTML = `<span class="review-avg-stars">★</span> <strong>${place.average_rating.toFixed(1)}</strong> · ${place.review_count} review${place.review_count > 1 ? 's' : ''}`;
             reviewsSection.appendChild(summary);
 
-            // Sort newest first
-            const sorted = [...place.reviews].reverse();
-
-            // Fetch all user names in parallel, then render all cards at once
-            const userNames = await Promise.all(sorted.map(async review => {
-                try {
-                    const userResponse = await fetch(`${API_URL}/users/${review.user_id}`);
-                    if (userResponse.ok) {
-                        const user = await userResponse.json();
-                        return `${user.first_name} ${user.last_name}`;
-                    }
-                } catch (e) { /* ignore */ }
-                return 'Anonymous';
-            }));
-
-            const fragment = document.createDocumentFragment();
-            sorted.forEach((review, i) => {
-                const userName = userNames[i];
-                const initials = userName === 'Anonymous' ? '?' : userName.split(' ').map(n => n[0]).join('').toUpperCase().slice(0, 2);
-                const date = review.created_at ? new Date(review.created_at).toLocaleDateString('en-US', { year: 'numeric', month: 'long', day: 'numeric' }) : '';
-                const card = document.createElement('div');
-                card.className = 'review-card';
-                card.innerHTML = `
-                    <div class="review-header">
-                        <div class="reviewer-info">
-                            <div class="reviewer-avatar">${initials}</div>
-                            <div>
-                                <span class="reviewer-name">${userName}</span>
-                                ${date ? `<span class="review-date">${date}</span>` : ''}
-                            </div>
-                        </div>
-                        <span class="stars">${'★'.repeat(review.rating)}${'☆'.repeat(5 - review.rating)}</span>
-                    </div>
-                    <p class="review-text">${review.text}</p>
-                `;
-                fragment.appendChild(card);
-            });
-            reviewsSection.appendChild(fragment);
+            // Newest first, each with its reviewer's name: no request per review
+            appendReviews(reviewsSection, place.reviews);
+            addMoreReviewsButton(reviewsSection, place.id, reviewsCursor);
         } else {
             const noReviews = document.createElement('p');
             noReviews.classList.add('text-muted');
@@ -162,14 +126,78 @@ async function displayPlaceDetails(place) {
     if (token && addReviewSection) {
         const payload = JSON.parse(atob(token.split('.')[1]));
         const currentUserId = payload.sub;
-        const alreadyReviewed = place.reviews && place.reviews.some(r => r.user_id === currentUserId);
         const isOwner = place.owner && place.owner.id === currentUserId;
-        if (alreadyReviewed || isOwner) {
+        if (isOwner || await hasReviewed(place, currentUserId)) {
             addReviewSection.style.display = 'none';
         }
     }
 }
 
+function appendReviews(reviewsSection, reviews) {
+    const fragment = document.createDocumentFragment();
+    reviews.forEach(review => {
+        const userName = review.user ? `${review.user.first_name} ${review.user.last_name}` : 'Anonymous';
+        const initials = userName === 'Anonymous' ? '?' : userName.split(' ').map(n => n[0]).join('').toUpperCase().slice(0, 2);
+        const date = review.created_at ? new Date(review.created_at).toLocaleDateString('en-US', { year: 'numeric', month: 'long', day: 'numeric' }) : '';
+        const card = document.createElement('div');
+        card.className = 'review-card';
+        card.innerHTML = `
+            <div class="review-header">
+                <div class="reviewer-info">
+                    <div class="reviewer-avatar">${initials}</div>
+                    <div>
+                        <span class="reviewer-name">${userName}</span>
+                        ${date ? `<span class="review-date">${date}</span>` : ''}
+                    </div>
+                </div>
+                <span class="stars">${'★'.repeat(review.rating)}${'☆'.repeat(5 - review.rating)}</span>
+            </div>
+            <p class="review-text">${review.text}</p>
+        `;
+        fragment.appendChild(card);
+    });
+    const moreButton = reviewsSection.querySelector('#more-reviews');
+    reviewsSection.insertBefore(fragment, moreButton);
+}
+
+function addMoreReviewsButton(reviewsSection, placeId, cursor) {
+    if (!cursor) return;
+    const button = document.createElement('button');
+    button.type = 'button';
+    button.id = 'more-reviews';
+    button.className = 'details-button';
+    button.textContent = 'Show more reviews';
+    button.dataset.cursor = cursor;
+    button.addEventListener('click', async () => {
+        // Next page of the same newest-first order as the place detail
+        const params = new URLSearchParams({ sort: '-created_at', limit: 20, cursor: button.dataset.cursor });
+        try {
+            const response = await fetch(`${API_URL}/places/${placeId}/reviews?${params}`);
+            if (!response.ok) return;
+            appendReviews(reviewsSection, await response.json());
+            const next = response.headers.get('X-Next-Cursor');
+            if (next) button.dataset.cursor = next;
+            else button.remove();
+        } catch (error) {
+            console.error('Connection error:', error);
+        }
+    });
+    reviewsSection.appendChild(button);
+}
+
+async function hasReviewed(place, userId) {
+    if (place.reviews && place.reviews.some(r => r.user_id === userId)) return true;
+    if (!place.review_count || place.reviews.length >= place.review_count) return false;
+    // Older reviews are not embedded: one indexed lookup instead of paging through them
+    try {
+        const params = new URLSearchParams({ place_id: place.id, user_id: userId, limit: 1, fields: 'id' });
+        const response = await fetch(`${API_URL}/reviews/?${params}`);
+        return response.ok && (await response.json()).length > 0;
+    } catch (error) {
+        return false;
+    }
+}
+
 function openLightbox(src) {
     const lightbox = document.getElementById('lightbox');
     const img = document.getElementById('lightbox-img');